@@ -0,0 +1,110 @@
+import pandas as pd
+
+from instrumentacao import etapa
+from pagamentos import alocar_pagamentos_individuais, calcular_pagamentos_semanais
+
+# Dimensões do cubo. Data acompanha Dia (uma aba é uma semana), então quase não
+# aumenta o número de células e permite contar os dias trabalhados.
+DIMENSOES_CUBO = ['Semana', 'Nome', 'Categoria', 'Dia', 'Data', 'Pagamento']
+
+# Medidas somáveis de cada célula
+MEDIDAS_CUBO = ['Serviço', 'Gorjeta', 'Pets', 'Atendimentos', 'Clientes', 'Pagamento Tecnico', 'Lucro Empresa']
+
+DIAS_ORDENADOS = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
+
+
+def montar_cubo(completed_services):
+    """Agrega os atendimentos realizados por DIMENSOES_CUBO com somas e contagens
+
+    Atendimentos conta as linhas de cada célula e Clientes as linhas com
+    cliente preenchido. Pagamento sem forma válida (None) forma células
+    próprias, para que os totais do cubo batam com os dos atendimentos.
+    """
+    return completed_services.groupby(DIMENSOES_CUBO, observed=True, dropna=False, sort=False).agg(
+        **{'Serviço': ('Serviço', 'sum'),
+           'Gorjeta': ('Gorjeta', 'sum'),
+           'Pets': ('Pets', 'sum'),
+           'Atendimentos': ('Serviço', 'size'),
+           'Clientes': ('Cliente', 'count')}
+    ).reset_index()
+
+
+def totais_semanais(cubo):
+    """Totais por técnico, semana e categoria com dias trabalhados, pagamento e lucro
+
+    Mesmas colunas que o app montava a partir dos atendimentos: 'Dia' é a
+    quantidade de atendimentos e 'Dias Trabalhados' o número de datas
+    distintas com atendimento do técnico na semana.
+    """
+    weekly_totals = cubo.groupby(['Nome', 'Semana', 'Categoria'], observed=True).agg(
+        **{'Serviço': ('Serviço', 'sum'),
+           'Gorjeta': ('Gorjeta', 'sum'),
+           'Dia': ('Atendimentos', 'sum')}
+    ).reset_index()
+
+    dias_trabalhados = (cubo[['Nome', 'Semana', 'Data']].dropna(subset=['Data']).drop_duplicates()
+                        .groupby(['Nome', 'Semana'], observed=True).size().reset_index(name='Dias Trabalhados'))
+    weekly_totals = pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
+
+    weekly_totals[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_semanais(weekly_totals)
+    return weekly_totals
+
+
+def resumir(cubo, por):
+    """Soma as medidas do cubo pelas dimensões em por"""
+    return cubo.groupby(por, observed=True)[MEDIDAS_CUBO].sum().reset_index()
+
+
+def analisar(data, atendimentos=None):
+    """Separa os atendimentos e monta o cubo e os totais semanais de um recorte dos dados
+
+    atendimentos, se informado, é o par (completed_services, not_completed)
+    já separado (ex.: por IndiceFiltros.recorte). Retorna um dict com
+    'completed_services' (com o pagamento de cada atendimento),
+    'not_completed', 'cubo' e 'weekly_totals'. O pagamento semanal é
+    proporcional ao serviço, então distribuí-lo pelas células do cubo dá as
+    mesmas somas que distribuí-lo pelos atendimentos.
+    """
+    if atendimentos is None:
+        atendimentos = (data[data['Realizado']].copy(), data[~data['Realizado'] & data['Cliente'].notna()])
+    completed_services, not_completed = atendimentos
+
+    with etapa('aggregate', atendimentos=len(completed_services)):
+        cubo = montar_cubo(completed_services)
+    with etapa('payout', atendimentos=len(completed_services)):
+        weekly_totals = totais_semanais(cubo)
+        cubo[['Pagamento Tecnico', 'Lucro Empresa']] = alocar_pagamentos_individuais(cubo, weekly_totals)
+        completed_services[['Pagamento Tecnico', 'Lucro Empresa']] = alocar_pagamentos_individuais(
+            completed_services, weekly_totals)
+
+    return {'completed_services': completed_services, 'not_completed': not_completed,
+            'cubo': cubo, 'weekly_totals': weekly_totals}
+
+
+def resumo_pagamentos(cubo, formas_validas):
+    """Totais por forma de pagamento válida"""
+    return resumir(cubo[cubo['Pagamento'].isin(formas_validas)], 'Pagamento')
+
+
+def resumo_dias(cubo):
+    """Totais por dia da semana, de domingo a sábado"""
+    resumo = resumir(cubo, 'Dia')
+    resumo['Dia'] = pd.Categorical(resumo['Dia'], categories=DIAS_ORDENADOS, ordered=True)
+    return resumo.sort_values('Dia').reset_index(drop=True)
+
+
+def resumo_tecnicos(weekly_totals):
+    """Totais por técnico e categoria a partir dos totais semanais, com médias por atendimento"""
+    resumo = weekly_totals.groupby(['Nome', 'Categoria'], observed=True).agg({
+        'Serviço': 'sum',
+        'Gorjeta': 'sum',
+        'Pagamento Tecnico': 'sum',
+        'Lucro Empresa': 'sum',
+        'Dia': 'sum',
+        'Dias Trabalhados': 'sum'
+    }).reset_index()
+    resumo.columns = ['Técnico', 'Categoria', 'Total Serviços', 'Total Gorjetas', 'Total Pagamento',
+                      'Lucro Empresa', 'Atendimentos', 'Dias Trabalhados']
+    resumo['Média Atendimento'] = resumo['Total Serviços'] / resumo['Atendimentos']
+    resumo['Gorjeta Média'] = resumo['Total Gorjetas'] / resumo['Atendimentos']
+    return resumo
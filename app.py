@@ -1,578 +1,91 @@
 import pandas as pd
-import numpy as np
 import streamlit as st
-import plotly.express as px
-import openpyxl
-from io import BytesIO
-import requests
-from fpdf import FPDF
-from datetime import datetime
+from collections import OrderedDict
+import os
+import tempfile
+import time
+import tracemalloc
+
+from agregacoes import MEDIDAS_CUBO, analisar, resumo_dias, resumo_pagamentos, resumo_tecnicos
+from armazenamento import assinatura_base, carregar_base, importar_planilha
+from cache_planilhas import CachePlanilhas
+from download import baixador_padrao
+from explorador import fatia, ordem_linhas
+from exportacao import FORMATOS_EXPORTACAO, exportar_para_arquivo
+from graficos import (figura_atendimentos_tecnico, figura_dias, figura_evolucao, figura_gorjetas_tecnico,
+                      figura_pagamento_semanal, figura_total_pagamentos, figura_usos_pagamentos)
+from indice import indexar_planilhas
+from instrumentacao import coletar, configurar_log, etapa
+from ingestao import IngestaoIncremental, processar_em_paralelo
+from planilhas import FORMAS_PAGAMENTO_VALIDAS, otimizar_tipos, process_spreadsheet_streaming
+from relatorio import create_pdf, format_currency
+from timbrado import Timbrado
 
 st.set_page_config(page_title="Análise de Serviços Técnicos", layout="wide")
 
-FORMAS_PAGAMENTO_VALIDAS = [
-    'Check', 'American Express', 'Apple Pay', 'Discover',
-    'Master Card', 'Visa', 'Zelle', 'Cash', 'Invoice'
-]
-
-INVALID_CLIENTS = ['SERVICES IN:', 'BNS PROFIT:', 'Total']
-
-
-def format_currency(value):
-    """Formata valores como moeda USD com 2 casas decimais"""
-    if pd.isna(value):
-        return None
-    return f"${value:,.2f}"
-
-
-def create_pdf(data):
-    """Cria um PDF com os dados da página principal"""
-    pdf = FPDF(orientation='P', unit='mm', format='A4')
-    pdf.add_page()
-    pdf.set_font("Arial", size=10)
-
-    # Configurações de margem
-    left_margin = 10
-    right_margin = 10
-    pdf.set_left_margin(left_margin)
-    pdf.set_right_margin(right_margin)
-    page_width = pdf.w - left_margin - right_margin
-
-    # Adiciona título
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(page_width, 10, txt="BNS - PORTAL DE ANÁLISES DE DADOS FINANCEIROS", ln=1, align='C')
-    pdf.ln(5)
-
-    # Adiciona data de geração
-    pdf.set_font("Arial", size=10)
-    pdf.cell(page_width, 10, txt=f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", ln=1, align='R')
-    pdf.ln(10)
-
-    # Seção 1: Métricas Gerais
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(page_width, 10, txt="1. Métricas Gerais", ln=1)
-    pdf.set_font("Arial", size=10)
-
-    completed_services = data[data['Realizado']]
-    not_completed = data[(data['Realizado'] == False) & (data['Cliente'].notna())]
-
-    metrics = [
-        ("Atendimentos Realizados", len(completed_services)),
-        ("Atendimentos Não Realizados", len(not_completed)),
-        ("Total em Serviços", format_currency(completed_services['Serviço'].sum())),
-        ("Total em Gorjetas", format_currency(completed_services['Gorjeta'].sum())),
-        ("Lucro da Empresa", format_currency(completed_services['Lucro Empresa'].sum()))
-    ]
-
-    for metric, value in metrics:
-        pdf.cell(page_width / 2, 10, txt=f"{metric}:", ln=0)
-        pdf.cell(page_width / 2, 10, txt=str(value), ln=1)
-
-    pdf.ln(10)
-
-    # Seção 2: Resumo por Técnico
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(page_width, 10, txt="2. Resumo por Técnico", ln=1)
-
-    # Prepara dados para a tabela
-    tech_summary = completed_services.groupby(['Nome', 'Categoria']).agg({
-        'Serviço': 'sum',
-        'Gorjeta': 'sum',
-        'Pagamento Tecnico': 'sum',
-        'Lucro Empresa': 'sum',
-        'Cliente': 'count'
-    }).reset_index()
-
-    tech_summary.columns = ['Técnico', 'Categoria', 'Total Serviços', 'Total Gorjetas',
-                            'Total Pagamento', 'Lucro Empresa', 'Atendimentos']
-
-    # Adiciona tabela de técnicos
-    pdf.set_font("Arial", size=8)  # Fonte menor para caber mais colunas
-    col_widths = [30, 25, 25, 25, 25, 25]  # Larguras ajustadas para caber na página
-
-    # Cabeçalho da tabela
-    headers = ["Técnico", "Categoria", "Serviços", "Gorjetas", "Pagamento", "Lucro"]
-    for i, header in enumerate(headers):
-        pdf.cell(col_widths[i], 10, txt=header, border=1, align='C')
-    pdf.ln()
-
-    # Linhas da tabela
-    for _, row in tech_summary.iterrows():
-        # Quebra de linha se o nome for muito longo
-        tech_name = str(row['Técnico'])[:15] + '...' if len(str(row['Técnico'])) > 15 else str(row['Técnico'])
-        pdf.cell(col_widths[0], 10, txt=tech_name, border=1)
-        pdf.cell(col_widths[1], 10, txt=str(row['Categoria'])[:10], border=1)  # Limita categoria
-        pdf.cell(col_widths[2], 10, txt=format_currency(row['Total Serviços']), border=1, align='R')
-        pdf.cell(col_widths[3], 10, txt=format_currency(row['Total Gorjetas']), border=1, align='R')
-        pdf.cell(col_widths[4], 10, txt=format_currency(row['Total Pagamento']), border=1, align='R')
-        pdf.cell(col_widths[5], 10, txt=format_currency(row['Lucro Empresa']), border=1, align='R')
-        pdf.ln()
-
-    pdf.ln(10)
-
-    # Seção 3: Métodos de Pagamento
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(page_width, 10, txt="3. Métodos de Pagamento", ln=1)
-    pdf.set_font("Arial", size=10)
-
-    valid_payments = completed_services[completed_services['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
-
-    if not valid_payments.empty:
-        payment_methods = valid_payments.groupby('Pagamento').agg({
-            'Serviço': ['sum', 'count'],
-            'Gorjeta': 'sum',
-            'Lucro Empresa': 'sum'
-        }).reset_index()
-
-        payment_methods.columns = ['Método', 'Total Serviços', 'Qtd Usos', 'Total Gorjetas', 'Lucro Empresa']
-        payment_methods['Total Geral'] = payment_methods['Total Serviços'] + payment_methods['Total Gorjetas']
-
-        # Tabela de métodos de pagamento
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(page_width, 10, txt="Resumo por Método de Pagamento:", ln=1)
-        pdf.set_font("Arial", size=8)  # Fonte menor para tabela
-
-        # Cabeçalho
-        headers = ["Método", "Usos", "Serviços", "Gorjetas", "Total", "Lucro"]
-        col_widths_payments = [30, 20, 25, 25, 25, 25]  # Larguras ajustadas
-
-        for i, header in enumerate(headers):
-            pdf.cell(col_widths_payments[i], 10, txt=header, border=1, align='C')
-        pdf.ln()
-
-        # Linhas
-        for _, row in payment_methods.iterrows():
-            pdf.cell(col_widths_payments[0], 10, txt=str(row['Método'])[:12], border=1)  # Limita método
-            pdf.cell(col_widths_payments[1], 10, txt=str(row['Qtd Usos']), border=1, align='C')
-            pdf.cell(col_widths_payments[2], 10, txt=format_currency(row['Total Serviços']), border=1, align='R')
-            pdf.cell(col_widths_payments[3], 10, txt=format_currency(row['Total Gorjetas']), border=1, align='R')
-            pdf.cell(col_widths_payments[4], 10, txt=format_currency(row['Total Geral']), border=1, align='R')
-            pdf.cell(col_widths_payments[5], 10, txt=format_currency(row['Lucro Empresa']), border=1, align='R')
-            pdf.ln()
-
-        # Adiciona porcentagem de uso
-        pdf.ln(5)
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(page_width, 10, txt="Distribuição por Método de Pagamento:", ln=1)
-        pdf.set_font("Arial", size=10)
-
-        total_usos = payment_methods['Qtd Usos'].sum()
-        for _, row in payment_methods.iterrows():
-            percent = (row['Qtd Usos'] / total_usos * 100)
-            pdf.cell(page_width / 2, 10, txt=f"{row['Método']}:", ln=0)
-            pdf.cell(page_width / 2, 10, txt=f"{percent:.1f}% ({row['Qtd Usos']} usos)", ln=1)
-
-    pdf.ln(10)
-
-    # Seção 4: Atendimentos por Dia da Semana
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(page_width, 10, txt="4. Atendimentos por Dia da Semana", ln=1)
-    pdf.set_font("Arial", size=10)
-
-    day_summary = completed_services.groupby('Dia').agg({
-        'Serviço': ['count', 'sum'],
-        'Gorjeta': 'sum',
-        'Lucro Empresa': 'sum'
-    }).reset_index()
-
-    day_summary.columns = ['Dia', 'Atendimentos', 'Total Serviços', 'Total Gorjetas', 'Lucro Empresa']
-
-    # Ordena os dias corretamente
-    day_order = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
-    day_summary['Dia'] = pd.Categorical(day_summary['Dia'], categories=day_order, ordered=True)
-    day_summary = day_summary.sort_values('Dia')
-
-    # Tabela de dias
-    col_widths_days = [30, 25, 30, 30, 30]  # Larguras ajustadas
-    headers = ["Dia", "Atend.", "Serviços", "Gorjetas", "Lucro"]
-
-    pdf.set_font("Arial", size=8)
-    for i, header in enumerate(headers):
-        pdf.cell(col_widths_days[i], 10, txt=header, border=1, align='C')
-    pdf.ln()
-
-    for _, row in day_summary.iterrows():
-        pdf.cell(col_widths_days[0], 10, txt=str(row['Dia']), border=1)
-        pdf.cell(col_widths_days[1], 10, txt=str(row['Atendimentos']), border=1, align='C')
-        pdf.cell(col_widths_days[2], 10, txt=format_currency(row['Total Serviços']), border=1, align='R')
-        pdf.cell(col_widths_days[3], 10, txt=format_currency(row['Total Gorjetas']), border=1, align='R')
-        pdf.cell(col_widths_days[4], 10, txt=format_currency(row['Lucro Empresa']), border=1, align='R')
-        pdf.ln()
-
-    pdf.ln(10)
-
-    # Seção 5: Atendimentos Não Realizados
-    if len(not_completed) > 0:
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(page_width, 10, txt="5. Atendimentos Não Realizados", ln=1)
-        pdf.set_font("Arial", size=10)
-
-        pdf.cell(page_width, 10, txt=f"Total de atendimentos não realizados: {len(not_completed)}", ln=1)
-
-        # Lista os primeiros 10 atendimentos não realizados
-        pdf.set_font("Arial", size=8)
-        for idx, row in not_completed.head(10).iterrows():
-            pdf.cell(page_width, 10,
-                     txt=f"- {row['Nome']} | {row['Dia']} {row['Data'].strftime('%d/%m')} | {row['Cliente']}",
-                     ln=1)
-
-    return pdf
-
-
-def create_tech_payment_receipt(tech_data, tech_name, week):
-    """Cria um PDF com o recibo de pagamento detalhado para o técnico com papel timbrado"""
-    pdf = FPDF(orientation='P', unit='mm', format='A4')
-    pdf.add_page()
-
-    # Configurações de margem
-    left_margin = 15
-    right_margin = 15
-    pdf.set_left_margin(left_margin)
-    pdf.set_right_margin(right_margin)
-    page_width = pdf.w - left_margin - right_margin
-    page_height = pdf.h
-
-    # Calcular intervalo de datas
-    min_date = tech_data['Data'].min().strftime('%m/%d/%y')
-    max_date = tech_data['Data'].max().strftime('%m/%d/%y')
-    date_range = f"{min_date} to {max_date}"
-
-    # Restante do conteúdo do recibo
-    pdf.set_font("Arial", 'B', 18)
-    pdf.cell(page_width, 10, txt="TECHNICIAN PAYMENT RECEIPT", ln=1, align='C')
-    pdf.ln(9)
-
-    # Informações do técnico e semana
-    pdf.set_font("Arial", size=10)
-    pdf.cell(page_width, 8, txt=f"Technician: {tech_name}", ln=1)
-    pdf.cell(page_width, 8, txt=f"Reference: {date_range}", ln=1)  # Alterado para mostrar intervalo de datas
-    pdf.cell(page_width, 8, txt=f"Date of issue: {datetime.now().strftime('%m/%d/%Y')}", ln=1)
-    pdf.ln(10)
-
-    # Resumo de atendimentos
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(page_width, 10, txt="SUMMARY OF SERVICES", ln=1)
-    pdf.set_font("Arial", size=10)
-
-    total_services = tech_data['Serviço'].sum()
-    total_tips = tech_data['Gorjeta'].sum()
-    total_payment = tech_data['Pagamento Tecnico'].sum()
-
-    # Formata os valores
-    def format_value(value):
-        return f"${value:,.2f}" if isinstance(value, (int, float)) else str(value)
-
-    # Tabela de resumo
-    col_widths = [page_width / 2, page_width / 2]
-
-    pdf.cell(col_widths[0], 10, txt="Total Schedules:", border='B', ln=0)
-    pdf.cell(col_widths[1], 10, txt=str(len(tech_data)), border='B', ln=1, align='R')
-
-    pdf.cell(col_widths[0], 10, txt="Total in Services:", border='B', ln=0)
-    pdf.cell(col_widths[1], 10, txt=format_value(total_services), border='B', ln=1, align='R')
-
-    pdf.cell(col_widths[0], 10, txt="Total in Tips:", border='B', ln=0)
-    pdf.cell(col_widths[1], 10, txt=format_value(total_tips), border='B', ln=1, align='R')
-
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(col_widths[0], 10, txt="Total Payment", border='B', ln=0)
-    pdf.cell(col_widths[1], 10, txt=format_value(total_payment), border='B', ln=1, align='R')
-    pdf.set_font("Arial", size=10)
-
-    pdf.ln(15)
-
-    # Detalhes por dia
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(page_width, 10, txt="DETAILS BY DAY", ln=1)
-    pdf.set_font("Arial", size=8)
-
-    # Agrupar por dia
-    day_details = tech_data.groupby('Dia').agg({
-        'Serviço': 'sum',
-        'Gorjeta': 'sum',
-        'Cliente': 'count',
-        'Pagamento': lambda x: ', '.join([str(p) for p in x.unique() if pd.notna(p)])
-    }).reset_index()
-
-    # Mapear os dias para inglês
-    day_mapping = {
-        'Domingo': 'Sun',
-        'Segunda': 'Mon',
-        'Terça': 'Tue',
-        'Quarta': 'Wed',
-        'Quinta': 'Thu',
-        'Sexta': 'Fri',
-        'Sábado': 'Sat'
-    }
-    day_details['Dia'] = day_details['Dia'].map(day_mapping)
-
-    # Ordenar os dias corretamente
-    day_order = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
-    day_details['Dia'] = pd.Categorical(day_details['Dia'], categories=day_order, ordered=True)
-    day_details = day_details.sort_values('Dia')
-
-    # Cabeçalho da tabela
-    col_widths = [46, 46, 47, 46]  # Ajustado para caber no timbrado
-    headers = ["Day", "Showed", "Services", "Tips"]
-
-    pdf.set_font("Arial", 'B', 7)
-    for i, header in enumerate(headers):
-        pdf.cell(col_widths[i], 6, txt=header, border=1, align='C')
-    pdf.ln()
-
-    # Linhas da tabela
-    pdf.set_font("Arial", size=7)
-    for _, row in day_details.iterrows():
-        pdf.cell(col_widths[0], 6, txt=str(row['Dia']), border=1)  # Dia em inglês
-        pdf.cell(col_widths[1], 6, txt=str(row['Cliente']), border=1, align='C')
-        pdf.cell(col_widths[2], 6, txt=format_value(row['Serviço']), border=1, align='R')
-        pdf.cell(col_widths[3], 6, txt=format_value(row['Gorjeta']), border=1, align='R')
-
-        pdf.ln()
-
-    pdf.ln(10)
-
-    # Detalhes dos atendimentos (se couber na página)
-    if pdf.get_y() < page_height - 50:  # Verifica se há espaço na página
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(page_width, 10, txt="SERVICE DETAILS", ln=1)
-        pdf.set_font("Arial", size=7)
-
-        # Ordenar por data e dia
-        tech_data_sorted = tech_data.sort_values(['Data', 'Dia'])
-
-        # Cabeçalho da tabela detalhada
-        col_widths_detailed = [25, 25, 60, 25, 25, 25]  # Ajustado para timbrado
-        headers_detailed = ["Date", "Day", "Customer", "Service", "Tips", "Payment"]
-
-        pdf.set_font("Arial", 'B', 7)
-        for i, header in enumerate(headers_detailed):
-            pdf.cell(col_widths_detailed[i], 6, txt=header, border=1, align='C')
-        pdf.ln()
-
-        # Linhas da tabela detalhada
-        pdf.set_font("Arial", size=7)
-        for _, row in tech_data_sorted.iterrows():
-            if pdf.get_y() > page_height - 20:  # Verifica fim da página
-                pdf.add_page()
-                # Adiciona timbrado na nova página
-                try:
-                    pdf.image(timbrado_url, x=0, y=0, w=pdf.w, h=pdf.h, type='PNG')
-                    pdf.set_fill_color(255, 255, 255, 80)
-                    pdf.rect(0, 0, pdf.w, pdf.h, 'F')
-                except:
-                    pass
-                pdf.set_y(30)
-
-                # Recria cabeçalho da tabela
-                pdf.set_font("Arial", 'B', 7)
-                for i, header in enumerate(headers_detailed):
-                    pdf.cell(col_widths_detailed[i], 8, txt=header, border=1, align='C')
-                pdf.ln()
-                pdf.set_font("Arial", size=6)
-
-            # Data
-            pdf.cell(col_widths_detailed[0], 6, txt=row['Data'].strftime('%d/%m'), border=1)
-            # Dia (convertido para inglês)
-            day_english = day_mapping.get(row['Dia'], row['Dia'])
-            pdf.cell(col_widths_detailed[1], 6, txt=day_english, border=1)
-            # Cliente
-            client_name = str(row['Cliente'])[:20] + '...' if len(str(row['Cliente'])) > 20 else str(row['Cliente'])
-            pdf.cell(col_widths_detailed[2], 6, txt=client_name, border=1)
-            # Serviço
-            pdf.cell(col_widths_detailed[3], 6, txt=format_value(row['Serviço']), border=1, align='R')
-            # Gorjeta
-            pdf.cell(col_widths_detailed[4], 6, txt=format_value(row['Gorjeta']), border=1, align='R')
-            # Pagamento
-            payment = str(row['Pagamento']) if pd.notna(row['Pagamento']) else "-"
-            pdf.cell(col_widths_detailed[5], 6, txt=payment[:12], border=1)
-            pdf.ln()
-
-    # Informação da empresa no rodapé
-    pdf.set_font("Arial", size=8)
-    pdf.cell(page_width, 5, txt="BRIGHT N SHINE PET DENTAL LLC", ln=1, align='C')
-    pdf.cell(page_width, 5, txt="(407)259-7897", ln=1, align='C')
-
-    return pdf
-
-
-def process_spreadsheet(file):
-    all_weeks_data = {}
-    if isinstance(file, str) and file.startswith('http'):
-        response = requests.get(file)
-        file = BytesIO(response.content)
-    elif isinstance(file, BytesIO):
-        file.seek(0)
-
-    xls = pd.ExcelFile(file)
-    for sheet_name in xls.sheet_names:
-        if sheet_name.startswith('WEEK'):
-            df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
-            technician_blocks = []
-            current_block = []
-            collecting = False
-            for idx, row in df.iterrows():
-                if any('NAME:' in str(cell) for cell in row.values):
-                    if current_block:
-                        technician_blocks.append(current_block)
-                        current_block = []
-                    collecting = True
-                if collecting:
-                    current_block.append(row)
-            if current_block:
-                technician_blocks.append(current_block)
-
-            week_data = []
-            for block in technician_blocks:
-                name_row = next((row for row in block if any('NAME:' in str(cell) for cell in row.values)), None)
-
-                if name_row is None:
-                    continue
-                name_col = next(
-                    (i for i, cell in enumerate(name_row.values) if isinstance(cell, str) and 'NAME:' in cell), None)
-
-                technician_info = {
-                    'Semana': sheet_name,
-                    'Nome': name_row[name_col + 1] if name_col is not None else None,
-                    'Categoria': name_row[name_col + 3] if name_col is not None else None,
-                    'Origem': name_row[name_col + 5] if name_col is not None and 'From:' in str(
-                        name_row[name_col + 4]) else None
-                }
-
-                header_row = next((i for i, row in enumerate(block) if all(
-                    keyword in str(row.values) for keyword in ['Schedule', 'DATE', 'SERVICE'])), None)
-                if header_row is None:
-                    continue
-
-                days_data = []
-                for i in range(header_row + 1, len(block)):
-                    day_row = block[i]
-                    for day_idx, day_col in enumerate(
-                            [(1, 9), (10, 18), (19, 27), (28, 36), (37, 45), (46, 54), (55, 63)]):
-                        start_col, end_col = day_col
-                        day_data = day_row[start_col:end_col + 1].values
-                        client_name = str(day_data[0]).strip() if pd.notna(day_data[0]) else ''
-
-                        # Ignorar linhas inválidas
-                        if not client_name or client_name.upper() in [c.upper() for c in INVALID_CLIENTS]:
-                            continue
-
-                        # Verificar se é um atendimento válido (tem valor de serviço)
-                        if pd.notna(day_data[2]) and str(day_data[2]).strip() and str(day_data[2]).strip() != 'nan':
-                            try:
-                                service_value = float(day_data[2])
-                            except:
-                                service_value = np.nan
-                            if not np.isnan(service_value):
-                                pagamento = day_data[5] if pd.notna(day_data[5]) and str(
-                                    day_data[5]).strip() in FORMAS_PAGAMENTO_VALIDAS else None
-                                tip_value = float(day_data[3]) if pd.notna(day_data[3]) else 0
-                                day_info = {
-                                    'Dia': ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'][
-                                        day_idx],
-                                    'Data': day_data[1],
-                                    'Cliente': client_name,
-                                    'Serviço': service_value,
-                                    'Gorjeta': tip_value,
-                                    'Pets': day_data[4] if pd.notna(day_data[4]) else 0,
-                                    'Pagamento': pagamento,
-                                    'ID Pagamento': day_data[6] if pd.notna(day_data[6]) else None,
-                                    'Verificado': day_data[7] if pd.notna(day_data[7]) else False,
-                                    'Realizado': True
-                                }
-                                days_data.append({**technician_info, **day_info})
-                        elif pd.notna(day_data[0]):
-                            if client_name.upper() in [c.upper() for c in INVALID_CLIENTS]:
-                                continue
-                            day_info = {
-                                'Dia': ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'][day_idx],
-                                'Data': day_data[1],
-                                'Cliente': client_name,
-                                'Serviço': 0,
-                                'Gorjeta': 0,
-                                'Pets': 0,
-                                'Pagamento': None,
-                                'ID Pagamento': None,
-                                'Verificado': False,
-                                'Realizado': False
-                            }
-                            days_data.append({**technician_info, **day_info})
-
-                week_data.extend(days_data)
-            if week_data:
-                all_weeks_data[sheet_name] = pd.DataFrame(week_data)
-
-    if all_weeks_data:
-        combined_data = pd.concat(all_weeks_data.values(), ignore_index=True)
-        combined_data['Data'] = pd.to_datetime(combined_data['Data'], errors='coerce')
-        combined_data['Serviço'] = pd.to_numeric(combined_data['Serviço'], errors='coerce')
-        combined_data['Gorjeta'] = pd.to_numeric(combined_data['Gorjeta'], errors='coerce').fillna(0)
-        combined_data['Pets'] = pd.to_numeric(combined_data['Pets'], errors='coerce').fillna(0)
-        combined_data = combined_data.dropna(subset=['Data'])
-        combined_data = combined_data[
-            ~combined_data['Cliente'].astype(str).str.strip().str.upper().isin([c.upper() for c in INVALID_CLIENTS])]
-        return combined_data
-    return pd.DataFrame()
-
-
-def calcular_pagamento_individual(row, weekly_data):
-    """Calcula o pagamento individual de cada atendimento"""
-    tech_week_data = weekly_data[
-        (weekly_data['Nome'] == row['Nome']) &
-        (weekly_data['Semana'] == row['Semana'])
-        ]
-
-    if len(tech_week_data) == 0:
-        return pd.Series([0, row['Serviço'] + row['Gorjeta']])
-
-    total_pagamento = tech_week_data['Pagamento Tecnico'].iloc[
-        0] if 'Pagamento Tecnico' in tech_week_data.columns else 0
-    total_servico = tech_week_data['Serviço'].sum()
-
-    if total_servico == 0:
-        return pd.Series([0, row['Serviço'] + row['Gorjeta']])
-
-    # Pagamento proporcional ao serviço realizado neste atendimento
-    try:
-        pagamento = (row['Serviço'] / total_servico) * total_pagamento
-        lucro = row['Serviço'] + row['Gorjeta'] - pagamento
-    except:
-        pagamento = 0
-        lucro = row['Serviço'] + row['Gorjeta']
-
-    return pd.Series([pagamento, lucro])
-
-
-def calcular_pagamento_semanal(row):
-    """Calcula o pagamento semanal baseado na categoria"""
-    categoria = row['Categoria']
-    servico = row['Serviço']
-    gorjeta = row['Gorjeta']
-    dias_trabalhados = row['Dias Trabalhados']
-
-    if categoria == 'Registering':
-        pagamento = 0.00
-        lucro = servico + gorjeta
-    elif categoria == 'Technician':
-        pagamento = servico * 0.20 + gorjeta
-        lucro = servico * 0.80
-    elif categoria == 'Training':
-        pagamento = 80 * dias_trabalhados  # $80 por dia trabalhado
-        lucro = servico + gorjeta - pagamento
-    elif categoria == 'Coordinator':
-        pagamento = servico * 0.25 + gorjeta
-        lucro = servico * 0.75
-    elif categoria == 'Started':
-        # Aplicar cálculo por semana individualmente
-        valor_comissao = servico * 0.20 + gorjeta
-        valor_minimo = 150 * dias_trabalhados
-        pagamento = max(valor_minimo, valor_comissao)
-        lucro = servico + gorjeta - pagamento
-    else:
-        pagamento = 0
-        lucro = servico + gorjeta
 
-    return pd.Series([pagamento, lucro])
+@st.cache_resource
+def obter_cache_planilhas():
+    """Cache de planilhas compartilhado entre reruns e sessões"""
+    return CachePlanilhas(
+        max_itens=int(os.environ.get('CACHE_PLANILHAS_ITENS', 32)),
+        diretorio=os.environ.get('CACHE_PLANILHAS_DIR') or None,
+        max_bytes_disco=int(os.environ.get('CACHE_PLANILHAS_MAX_MB', 512)) * 1024 * 1024)
+
+
+@st.cache_resource
+def obter_ingestao_incremental():
+    """Impressões digitais e registros por aba das planilhas já carregadas"""
+    return IngestaoIncremental()
+
+
+@st.cache_resource
+def obter_timbrado():
+    """Papel timbrado dos recibos (TIMBRADO_RECIBO: caminho ou URL), ou None se não configurado
+
+    Um timbrado configurado mas indisponível levanta a exceção, que não fica
+    em cache: o erro aparece ao gerar o recibo e a carga é tentada de novo.
+    """
+    origem = os.environ.get('TIMBRADO_RECIBO')
+    return Timbrado(origem) if origem else None
+
+
+def memorizar_na_sessao(nome, chave, fontes, calcular, max_itens=8):
+    """Resultado de calcular() memorizado na sessão pela chave (origem dos dados e filtros)
+
+    As fontes ficam guardadas junto com o resultado: enquanto a entrada
+    existir, os ids usados na chave não podem ser reaproveitados por outros
+    objetos.
+    """
+    memoria = st.session_state.setdefault(nome, OrderedDict())
+    if chave in memoria:
+        memoria.move_to_end(chave)
+        return memoria[chave][1]
+    resultado = calcular()
+    memoria[chave] = (fontes, resultado)
+    while len(memoria) > max_itens:
+        memoria.popitem(last=False)
+    return resultado
+
+
+def colunas_moeda(*colunas):
+    """column_config que exibe as colunas como USD ($1,234.56) sem converter os valores para texto
+
+    Os dataframes continuam numéricos (ordenação, gráficos e exportação usam
+    os próprios valores); a formatação é feita só pelo navegador, na exibição.
+    """
+    return {coluna: st.column_config.NumberColumn(coluna, format="dollar") for coluna in colunas}
+
+
+def secao_aberta(titulo, chave):
+    """Cabeçalho de uma seção do relatório e se o usuário a deixou aberta
+
+    As seções começam fechadas: depois de uma mudança de filtro só as
+    métricas gerais e as seções abertas são recalculadas e redesenhadas. O
+    estado de cada seção fica na sessão (key) e não muda com os filtros.
+    """
+    st.header(titulo)
+    return st.toggle("Mostrar", key=f"secao_{chave}")
 
 
 # Configuração da sidebar
@@ -590,25 +103,129 @@ st.title("📊 BNS - PORTAL DE ANÁLISES DE DADOS FINANCEIROS")
 
 uploaded_files = st.sidebar.file_uploader("Carregue uma ou mais planilhas Excel", type=['xlsx'],
                                           accept_multiple_files=True)
-url_input = st.sidebar.text_input("Ou cole a URL de uma planilha online")
+url_input = st.sidebar.text_area("Ou cole as URLs de planilhas online (uma por linha)",
+                                 help="As planilhas são baixadas ao mesmo tempo e lidas à medida que chegam")
+urls = [linha.strip() for linha in url_input.splitlines() if linha.strip()]
+modo_leitura = st.sidebar.selectbox(
+    "Modo de leitura",
+    ["Padrão", "Paralelo", "Streaming (baixa memória)"],
+    help="Paralelo lê as planilhas e as abas WEEK em vários processos; "
+         "Streaming lê uma linha por vez, para planilhas muito grandes")
+
+# Base histórica em Parquet (ver armazenamento.py)
+diretorio_base = os.environ.get('BASE_HISTORICA_DIR')
+usar_base = False
+if diretorio_base:
+    if uploaded_files and st.sidebar.button("📦 Importar planilhas para a base histórica"):
+        importados = sum(importar_planilha(file, diretorio_base) for file in uploaded_files)
+        st.sidebar.success(f"{importados} registros importados.")
+    if os.path.isdir(diretorio_base):
+        usar_base = st.sidebar.checkbox("📦 Analisar a base histórica",
+                                        help="Carrega os dados já importados em vez das planilhas")
+
+# Diagnóstico de desempenho: tempo e pico de memória de cada etapa desta execução.
+# O tracemalloc vale para o processo inteiro e deixa tudo mais lento enquanto ativo.
+diagnostico = st.sidebar.toggle("🩺 Diagnóstico de desempenho",
+                                help="Mede tempo e pico de memória de cada etapa (leitura, pagamentos, "
+                                     "agregações, gráficos, exportações); deixa o app mais lento enquanto ativo")
+painel_diagnostico = st.sidebar.empty()
+etapas_medidas = coletar(diagnostico)
+# Etapas sempre vão para o log em JSON (INSTRUMENTACAO_LOG: arquivo; padrão: stderr)
+configurar_log(os.environ.get('INSTRUMENTACAO_LOG'))
+if diagnostico and not tracemalloc.is_tracing():
+    tracemalloc.start()
+elif not diagnostico and tracemalloc.is_tracing():
+    tracemalloc.stop()
 
 all_dataframes = []
-if uploaded_files or url_input:
-    files_to_process = uploaded_files if uploaded_files else [url_input]
-    for file in files_to_process:
-        df = process_spreadsheet(file)
-        if not df.empty:
-            all_dataframes.append(df)
-
+if usar_base:
+    # Só as colunas dos filtros; os registros completos são lidos depois, já filtrados na base
+    all_dataframes = [carregar_base(diretorio_base, colunas=['Semana', 'Nome', 'Categoria', 'Data'])]
+elif uploaded_files or urls:
+    def planilhas_recebidas():
+        """(nome, arquivo) das planilhas carregadas ou, para URLs, de cada uma assim que termina de baixar"""
+        if uploaded_files:
+            yield from ((file.name, file) for file in uploaded_files)
+            return
+        for url, conteudo, erro in baixador_padrao().baixar_varias(urls):
+            if erro:
+                st.sidebar.warning(f"Não foi possível baixar {url}: {erro}")
+            else:
+                yield url, conteudo
+
+    cache_planilhas = obter_cache_planilhas()
+    lidas = []
+    if modo_leitura == "Paralelo":
+        recebidas = list(planilhas_recebidas())
+        dataframes, relatorio_abas = processar_em_paralelo([file for _, file in recebidas], cache=cache_planilhas,
+                                                           nomes=[nome for nome, _ in recebidas])
+        lidas = [(nome, df) for (nome, _), df in zip(recebidas, dataframes) if not df.empty]
+        if not relatorio_abas.empty:
+            erros_abas = relatorio_abas[relatorio_abas['Erro'].notna()]
+            if not erros_abas.empty:
+                st.sidebar.warning(f"{len(erros_abas)} aba(s) não puderam ser processadas.")
+            with st.sidebar.expander("⏱️ Tempo por aba"):
+                st.dataframe(relatorio_abas)
+    elif modo_leitura.startswith("Streaming"):
+        for nome_arquivo, file in planilhas_recebidas():
+            df = cache_planilhas.processar(file, leitor=process_spreadsheet_streaming)
+            if not df.empty:
+                lidas.append((nome_arquivo, df))
+    else:
+        # Planilhas já vistas com outro conteúdo: só as abas alteradas são reprocessadas
+        ingestao_incremental = obter_ingestao_incremental()
+        resumo_abas = []
+        for nome_arquivo, file in planilhas_recebidas():
+            def leitor(conteudo, nome_arquivo=nome_arquivo):
+                dados_arquivo, resumo = ingestao_incremental.processar(conteudo, nome_arquivo)
+                resumo_abas.extend(resumo)
+                return dados_arquivo
+
+            df = cache_planilhas.processar(file, leitor=leitor)
+            if not df.empty:
+                lidas.append((nome_arquivo, df))
+
+        if resumo_abas:
+            resumo_abas = pd.DataFrame(resumo_abas)
+            reprocessadas = resumo_abas['Situação'].isin(['nova', 'alterada']).sum()
+            st.sidebar.caption(f"{reprocessadas} aba(s) reprocessada(s), "
+                               f"{(resumo_abas['Situação'] == 'reaproveitada').sum()} reaproveitada(s)")
+            with st.sidebar.expander("🔁 Abas reprocessadas"):
+                st.dataframe(resumo_abas)
+
+    # Os downloads terminam em qualquer ordem: as planilhas voltam à ordem das URLs, para que a
+    # mesma entrada gere os mesmos dados (e reaproveite o índice memorizado na sessão)
+    ordem_urls = {url: i for i, url in enumerate(urls)}
+    all_dataframes = [df for _, df in sorted(lidas, key=lambda lida: ordem_urls.get(lida[0], 0))]
+
+    estatisticas = cache_planilhas.estatisticas
+    st.sidebar.caption(
+        f"Cache de planilhas: {estatisticas['acertos_memoria']} acertos em memória, "
+        f"{estatisticas['acertos_disco']} em disco, {estatisticas['falhas']} falhas")
+    if urls and not uploaded_files:
+        downloads = baixador_padrao().estatisticas
+        st.sidebar.caption(
+            f"Downloads: {downloads['baixadas']} completos, {downloads['revalidadas']} revalidados (304), "
+            f"{downloads['em_cache']} servidos do cache, {downloads['repetidas']} tentativas repetidas")
+
+if usar_base or uploaded_files or urls:
     if all_dataframes:
-        data = pd.concat(all_dataframes, ignore_index=True)
-        data = data[data['Nome'].notna() & (data['Nome'].astype(str).str.strip() != '')]
-        data = data[~data['Cliente'].astype(str).str.strip().str.upper().isin([c.upper() for c in INVALID_CLIENTS])]
-
-        # Definir opções de filtro
-        weeks = data['Semana'].unique()
-        technicians = data['Nome'].unique()
-        categories = data['Categoria'].unique()
+        origem = ('base', assinatura_base(diretorio_base)) if usar_base else tuple(map(id, all_dataframes))
+        if usar_base:
+            # A base histórica já guarda os registros limpos
+            data = otimizar_tipos(pd.concat(all_dataframes, ignore_index=True))
+            weeks = data['Semana'].unique()
+            technicians = data['Nome'].unique()
+            categories = data['Categoria'].unique()
+        else:
+            # Junção, limpeza e índice só são refeitos quando as planilhas mudam
+            indice = memorizar_na_sessao('indices', origem, all_dataframes,
+                                         lambda: indexar_planilhas(all_dataframes), max_itens=2)
+            data = indice.data
+            weeks, technicians, categories = (indice.valores(c) for c in ['Semana', 'Nome', 'Categoria'])
+        memoria_dados = memorizar_na_sessao('memoria_dados', origem, all_dataframes,
+                                            lambda: data.memory_usage(deep=True).sum(), max_itens=2)
+        st.sidebar.caption(f"Dados em memória: {memoria_dados / 2 ** 20:.1f} MB")
 
         # Filtros na sidebar
         st.sidebar.header("Filtrar por:")
@@ -634,12 +251,14 @@ if uploaded_files or url_input:
             default=list(categories))
 
         # Aplicar filtros
-        if selected_weeks:
-            data = data[data['Semana'].isin(selected_weeks)]
-        if selected_techs:
-            data = data[data['Nome'].isin(selected_techs)]
-        if selected_categories:
-            data = data[data['Categoria'].isin(selected_categories)]
+        atendimentos = None
+        if usar_base:
+            data = carregar_base(diretorio_base, semanas=selected_weeks, nomes=selected_techs,
+                                 categorias=selected_categories)
+        else:
+            # Interseção das listas do índice: custo proporcional às linhas selecionadas
+            data, *atendimentos = indice.recorte(
+                {'Semana': selected_weeks, 'Nome': selected_techs, 'Categoria': selected_categories})
 
         if data.empty:
             st.warning("Nenhum dado encontrado com os filtros selecionados.")
@@ -647,310 +266,199 @@ if uploaded_files or url_input:
 
         st.success("✅ Planilhas processadas com sucesso!")
 
-        if st.checkbox("🔍 Mostrar dados brutos"):
-            st.dataframe(data)
-
         st.header("📈 Métricas Gerais")
-        completed_services = data[data['Realizado']]
-        not_completed = data[(data['Realizado'] == False) & (data['Cliente'].notna())]
-
-        # Calcular dias trabalhados corretamente (1 por dia com atendimento, por técnico por semana)
-        dias_trabalhados = completed_services.groupby(['Nome', 'Semana', 'Data']).size().reset_index()
-        dias_trabalhados = dias_trabalhados.groupby(['Nome', 'Semana']).size().reset_index(name='Dias Trabalhados')
-
-        # Agrupar por técnico e semana para calcular totais
-        weekly_totals = completed_services.groupby(['Nome', 'Semana', 'Categoria']).agg({
-            'Serviço': 'sum',
-            'Gorjeta': 'sum',
-            'Dia': 'count'
-        }).reset_index()
-
-        # Juntar com os dias trabalhados corretamente calculados
-        weekly_totals = pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
-
-        # Aplicar cálculo de pagamento e lucro semanal
-        weekly_totals[['Pagamento Tecnico', 'Lucro Empresa']] = weekly_totals.apply(
-            calcular_pagamento_semanal, axis=1)
-
-        # Aplicar cálculo proporcional para cada atendimento
-        if 'Pagamento Tecnico' not in completed_services.columns:
-            completed_services[['Pagamento Tecnico', 'Lucro Empresa']] = completed_services.apply(
-                lambda x: calcular_pagamento_individual(x, weekly_totals), axis=1)
-
-        total_lucro = completed_services['Lucro Empresa'].sum() if 'Lucro Empresa' in completed_services.columns else 0
-        total_pagamentos = completed_services[
-            'Pagamento Tecnico'].sum() if 'Pagamento Tecnico' in completed_services.columns else 0
+        # Cubo de agregação do recorte: tabelas, gráficos e PDF saem dele por somas simples
+        chave_analise = (origem, tuple(selected_weeks), tuple(selected_techs), tuple(selected_categories))
+        analise = memorizar_na_sessao('analises', chave_analise, all_dataframes,
+                                      lambda: analisar(data, atendimentos))
+        completed_services = analise['completed_services']
+        not_completed = analise['not_completed']
+        cubo = analise['cubo']
+        weekly_totals = analise['weekly_totals']
+        totais = cubo[MEDIDAS_CUBO].sum()
 
         col1, col2, col3, col4, col5 = st.columns(5)
-        col1.metric("Realizados", len(completed_services))
+        col1.metric("Realizados", int(totais['Atendimentos']))
         col2.metric("Não Realizados", len(not_completed))
-        col3.metric("Total em Serviços", format_currency(completed_services['Serviço'].sum()))
-        col4.metric("Total em Gorjetas", format_currency(completed_services['Gorjeta'].sum()))
-        col5.metric("Lucro da Empresa", format_currency(total_lucro))
-
-        # LAYOUT COM COLUNAS
-        col_calculos, col_analise = st.columns([1, 2])
-
-        with col_calculos:
-            st.header("Cálculos Semanais")
-
-            # Formatar valores monetários para exibição
-            weekly_totals_display = weekly_totals.copy()
-            weekly_totals_display['Serviço'] = weekly_totals_display['Serviço'].apply(format_currency)
-            weekly_totals_display['Gorjeta'] = weekly_totals_display['Gorjeta'].apply(format_currency)
-            weekly_totals_display['Pagamento Tecnico'] = weekly_totals_display['Pagamento Tecnico'].apply(
-                format_currency)
-            weekly_totals_display['Lucro Empresa'] = weekly_totals_display['Lucro Empresa'].apply(format_currency)
-
-            weekly_totals_display = weekly_totals_display.rename(columns={
-                'Nome': 'Técnico',
-                'Semana': 'Semana',
-                'Categoria': 'Categoria',
-                'Serviço': 'Total Serviços',
-                'Gorjeta': 'Total Gorjetas',
-                'Pagamento Tecnico': 'Pagamento Semanal',
-                'Lucro Empresa': 'Lucro da Empresa',
-                'Dias Trabalhados': 'Dias Trabalhados'
-            })
-
-            st.dataframe(weekly_totals_display)
-
-        with col_analise:
-            st.header("Análise por Técnico")
-
-            # Agrupar por técnico e categoria
-            tech_summary = weekly_totals.groupby(['Nome', 'Categoria']).agg({
-                'Serviço': 'sum',
-                'Gorjeta': 'sum',
-                'Pagamento Tecnico': 'sum',
-                'Lucro Empresa': 'sum',
-                'Dia': 'sum',
-                'Dias Trabalhados': 'sum'
-            }).reset_index()
-
-            # Ajustar nomes das colunas
-            tech_summary.columns = ['Técnico', 'Categoria', 'Total Serviços',
-                                    'Total Gorjetas', 'Total Pagamento', 'Lucro Empresa',
-                                    'Atendimentos', 'Dias Trabalhados']
-
-            tech_summary['Média Atendimento'] = tech_summary['Total Serviços'] / tech_summary['Atendimentos']
-            tech_summary['Gorjeta Média'] = tech_summary['Total Gorjetas'] / tech_summary['Atendimentos']
-
-            # Formatar valores monetários
-            tech_summary['Total Serviços'] = tech_summary['Total Serviços'].apply(format_currency)
-            tech_summary['Total Gorjetas'] = tech_summary['Total Gorjetas'].apply(format_currency)
-            tech_summary['Total Pagamento'] = tech_summary['Total Pagamento'].apply(format_currency)
-            tech_summary['Lucro Empresa'] = tech_summary['Lucro Empresa'].apply(format_currency)
-            tech_summary['Média Atendimento'] = tech_summary['Média Atendimento'].apply(format_currency)
-            tech_summary['Gorjeta Média'] = tech_summary['Gorjeta Média'].apply(format_currency)
-
-            st.dataframe(tech_summary.sort_values('Atendimentos', ascending=False))
-
-        st.subheader("📈 Evolução Semanal por Técnico")
-        fig_evolucao = px.line(
-            weekly_totals,
-            x='Semana',
-            y='Serviço',
-            color='Nome',
-            markers=True,
-            title='Evolução de Serviços por Técnico',
-            labels={'Serviço': 'Valor em Serviços ($)', 'Semana': 'Semana'}
-        )
-        fig_evolucao.update_traces(hovertemplate="<b>%{x}</b><br>Valor: $%{y:,.2f}")
-        st.plotly_chart(fig_evolucao, use_container_width=True)
-
-        # Técnico da Semana
-        if len(selected_weeks) == 1:
-            semana_atual = selected_weeks[0]
-            tech_da_semana = \
-                weekly_totals[weekly_totals['Semana'] == semana_atual].sort_values('Serviço',
-                                                                                   ascending=False).iloc[0]
-
-            st.subheader("🏆 Técnico da Semana")
-            col1, col2, col3, col4 = st.columns(4)
-            col1.metric("Técnico", tech_da_semana['Nome'])
-            col2.metric("Total em Serviços", format_currency(tech_da_semana['Serviço']))
-            col3.metric("Pagamento Semanal", format_currency(tech_da_semana['Pagamento Tecnico']))
-            col4.metric("Lucro Empresa", format_currency(tech_da_semana['Lucro Empresa']))
-
-        fig_pagamento = px.bar(
-            weekly_totals,
-            x='Pagamento Tecnico',
-            y='Nome',
-            color='Semana',
-            barmode='group',
-            title='Pagamento Semanal por Técnico',
-            labels={'Pagamento Tecnico': 'Pagamento ($)', 'Nome': 'Técnico'}
-        )
-        fig_pagamento.update_traces(texttemplate='$%{x:,.2f}', textposition='outside')
-        fig_pagamento.update_layout(hovermode="x unified")
-        st.plotly_chart(fig_pagamento, use_container_width=True)
-
-        # Gráfico de atendimentos por técnico
-        tech_summary_graph = tech_summary.copy()
-        tech_summary_graph['Atendimentos'] = pd.to_numeric(tech_summary_graph['Atendimentos'], errors='coerce')
-
-        fig1 = px.bar(tech_summary_graph.sort_values('Atendimentos'),
-                      x='Atendimentos', y='Técnico',
-                      title='Atendimentos por Técnico',
-                      color='Categoria',
-                      labels={'Atendimentos': 'Quantidade'})
-        fig1.update_traces(hovertemplate="<b>%{y}</b><br>Atendimentos: %{x}<br>Categoria: %{marker.color}")
-        st.plotly_chart(fig1, use_container_width=True)
-
-        # Gráfico de gorjetas por técnico
-        fig2 = px.bar(tech_summary_graph.sort_values('Total Gorjetas'),
-                      x='Total Gorjetas', y='Técnico',
-                      title='Gorjetas por Técnico',
-                      color='Categoria',
-                      labels={'Total Gorjetas': 'Valor Gorjetas ($)'})
-        fig2.update_traces(hovertemplate="<b>%{y}</b><br>Total Gorjetas: $%{x:,.2f}<br>Categoria: %{marker.color}")
-        st.plotly_chart(fig2, use_container_width=True)
-
-        st.header("⚠️ Atendimentos Não Realizados")
-        if not not_completed.empty:
-            st.warning(f"{len(not_completed)} atendimentos não realizados.")
-            st.dataframe(not_completed[['Nome', 'Dia', 'Data', 'Cliente']])
-        else:
-            st.success("Todos os agendamentos foram realizados!")
+        col3.metric("Total em Serviços", format_currency(totais['Serviço']))
+        col4.metric("Total em Gorjetas", format_currency(totais['Gorjeta']))
+        col5.metric("Lucro da Empresa", format_currency(totais['Lucro Empresa']))
+
+        def da_selecao(nome, calcular):
+            """Tabela ou figura de uma seção, memorizada pelo estado dos filtros"""
+            return memorizar_na_sessao('secoes', (chave_analise, nome), all_dataframes, calcular, max_itens=64)
+
+        def mostrar_grafico(nome, construir):
+            """Desenha a figura memorizada da seção, medindo montagem e envio como etapa 'render'"""
+            with etapa('render', grafico=nome):
+                st.plotly_chart(da_selecao(nome, construir), use_container_width=True)
+
+        # Seções abaixo das métricas: calculadas e enviadas ao navegador só quando abertas
+        if secao_aberta("🔍 Dados Brutos", 'dados_brutos'):
+            # Busca e ordenação no servidor; só a página visível vai para o navegador
+            colunas = list(data.columns)
+            col1, col2, col3, col4 = st.columns([2, 1, 2, 2])
+            ordenar_por = col1.selectbox("Ordenar por", [None] + colunas,
+                                         format_func=lambda c: "(ordem original)" if c is None else c)
+            crescente = col2.toggle("Crescente", value=True)
+            coluna_busca = col3.selectbox("Buscar na coluna", colunas,
+                                          index=colunas.index('Cliente') if 'Cliente' in colunas else 0)
+            texto = col4.text_input("Contém").strip()
+
+            posicoes = memorizar_na_sessao(
+                'paginacao', (chave_analise, ordenar_por, crescente, coluna_busca, texto), all_dataframes,
+                lambda: ordem_linhas(data, ordenar_por, crescente, coluna_busca, texto), max_itens=4)
+
+            col1, col2 = st.columns(2)
+            tamanho = col1.selectbox("Linhas por página", [50, 100, 250, 500], index=1)
+            total_paginas = max(1, -(-len(posicoes) // tamanho))
+            # Sem key: a página volta para 1 quando o número de páginas muda
+            pagina = col2.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1)
+
+            inicio = time.perf_counter()
+            st.dataframe(fatia(data, posicoes, pagina, tamanho))
+            segundos = time.perf_counter() - inicio
+            primeira = min(len(posicoes), (pagina - 1) * tamanho + 1)
+            st.caption(f"Linhas {primeira:,}–{min(len(posicoes), pagina * tamanho):,} de {len(posicoes):,} "
+                       f"({len(data):,} no recorte) · página montada e serializada em {segundos * 1000:.1f} ms")
+
+        if secao_aberta("📊 Cálculos Semanais e Análise por Técnico", 'tecnicos'):
+            col_calculos, col_analise = st.columns([1, 2])
+
+            with col_calculos:
+                st.subheader("Cálculos Semanais")
+
+                weekly_totals_display = weekly_totals.rename(columns={
+                    'Nome': 'Técnico',
+                    'Semana': 'Semana',
+                    'Categoria': 'Categoria',
+                    'Serviço': 'Total Serviços',
+                    'Gorjeta': 'Total Gorjetas',
+                    'Pagamento Tecnico': 'Pagamento Semanal',
+                    'Lucro Empresa': 'Lucro da Empresa',
+                    'Dias Trabalhados': 'Dias Trabalhados'
+                })
+
+                st.dataframe(weekly_totals_display,
+                             column_config=colunas_moeda('Total Serviços', 'Total Gorjetas', 'Pagamento Semanal',
+                                                         'Lucro da Empresa'))
+
+            with col_analise:
+                st.subheader("Análise por Técnico")
+                tech_summary = da_selecao('tech_summary', lambda: resumo_tecnicos(weekly_totals))
+                st.dataframe(tech_summary.sort_values('Atendimentos', ascending=False),
+                             column_config=colunas_moeda('Total Serviços', 'Total Gorjetas', 'Total Pagamento',
+                                                         'Lucro Empresa', 'Média Atendimento', 'Gorjeta Média'))
+
+        if secao_aberta("📈 Evolução Semanal por Técnico", 'evolucao'):
+            mostrar_grafico('fig_evolucao', lambda: figura_evolucao(cubo))
+
+            # Técnico da Semana
+            if len(selected_weeks) == 1:
+                semana_atual = selected_weeks[0]
+                tech_da_semana = \
+                    weekly_totals[weekly_totals['Semana'] == semana_atual].sort_values('Serviço',
+                                                                                       ascending=False).iloc[0]
+
+                st.subheader("🏆 Técnico da Semana")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Técnico", tech_da_semana['Nome'])
+                col2.metric("Total em Serviços", format_currency(tech_da_semana['Serviço']))
+                col3.metric("Pagamento Semanal", format_currency(tech_da_semana['Pagamento Tecnico']))
+                col4.metric("Lucro Empresa", format_currency(tech_da_semana['Lucro Empresa']))
+
+            mostrar_grafico('fig_pagamento', lambda: figura_pagamento_semanal(cubo))
+
+            tech_summary = da_selecao('tech_summary', lambda: resumo_tecnicos(weekly_totals))
+            mostrar_grafico('fig_atendimentos', lambda: figura_atendimentos_tecnico(tech_summary))
+            mostrar_grafico('fig_gorjetas', lambda: figura_gorjetas_tecnico(tech_summary))
+
+        if secao_aberta("⚠️ Atendimentos Não Realizados", 'nao_realizados'):
+            if not not_completed.empty:
+                st.warning(f"{len(not_completed)} atendimentos não realizados.")
+                st.dataframe(not_completed[['Nome', 'Dia', 'Data', 'Cliente']])
+            else:
+                st.success("Todos os agendamentos foram realizados!")
+
+        if secao_aberta("💳 Métodos de Pagamento", 'pagamentos'):
+            payment_graph = da_selecao('payment_graph', lambda: resumo_pagamentos(cubo, FORMAS_PAGAMENTO_VALIDAS))
+            invalid_payments = da_selecao('invalid_payments', lambda: completed_services[
+                ~completed_services['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS) &
+                completed_services['Pagamento'].notna()])
+
+            # Criar colunas para métricas
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Válidos", int(payment_graph['Atendimentos'].sum()))
+            col2.metric("Inválidos", len(invalid_payments))
+            col3.metric("Formas de Pagamento", len(payment_graph))
+
+            if not payment_graph.empty:
+                # Criar dataframe com informações detalhadas
+                payment_methods = payment_graph[
+                    ['Pagamento', 'Serviço', 'Atendimentos', 'Gorjeta', 'Clientes', 'Lucro Empresa']].copy()
+
+                # Renomear colunas para melhor visualização
+                payment_methods.columns = ['Pagamento', 'Total Serviços', 'Qtd Usos', 'Total Gorjetas',
+                                           'Total Atendimentos', 'Lucro Empresa']
+
+                # Calcular valores totais
+                payment_methods['Total Geral'] = payment_methods['Total Serviços'] + payment_methods['Total Gorjetas']
+
+                # Calcular porcentagem de uso
+                total_usos = payment_methods['Qtd Usos'].sum()
+                payment_methods['% Uso'] = (payment_methods['Qtd Usos'] / total_usos * 100).round(2)
+
+                # Mostrar tabela detalhada
+                st.subheader("Detalhes por Método de Pagamento")
+                st.dataframe(payment_methods.sort_values('Qtd Usos', ascending=False),
+                             column_config={**colunas_moeda('Total Serviços', 'Total Gorjetas', 'Lucro Empresa',
+                                                            'Total Geral'),
+                                            '% Uso': st.column_config.NumberColumn('% Uso', format="%.2f%%")})
+
+                # Só o gráfico escolhido é montado (st.tabs executaria os dois)
+                grafico = st.radio("Gráfico", ["Valor Total", "Quantidade de Usos"], horizontal=True,
+                                   key='grafico_pagamentos', label_visibility='collapsed')
+                if grafico == "Valor Total":
+                    mostrar_grafico('fig_total', lambda: figura_total_pagamentos(payment_graph))
+                else:
+                    mostrar_grafico('fig_qtd', lambda: figura_usos_pagamentos(payment_graph))
 
-        st.header("💳 Métodos de Pagamento")
-        valid_payments = completed_services[completed_services['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
-        invalid_payments = completed_services[
-            ~completed_services['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS) & completed_services['Pagamento'].notna()]
+            if not invalid_payments.empty:
+                st.warning("Pagamentos inválidos encontrados:")
+                st.dataframe(invalid_payments[['Nome', 'Data', 'Cliente', 'Pagamento']])
 
-        # Criar colunas para métricas
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Válidos", len(valid_payments))
-        col2.metric("Inválidos", len(invalid_payments))
-        col3.metric("Formas de Pagamento", len(valid_payments['Pagamento'].unique()))
-
-        if not valid_payments.empty:
-            # Criar dataframe com informações detalhadas
-            payment_methods = valid_payments.groupby('Pagamento').agg({
-                'Serviço': ['sum', 'count'],
-                'Gorjeta': 'sum',
-                'Cliente': 'count',
-                'Lucro Empresa': 'sum'
-            }).reset_index()
-
-            # Renomear colunas para melhor visualização
-            payment_methods.columns = ['Pagamento', 'Total Serviços', 'Qtd Usos', 'Total Gorjetas',
-                                       'Total Atendimentos', 'Lucro Empresa']
-
-            # Calcular valores totais
-            payment_methods['Total Geral'] = payment_methods['Total Serviços'] + payment_methods['Total Gorjetas']
-
-            # Calcular porcentagem de uso
-            total_usos = payment_methods['Qtd Usos'].sum()
-            payment_methods['% Uso'] = (payment_methods['Qtd Usos'] / total_usos * 100).round(2)
-
-            # Formatar valores monetários
-            payment_methods['Total Serviços'] = payment_methods['Total Serviços'].apply(format_currency)
-            payment_methods['Total Gorjetas'] = payment_methods['Total Gorjetas'].apply(format_currency)
-            payment_methods['Lucro Empresa'] = payment_methods['Lucro Empresa'].apply(format_currency)
-            payment_methods['Total Geral'] = payment_methods['Total Geral'].apply(format_currency)
-            payment_methods['% Uso'] = payment_methods['% Uso'].astype(str) + '%'
-
-            # Mostrar tabela detalhada
-            st.subheader("Detalhes por Método de Pagamento")
-            st.dataframe(payment_methods.sort_values('Qtd Usos', ascending=False))
-
-            # Criar gráficos
-            tab1, tab2 = st.tabs(["Valor Total", "Quantidade de Usos"])
-
-            with tab1:
-                # Dataframe para gráfico (valores numéricos)
-                payment_graph = valid_payments.groupby('Pagamento').agg({
-                    'Serviço': 'sum',
-                    'Gorjeta': 'sum',
-                    'Lucro Empresa': 'sum'
-                }).reset_index()
-                payment_graph['Total'] = payment_graph['Serviço'] + payment_graph['Gorjeta']
-
-                fig_total = px.bar(payment_graph.sort_values('Total'),
-                                   x='Total', y='Pagamento',
-                                   title='Valor Total por Método de Pagamento (Serviços + Gorjetas)',
-                                   color='Serviço',
-                                   color_continuous_scale='Peach',
-                                   labels={'Total': 'Valor Total ($)', 'Serviço': 'Valor Serviços ($)'})
-                fig_total.update_traces(
-                    hovertemplate="<b>%{y}</b><br>Total: $%{x:,.2f}<br>Serviços: $%{marker.color:,.2f}")
-                st.plotly_chart(fig_total, use_container_width=True)
-
-            with tab2:
-                payment_count = valid_payments['Pagamento'].value_counts().reset_index()
-                payment_count.columns = ['Pagamento', 'Qtd Usos']
-
-                # Calcular porcentagem para o gráfico
-                total = payment_count['Qtd Usos'].sum()
-                payment_count['% Uso'] = (payment_count['Qtd Usos'] / total * 100).round(2)
-
-                fig_qtd = px.bar(payment_count.sort_values('Qtd Usos'),
-                                 x='Qtd Usos', y='Pagamento',
-                                 title='Quantidade de Usos por Método de Pagamento',
-                                 color='Qtd Usos',
-                                 color_continuous_scale='Peach',
-                                 labels={'Qtd Usos': 'Quantidade de Usos'},
-                                 text='% Uso')
-
-                fig_qtd.update_traces(
-                    texttemplate='%{text}%',
-                    textposition='outside',
-                    hovertemplate="<b>%{y}</b><br>Usos: %{x}<br>% do Total: %{text}%"
-                )
-                st.plotly_chart(fig_qtd, use_container_width=True)
-
-        if not invalid_payments.empty:
-            st.warning("Pagamentos inválidos encontrados:")
-            st.dataframe(invalid_payments[['Nome', 'Data', 'Cliente', 'Pagamento']])
-
-        st.header("📅 Análise por Dia da Semana")
-        day_summary = completed_services.groupby('Dia').agg({
-            'Serviço': ['count', 'sum'],
-            'Gorjeta': 'sum',
-            'Pets': 'sum',
-            'Lucro Empresa': 'sum'
-        }).reset_index()
-        day_summary.columns = ['Dia', 'Atendimentos', 'Total Serviços', 'Total Gorjetas', 'Total Pets', 'Lucro Empresa']
-        day_summary['Dia'] = pd.Categorical(day_summary['Dia'],
-                                            categories=['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta',
-                                                        'Sábado'],
-                                            ordered=True)
-        day_summary = day_summary.sort_values('Dia')
-
-        # Formatar valores monetários para exibição
-        day_summary_display = day_summary.copy()
-        day_summary_display['Total Serviços'] = day_summary_display['Total Serviços'].apply(format_currency)
-        day_summary_display['Total Gorjetas'] = day_summary_display['Total Gorjetas'].apply(format_currency)
-        day_summary_display['Lucro Empresa'] = day_summary_display['Lucro Empresa'].apply(format_currency)
-
-        st.dataframe(day_summary_display)
-
-        fig7 = px.bar(day_summary, x='Dia', y='Atendimentos',
-                      title='Atendimentos por Dia da Semana',
-                      labels={'Atendimentos': 'Quantidade'})
-        fig7.update_traces(hovertemplate="<b>%{x}</b><br>Atendimentos: %{y}")
-        st.plotly_chart(fig7, use_container_width=True)
+        if secao_aberta("📅 Análise por Dia da Semana", 'dias'):
+            day_summary = resumo_dias(cubo)[['Dia', 'Atendimentos', 'Serviço', 'Gorjeta', 'Pets', 'Lucro Empresa']]
+            day_summary.columns = ['Dia', 'Atendimentos', 'Total Serviços', 'Total Gorjetas', 'Total Pets',
+                                   'Lucro Empresa']
+
+            st.dataframe(day_summary,
+                         column_config=colunas_moeda('Total Serviços', 'Total Gorjetas', 'Lucro Empresa'))
+            mostrar_grafico('fig_dias', lambda: figura_dias(day_summary))
 
         st.header("📤 Exportar Dados")
         col1, col2, col3 = st.columns(3)
 
         with col1:
-            if st.button("Exportar CSV"):
-                csv = data.to_csv(index=False).encode('utf-8')
-                st.download_button("📁 Baixar CSV", data=csv, file_name="servicos_tecnicos.csv", mime="text/csv")
+            # Atendimentos realizados com o pagamento de cada um, gravados em blocos
+            formato = st.selectbox("Formato", list(FORMATOS_EXPORTACAO),
+                                   format_func=lambda f: FORMATOS_EXPORTACAO[f][0])
+            colunas_exportadas = st.multiselect("Colunas", list(completed_services.columns),
+                                                default=list(completed_services.columns))
+            if st.button("Exportar Dados", disabled=not colunas_exportadas):
+                # Arquivo guardado por estado dos filtros, formato e colunas: reexportar é imediato
+                arquivo = memorizar_na_sessao(
+                    'exportacoes', (chave_analise, formato, tuple(colunas_exportadas)), all_dataframes,
+                    lambda: exportar_para_arquivo(completed_services, formato, colunas_exportadas), max_itens=2)
+                arquivo.seek(0)
+                rotulo, mime, extensao = FORMATOS_EXPORTACAO[formato]
+                st.download_button(f"📁 Baixar {rotulo}", data=arquivo, file_name=f"servicos_tecnicos{extensao}",
+                                   mime=mime)
 
         with col2:
             if st.button("Exportar Relatório PDF"):
-                # Garante que as colunas necessárias existam antes de criar o PDF
-                if 'Pagamento Tecnico' not in data.columns:
-                    data['Pagamento Tecnico'] = 0
-                if 'Lucro Empresa' not in data.columns:
-                    data['Lucro Empresa'] = data['Serviço'] + data['Gorjeta'] - data['Pagamento Tecnico']
-
-                pdf = create_pdf(data)
-                pdf_bytes = pdf.output(dest='S').encode('latin-1')
+                with etapa('export', formato='pdf'):
+                    pdf_bytes = create_pdf(cubo, not_completed).output(dest='S').encode('latin-1')
                 st.download_button(
                     label="📄 Baixar Relatório Completo",
                     data=pdf_bytes,
@@ -972,12 +480,16 @@ if uploaded_files or url_input:
 
                 if not tech_data.empty:
                     if st.button("Exportar Recibo Técnico"):
-                        pdf = create_tech_payment_receipt(tech_data, tech_name, week)
-                        pdf_bytes = pdf.output(dest='S').encode('latin-1')
+                        # recibos (e o fpdf) só são carregados no primeiro recibo pedido
+                        from recibos import create_tech_payment_receipt, nome_arquivo_recibo
+
+                        with etapa('export', formato='recibo', tecnico=tech_name, semana=week):
+                            pdf = create_tech_payment_receipt(tech_data, tech_name, week, obter_timbrado())
+                            pdf_bytes = pdf.output(dest='S').encode('latin-1')
                         st.download_button(
                             label="🧾 Baixar Recibo de Pagamento",
                             data=pdf_bytes,
-                            file_name=f"recibo_pagamento_{tech_name}_{week}.pdf",
+                            file_name=nome_arquivo_recibo(tech_name, week),
                             mime="application/pdf"
                         )
                 else:
@@ -985,6 +497,44 @@ if uploaded_files or url_input:
             else:
                 st.warning("Selecione apenas um técnico e uma semana para gerar o recibo.")
 
+            # Recibos de todos os pares (técnico, semana) da seleção em um único ZIP
+            if st.button("Exportar Recibos da Seleção (ZIP)"):
+                from recibos import gerar_recibos_zip
+
+                barra = st.progress(0.0, text="Gerando recibos...")
+
+                def progresso(feitos, total, por_segundo):
+                    if feitos == total or feitos % max(1, total // 100) == 0:
+                        barra.progress(feitos / total, text=f"{feitos}/{total} recibos ({por_segundo:.1f} recibos/s)")
+
+                arquivo_zip = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024)
+                with etapa('export', formato='recibos_zip'):
+                    resultado = gerar_recibos_zip(completed_services, arquivo_zip, progresso=progresso,
+                                                  timbrado=obter_timbrado())
+                arquivo_zip.seek(0)
+                st.caption(f"{resultado['recibos']} recibos em {resultado['segundos']:.1f} s "
+                           f"({resultado['por_segundo']:.1f} recibos/s)")
+                st.download_button(
+                    label="🗂️ Baixar Recibos (ZIP)",
+                    data=arquivo_zip,
+                    file_name="recibos_pagamento.zip",
+                    mime="application/zip"
+                )
+
+if etapas_medidas:
+    with painel_diagnostico.container():
+        st.subheader("🩺 Etapas desta execução")
+        st.dataframe(pd.DataFrame({
+            'Etapa': [r['etapa'] for r in etapas_medidas],
+            'Detalhe': [', '.join(f"{k}={v}" for k, v in r.items()
+                                  if k not in ('etapa', 'segundos', 'pico_mb') and v is not None)
+                        for r in etapas_medidas],
+            'ms': [r['segundos'] * 1000 for r in etapas_medidas],
+            'Pico (MB)': [r['pico_mb'] for r in etapas_medidas]
+        }), hide_index=True, column_config={'ms': st.column_config.NumberColumn(format="%.1f")})
+        st.caption(f"{len(etapas_medidas)} etapas, {sum(r['segundos'] for r in etapas_medidas):.2f} s medidos. "
+                   "Também registradas como JSON no log 'instrumentacao'.")
+
 st.markdown("""
     <style>
     .stMetricValue { font-size: 22px; }
@@ -0,0 +1,134 @@
+"""Base histórica em Parquet com os registros processados das planilhas
+
+Uso: python armazenamento.py DIRETORIO_BASE planilha1.xlsx [planilha2.xlsx ...]
+"""
+import argparse
+import hashlib
+import os
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from planilhas import COLUNAS_REGISTROS, ler_conteudo, process_spreadsheet
+
+# Partições da base: ano da data do atendimento e aba (semana) de origem
+COLUNAS_PARTICAO = ['Ano', 'Semana']
+
+# Colunas de texto que podem vir da planilha com tipos misturados
+COLUNAS_TEXTO = ['Nome', 'Categoria', 'Origem', 'Dia', 'Cliente', 'Pagamento', 'ID Pagamento']
+
+
+def _particionamento():
+    return ds.partitioning(pa.schema([('Ano', pa.int32()), ('Semana', pa.string())]), flavor='hive')
+
+
+def _preparar_registros(df):
+    """Limpa os registros como o app faz e uniformiza os tipos para o Parquet"""
+    df = df[df['Nome'].notna() & (df['Nome'].astype(str).str.strip() != '')].copy()
+    for coluna in COLUNAS_TEXTO:
+        df[coluna] = df[coluna].map(lambda v: None if pd.isna(v) else str(v)).astype(object)
+    df['Ano'] = df['Data'].dt.year.astype('int32')
+    return df
+
+
+def _nome_origem(file):
+    """Identifica a planilha de origem: a URL ou o nome do arquivo (sem o diretório)"""
+    if isinstance(file, str) and file.startswith('http'):
+        return file
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.basename(file)
+    return getattr(file, 'name', None)
+
+
+def _arquivos_da_origem(diretorio, prefixo_origem):
+    if not os.path.isdir(diretorio):
+        return []
+    return [os.path.join(raiz, nome) for raiz, _, arquivos in os.walk(diretorio)
+            for nome in arquivos if nome.startswith(prefixo_origem)]
+
+
+def importar_planilha(file, diretorio, leitor=process_spreadsheet, nome=None):
+    """Processa uma planilha e grava seus registros na base, substituindo os de uma importação anterior
+
+    Os arquivos gravados levam no nome o hash da planilha de origem (nome,
+    ou a URL; ver _nome_origem) e o hash do conteúdo. Importar de novo a
+    mesma planilha com o conteúdo alterado (uma semana corrigida ou
+    estendida) troca todos os registros dela, em todas as partições; importar
+    o mesmo conteúdo não grava nada. Planilhas de origens diferentes com as
+    mesmas abas convivem na base. Retorna a quantidade de registros gravados
+    (0 se a planilha já estava na base com esse conteúdo).
+    """
+    conteudo = ler_conteudo(file)
+    nome = nome or _nome_origem(file)
+    prefixo_conteudo = hashlib.sha256(conteudo).hexdigest()[:16]
+    # Sem nome de origem, a própria planilha é a origem (reimportar só evita duplicar o mesmo conteúdo)
+    prefixo_origem = hashlib.sha256(nome.encode('utf-8')).hexdigest()[:16] if nome else prefixo_conteudo
+    prefixo = f"{prefixo_origem}-{prefixo_conteudo}"
+    anteriores = _arquivos_da_origem(diretorio, prefixo_origem)
+    if any(os.path.basename(caminho).startswith(prefixo) for caminho in anteriores):
+        return 0
+
+    df = leitor(BytesIO(conteudo))
+    df = _preparar_registros(df) if not df.empty else df
+    if not df.empty:
+        ds.write_dataset(
+            pa.Table.from_pandas(df, preserve_index=False),
+            diretorio,
+            format='parquet',
+            partitioning=_particionamento(),
+            basename_template=f"{prefixo}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore')
+    # Os registros da versão anterior só saem depois que os novos foram gravados
+    for caminho in anteriores:
+        os.remove(caminho)
+        particao = os.path.dirname(caminho)
+        while os.path.normpath(particao) != os.path.normpath(diretorio) and not os.listdir(particao):
+            os.rmdir(particao)
+            particao = os.path.dirname(particao)
+    return len(df)
+
+
+def assinatura_base(diretorio):
+    """Nome, tamanho e data de modificação dos arquivos da base: muda a cada importação"""
+    assinatura = []
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            info = os.stat(os.path.join(raiz, nome))
+            assinatura.append((os.path.relpath(os.path.join(raiz, nome), diretorio), info.st_size, info.st_mtime_ns))
+    return tuple(sorted(assinatura))
+
+
+def carregar_base(diretorio, semanas=None, nomes=None, categorias=None, colunas=None):
+    """Lê a base aplicando os filtros na leitura (partições e row groups) e só as colunas pedidas
+
+    Filtros None ou vazios não restringem nada. Os registros voltam em ordem
+    cronológica quando a coluna 'Data' é lida.
+    """
+    dataset = ds.dataset(diretorio, format='parquet', partitioning=_particionamento())
+    filtro = None
+    for campo, valores in (('Semana', semanas), ('Nome', nomes), ('Categoria', categorias)):
+        if valores:
+            condicao = ds.field(campo).isin(list(valores))
+            filtro = condicao if filtro is None else filtro & condicao
+    if colunas is None:
+        colunas = [c for c in COLUNAS_REGISTROS if c in dataset.schema.names]
+    df = dataset.to_table(columns=list(colunas), filter=filtro).to_pandas()
+    if 'Data' in df.columns:
+        df = df.sort_values('Data', kind='stable').reset_index(drop=True)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa planilhas WEEK para a base histórica em Parquet")
+    parser.add_argument('diretorio', help="diretório da base")
+    parser.add_argument('planilhas', nargs='+', help="arquivos .xlsx ou URLs")
+    args = parser.parse_args()
+    for planilha in args.planilhas:
+        registros = importar_planilha(planilha, args.diretorio)
+        print(f"{planilha}: {registros} registros importados" if registros else f"{planilha}: já importada")
+
+
+if __name__ == '__main__':
+    main()
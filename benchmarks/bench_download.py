@@ -0,0 +1,97 @@
+"""Benchmark do download de planilhas por URL contra um servidor HTTP local
+
+Sobe um http.server local que responde com ETag/Last-Modified e 304 para
+requisições condicionais, e mede: o primeiro download, uma leitura dentro do
+TTL (sem rede), uma revalidação 304 e o download completo depois de a
+planilha mudar no servidor. Compara com requests.get sem sessão nem cache.
+
+Uso: python benchmarks/bench_download.py
+"""
+import hashlib
+import os
+import sys
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from download import BaixadorPlanilhas
+from gerador_planilhas import gerar_pasta
+from medicao import medir
+
+REPETICOES = 20
+
+
+class ServidorPlanilha(BaseHTTPRequestHandler):
+    """Serve uma única planilha com suporte a requisições condicionais"""
+    conteudo = b''
+    etag = ''
+    modificada_em = ''
+    requisicoes = {'200': 0, '304': 0}
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == self.etag:
+            self.requisicoes['304'] += 1
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+            return
+        self.requisicoes['200'] += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.send_header('Content-Length', str(len(self.conteudo)))
+        self.send_header('ETag', self.etag)
+        self.send_header('Last-Modified', self.modificada_em)
+        self.end_headers()
+        self.wfile.write(self.conteudo)
+
+    def log_message(self, *args):
+        pass
+
+
+def publicar(conteudo):
+    ServidorPlanilha.conteudo = conteudo
+    ServidorPlanilha.etag = f'"{hashlib.sha256(conteudo).hexdigest()[:16]}"'
+    ServidorPlanilha.modificada_em = formatdate(usegmt=True)
+
+
+def main():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ServidorPlanilha)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}/planilha.xlsx"
+    try:
+        publicar(gerar_pasta(13).getvalue())
+        print(f"planilha: {len(ServidorPlanilha.conteudo) / 1024 / 1024:.1f} MB")
+
+        t_sem_cache, _ = medir(lambda: requests.get(url).content, repeticoes=REPETICOES)
+        baixador = BaixadorPlanilhas(ttl=60)
+        t_primeiro, conteudo = medir(lambda: baixador.baixar(url), repeticoes=1)
+        assert conteudo == ServidorPlanilha.conteudo
+        t_cache, _ = medir(lambda: baixador.baixar(url), repeticoes=REPETICOES)
+
+        baixador.ttl = 0
+        antes = dict(ServidorPlanilha.requisicoes)
+        t_304, conteudo = medir(lambda: baixador.baixar(url), repeticoes=REPETICOES)
+        assert conteudo == ServidorPlanilha.conteudo
+        assert ServidorPlanilha.requisicoes['200'] == antes['200']
+
+        publicar(gerar_pasta(13, seed=1).getvalue())
+        t_mudou, conteudo = medir(lambda: baixador.baixar(url), repeticoes=1)
+        assert conteudo == ServidorPlanilha.conteudo
+
+        print(f"{'requests.get sem cache':<28} {t_sem_cache * 1000:>9.2f} ms")
+        print(f"{'primeiro download':<28} {t_primeiro * 1000:>9.2f} ms")
+        print(f"{'dentro do TTL':<28} {t_cache * 1000:>9.3f} ms")
+        print(f"{'revalidação 304':<28} {t_304 * 1000:>9.2f} ms")
+        print(f"{'planilha alterada':<28} {t_mudou * 1000:>9.2f} ms")
+        print(f"estatísticas: {baixador.estatisticas}")
+    finally:
+        servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark do download simultâneo de várias planilhas contra um servidor HTTP local
+
+Sobe um http.server local que serve N_REGIONAIS planilhas sintéticas, cada
+uma com um atraso de resposta diferente, além de uma URL que falha com 503
+nas primeiras requisições (deve ser recuperada pelas novas tentativas), uma
+inexistente (404, sem novas tentativas) e uma que demora mais que o timeout
+de leitura. Mede o download e a leitura um a um (baixar + process_spreadsheet)
+contra BaixadorPlanilhas.baixar_varias com a leitura feita à medida que cada
+download termina, com alguns limites de downloads simultâneos, e confere
+que os registros lidos são os mesmos.
+
+Uso: python benchmarks/bench_downloads_simultaneos.py
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from download import BaixadorPlanilhas
+from gerador_planilhas import gerar_pasta
+from medicao import medir
+from planilhas import process_spreadsheet
+
+N_REGIONAIS = 16
+LIMITES = [4, 8, 16]
+FALHAS_INSTAVEL = 2
+TIMEOUT = (2, 1)
+
+
+class ServidorRegionais(BaseHTTPRequestHandler):
+    """Planilhas das regionais com atraso por URL e respostas de erro controladas"""
+    planilhas = {}
+    atrasos = {}
+    falhas_restantes = {}
+
+    def do_GET(self):
+        caminho = self.path.lstrip('/')
+        if caminho == 'lenta.xlsx':
+            time.sleep(TIMEOUT[1] + 0.5)
+        if self.falhas_restantes.get(caminho, 0) > 0:
+            self.falhas_restantes[caminho] -= 1
+            self.send_error(503)
+            return
+        if caminho not in self.planilhas:
+            self.send_error(404)
+            return
+        time.sleep(self.atrasos.get(caminho, 0))
+        conteudo = self.planilhas[caminho]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.send_header('Content-Length', str(len(conteudo)))
+        try:
+            self.end_headers()
+            self.wfile.write(conteudo)
+        except (BrokenPipeError, ConnectionResetError):
+            # Cliente que desistiu por timeout
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def publicar():
+    rng = np.random.default_rng(0)
+    for i in range(N_REGIONAIS):
+        caminho = f"regional_{i + 1:02d}.xlsx"
+        ServidorRegionais.planilhas[caminho] = gerar_pasta(2, 10, 20, 2, 1, seed=100 * i).getvalue()
+        ServidorRegionais.atrasos[caminho] = float(rng.uniform(0.2, 1.0))
+    ServidorRegionais.planilhas['instavel.xlsx'] = ServidorRegionais.planilhas['regional_01.xlsx']
+    ServidorRegionais.planilhas['lenta.xlsx'] = ServidorRegionais.planilhas['regional_01.xlsx']
+
+
+def novo_baixador():
+    # ttl=0: nenhuma resposta reaproveitada do cache entre as medições
+    return BaixadorPlanilhas(ttl=0, timeout=TIMEOUT, tentativas=3, espera_base=0.1)
+
+
+def ler(conteudo):
+    return process_spreadsheet(BytesIO(conteudo))
+
+
+def um_a_um(urls):
+    baixador = novo_baixador()
+    dados, erros = {}, {}
+    for url in urls:
+        try:
+            dados[url] = ler(baixador.baixar(url))
+        except Exception as e:
+            erros[url] = f"{type(e).__name__}: {e}"
+    return dados, erros
+
+
+def simultaneo(urls, max_simultaneos):
+    dados, erros = {}, {}
+    for url, conteudo, erro in novo_baixador().baixar_varias(urls, max_simultaneos=max_simultaneos):
+        if erro:
+            erros[url] = erro
+        else:
+            dados[url] = ler(conteudo)
+    return dados, erros
+
+
+def rodar(func, *args):
+    """Uma execução de func com o servidor de volta ao estado inicial (503 pendentes da URL instável)"""
+    ServidorRegionais.falhas_restantes = {'instavel.xlsx': FALHAS_INSTAVEL}
+    return medir(func, *args, repeticoes=1)
+
+
+def main():
+    publicar()
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ServidorRegionais)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_port}/"
+    regionais = [base + caminho for caminho in ServidorRegionais.atrasos]
+    urls = regionais + [base + 'instavel.xlsx', base + 'inexistente.xlsx', base + 'lenta.xlsx']
+    try:
+        inicio = time.perf_counter()
+        for conteudo in ServidorRegionais.planilhas.values():
+            ler(conteudo)
+        t_leitura = (time.perf_counter() - inicio) / len(ServidorRegionais.planilhas) * (N_REGIONAIS + 1)
+        atrasos = list(ServidorRegionais.atrasos.values())
+        print(f"{len(urls)} URLs: {N_REGIONAIS} regionais com atraso de {min(atrasos):.2f} a {max(atrasos):.2f} s "
+              f"(soma {sum(atrasos):.1f} s), 1 com {FALHAS_INSTAVEL} respostas 503, 1 inexistente, 1 lenta "
+              f"(timeout de leitura {TIMEOUT[1]} s); leitura das planilhas: {t_leitura:.1f} s no total")
+
+        t_base, (dados_base, erros_base) = rodar(um_a_um, urls)
+        print(f"\n{'modo':<24} {'total (s)':>10} {'planilhas':>10} {'erros':>6}")
+        print(f"{'um a um':<24} {t_base:>10.2f} {len(dados_base):>10} {len(erros_base):>6}")
+        for limite in LIMITES:
+            t_total, (dados, erros) = rodar(simultaneo, urls, limite)
+            assert dados.keys() == dados_base.keys() and erros.keys() == erros_base.keys()
+            for url, df in dados.items():
+                pd.testing.assert_frame_equal(df, dados_base[url])
+            print(f"{f'simultâneo (máx. {limite})':<24} {t_total:>10.2f} {len(dados):>10} {len(erros):>6}")
+        for url, erro in erros.items():
+            print(f"  {url.removeprefix(base)}: {' '.join(erro.split())[:100]}")
+    finally:
+        servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
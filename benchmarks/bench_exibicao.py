@@ -0,0 +1,98 @@
+"""Benchmark da preparação das tabelas do dashboard: apply(format_currency) x colunas numéricas
+
+Monta as tabelas exibidas pelo app (cálculos semanais, análise por técnico,
+métodos de pagamento e dia da semana) a partir de históricos com cada vez
+mais semanas e mede a preparação antes (cópias, ~20 colunas convertidas em
+texto com Series.apply e pd.to_numeric de volta para os gráficos) e agora
+(colunas numéricas, formatação USD só no column_config da exibição).
+
+Uso: python benchmarks/bench_exibicao.py
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agregacoes import analisar, resumo_dias, resumo_pagamentos, resumo_tecnicos
+from gerador_planilhas import gerar_pasta
+from medicao import medir
+from planilhas import FORMAS_PAGAMENTO_VALIDAS, otimizar_tipos, process_spreadsheet
+
+ESCALAS = [4, 40, 400]
+MOEDA_SEMANAL = ['Serviço', 'Gorjeta', 'Pagamento Tecnico', 'Lucro Empresa']
+MOEDA_TECNICO = ['Total Serviços', 'Total Gorjetas', 'Total Pagamento', 'Lucro Empresa', 'Média Atendimento',
+                 'Gorjeta Média']
+MOEDA_PAGAMENTO = ['Total Serviços', 'Total Gorjetas', 'Lucro Empresa', 'Total Geral']
+MOEDA_DIA = ['Total Serviços', 'Total Gorjetas', 'Lucro Empresa']
+
+
+def format_currency(value):
+    if pd.isna(value):
+        return None
+    return f"${value:,.2f}"
+
+
+def gerar_analise(copias):
+    """Análise de um histórico com a pasta sintética repetida como semanas diferentes"""
+    base = process_spreadsheet(gerar_pasta(4))
+    partes = []
+    for i in range(copias // 4):
+        copia = base.copy()
+        copia['Semana'] = copia['Semana'].astype(str) + f" #{i}"
+        partes.append(copia)
+    return analisar(otimizar_tipos(pd.concat(partes, ignore_index=True)))
+
+
+def tabelas(analise):
+    cubo = analise['cubo']
+    pagamentos = resumo_pagamentos(cubo, FORMAS_PAGAMENTO_VALIDAS)[
+        ['Pagamento', 'Serviço', 'Atendimentos', 'Gorjeta', 'Clientes', 'Lucro Empresa']].copy()
+    pagamentos.columns = ['Pagamento', 'Total Serviços', 'Qtd Usos', 'Total Gorjetas', 'Total Atendimentos',
+                          'Lucro Empresa']
+    pagamentos['Total Geral'] = pagamentos['Total Serviços'] + pagamentos['Total Gorjetas']
+    pagamentos['% Uso'] = (pagamentos['Qtd Usos'] / pagamentos['Qtd Usos'].sum() * 100).round(2)
+    dias = resumo_dias(cubo)[['Dia', 'Atendimentos', 'Serviço', 'Gorjeta', 'Pets', 'Lucro Empresa']]
+    dias.columns = ['Dia', 'Atendimentos', 'Total Serviços', 'Total Gorjetas', 'Total Pets', 'Lucro Empresa']
+    return analise['weekly_totals'], resumo_tecnicos(analise['weekly_totals']), pagamentos, dias
+
+
+def preparar_antes(semanal, tecnicos, pagamentos, dias):
+    semanal = semanal.copy()
+    for coluna in MOEDA_SEMANAL:
+        semanal[coluna] = semanal[coluna].apply(format_currency)
+    tecnicos = tecnicos.copy()
+    for coluna in MOEDA_TECNICO:
+        tecnicos[coluna] = tecnicos[coluna].apply(format_currency)
+    grafico = tecnicos.copy()
+    grafico['Atendimentos'] = pd.to_numeric(grafico['Atendimentos'], errors='coerce')
+    pagamentos = pagamentos.copy()
+    for coluna in MOEDA_PAGAMENTO:
+        pagamentos[coluna] = pagamentos[coluna].apply(format_currency)
+    pagamentos['% Uso'] = pagamentos['% Uso'].astype(str) + '%'
+    dias = dias.copy()
+    for coluna in MOEDA_DIA:
+        dias[coluna] = dias[coluna].apply(format_currency)
+    return semanal, tecnicos, grafico, pagamentos, dias
+
+
+def preparar_agora(semanal, tecnicos, pagamentos, dias):
+    # O que sobra no app: as configurações de coluna (sem streamlit aqui, só os dicionários)
+    configuracoes = [{coluna: {'format': 'dollar'} for coluna in colunas}
+                     for colunas in (MOEDA_SEMANAL, MOEDA_TECNICO, MOEDA_PAGAMENTO, MOEDA_DIA)]
+    return semanal, tecnicos, pagamentos, dias, configuracoes
+
+
+def main():
+    print(f"{'semanas':>8} {'linhas semanais':>16} {'antes (ms)':>11} {'agora (ms)':>11}")
+    for semanas in ESCALAS:
+        partes = tabelas(gerar_analise(semanas))
+        t_antes, _ = medir(lambda: preparar_antes(*partes), repeticoes=5)
+        t_agora, _ = medir(lambda: preparar_agora(*partes), repeticoes=5)
+        print(f"{semanas:>8} {len(partes[0]):>16,} {t_antes * 1000:>11.2f} {t_agora * 1000:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
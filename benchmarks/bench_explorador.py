@@ -0,0 +1,57 @@
+"""Benchmark dos dados brutos: o recorte inteiro no st.dataframe x uma página do explorador
+
+Com o histórico de ~1 milhão de registros do benchmark do índice, mede a
+conversão para Arrow que o st.dataframe faz com o recorte inteiro (como o
+app fazia) e com uma página de 100 linhas, além do custo de buscar e
+ordenar no servidor (ordem_linhas, memorizado por estado dos filtros) e de
+montar cada página (fatia).
+
+Uso: python benchmarks/bench_explorador.py
+"""
+import os
+import sys
+
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_indice import gerar_planilhas
+from explorador import fatia, ordem_linhas
+from indice import indexar_planilhas
+from medicao import medir
+
+TAMANHO_PAGINA = 100
+CONSULTAS = {
+    'ordem original': {},
+    'ordenado por Serviço': {'ordenar_por': 'Serviço', 'crescente': False},
+    'ordenado por Cliente': {'ordenar_por': 'Cliente'},
+    'busca em Nome': {'coluna_busca': 'Nome', 'texto': 'tech 1'},
+    'busca em Cliente + ordem': {'coluna_busca': 'Cliente', 'texto': '12', 'ordenar_por': 'Data'},
+}
+
+
+def serializar(df):
+    """Serialização que o st.dataframe faz: tabela Arrow em formato IPC"""
+    tabela = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return sink.getvalue().size
+
+
+def main():
+    data = indexar_planilhas(gerar_planilhas()).data
+    t_tudo, tamanho = medir(lambda: serializar(data), repeticoes=1)
+    print(f"{len(data):,} linhas: recorte inteiro serializado em {t_tudo * 1000:.0f} ms ({tamanho / 2 ** 20:.0f} MB)")
+
+    print(f"{'consulta':<26} {'linhas':>9} {'busca+ordem (ms)':>17} {'página (ms)':>12} {'KB':>5}")
+    for nome, consulta in CONSULTAS.items():
+        t_ordem, posicoes = medir(lambda: ordem_linhas(data, **consulta))
+        ultima = max(1, -(-len(posicoes) // TAMANHO_PAGINA))
+        t_pagina, tamanho = medir(lambda: serializar(fatia(data, posicoes, ultima, TAMANHO_PAGINA)))
+        print(f"{nome:<26} {len(posicoes):>9,} {t_ordem * 1000:>17.1f} {t_pagina * 1000:>12.2f} {tamanho / 1024:>5.0f}")
+
+
+if __name__ == '__main__':
+    main()
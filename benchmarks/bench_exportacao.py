@@ -0,0 +1,78 @@
+"""Benchmark da exportação: to_csv inteiro em memória x exportar em blocos
+
+Com os atendimentos realizados (com pagamentos) do histórico de ~1 milhão de
+registros do benchmark do índice, mede tempo, tamanho do arquivo e pico de
+memória do Python (tracemalloc, em uma execução separada, porque ele deixa
+tudo mais lento) do CSV montado inteiro como o app fazia e das exportações
+em blocos para arquivo temporário em CSV, CSV compactado e Parquet. Antes,
+confere que o Parquet em blocos aceita 'ID Pagamento' com números de cheque
+misturados a códigos de texto e ausente em todo o primeiro bloco.
+
+Uso: python benchmarks/bench_exportacao.py
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agregacoes import analisar
+from bench_indice import gerar_planilhas
+from exportacao import FORMATOS_EXPORTACAO, exportar, exportar_para_arquivo
+from indice import indexar_planilhas
+from medicao import medir, pico_memoria
+
+
+def csv_em_memoria(df):
+    return len(df.to_csv(index=False).encode('utf-8'))
+
+
+def em_blocos(df, formato):
+    arquivo = exportar_para_arquivo(df, formato)
+    tamanho = arquivo.seek(0, os.SEEK_END)
+    arquivo.close()
+    return tamanho
+
+
+def conferir_ids_mistos(df, linhas_por_bloco=1_000):
+    """Exporta em Parquet com IDs numéricos e de texto misturados e confere a leitura de volta"""
+    df = df.head(5 * linhas_por_bloco).copy()
+    ids = np.where(np.arange(len(df)) % 3 == 0, np.arange(len(df)) + 100_000, None).astype(object)
+    ids[1::3] = [f"ZELLE-{i}" for i in range(len(ids[1::3]))]
+    ids[:linhas_por_bloco] = None
+    df['ID Pagamento'] = pd.Series(ids, index=df.index, dtype=object)
+    arquivo = tempfile.SpooledTemporaryFile()
+    exportar(df, arquivo, 'parquet', linhas_por_bloco=linhas_por_bloco)
+    arquivo.seek(0)
+    lido = pq.read_table(arquivo).to_pandas()
+    assert len(lido) == len(df)
+    assert lido['ID Pagamento'].astype('string').equals(df['ID Pagamento'].astype('string').reset_index(drop=True))
+    pd.testing.assert_series_equal(lido['Serviço'], df['Serviço'].reset_index(drop=True))
+
+
+def main():
+    indice = indexar_planilhas(gerar_planilhas())
+    _, completed_services, not_completed = indice.recorte({})
+    completed_services = analisar(indice.data, (completed_services, not_completed))['completed_services']
+    print(f"{len(completed_services):,} atendimentos, {len(completed_services.columns)} colunas")
+    conferir_ids_mistos(completed_services)
+    print("Parquet com 'ID Pagamento' misto (números e texto, primeiro bloco vazio): ok")
+
+    casos = {'CSV inteiro (antes)': lambda: csv_em_memoria(completed_services)}
+    for formato, (rotulo, _, _) in FORMATOS_EXPORTACAO.items():
+        casos[f"{rotulo} em blocos"] = lambda formato=formato: em_blocos(completed_services, formato)
+
+    print(f"{'exportação':<34} {'s':>6} {'arquivo (MB)':>13} {'pico de memória (MB)':>21}")
+    for nome, func in casos.items():
+        segundos, tamanho = medir(func, repeticoes=1)
+        pico, _ = pico_memoria(func)
+        print(f"{nome:<34} {segundos:>6.2f} {tamanho / 2 ** 20:>13.1f} {pico / 2 ** 20:>21.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark dos gráficos de histórico: todas as semanas e técnicos x serie_historica
+
+Gera históricos de 60 técnicos com cada vez mais semanas e compara, para a
+evolução de serviços e o pagamento por técnico, as figuras montadas como
+antes (uma linha ou barra por técnico e semana) com as limitadas por
+orçamento de pontos (semana, mês ou trimestre; top técnicos e Outros) e
+pelo tamanho máximo serializado: pontos, KB enviados ao navegador e tempo
+de montagem + serialização.
+
+Uso: python benchmarks/bench_graficos.py
+"""
+import logging
+import os
+import sys
+
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agregacoes import analisar
+from gerador_planilhas import gerar_pasta
+from graficos import figura_evolucao, figura_pagamento_semanal
+from medicao import medir
+from planilhas import otimizar_tipos, process_spreadsheet
+
+ESCALAS = [13, 52, 104]
+TECNICOS = 60
+# Semana curta por técnico: poucas linhas, muitas semanas
+ATENDIMENTOS = 14
+NAO_REALIZADOS = 3
+CLIENTES_INVALIDOS = 1
+
+
+def evolucao_antes(weekly_totals):
+    fig = px.line(weekly_totals, x='Semana', y='Serviço', color='Nome', markers=True,
+                  title='Evolução de Serviços por Técnico',
+                  labels={'Serviço': 'Valor em Serviços ($)', 'Semana': 'Semana'})
+    fig.update_traces(hovertemplate="<b>%{x}</b><br>Valor: $%{y:,.2f}")
+    return fig
+
+
+def pagamento_antes(weekly_totals):
+    fig = px.bar(weekly_totals, x='Pagamento Tecnico', y='Nome', color='Semana', barmode='group',
+                 title='Pagamento Semanal por Técnico', labels={'Pagamento Tecnico': 'Pagamento ($)', 'Nome': 'Técnico'})
+    fig.update_traces(texttemplate='$%{x:,.2f}', textposition='outside')
+    fig.update_layout(hovermode="x unified")
+    return fig
+
+
+def montar(construir):
+    """Figura montada e serializada, com o tamanho do JSON e os pontos desenhados"""
+    fig = construir()
+    return len(fig.to_json()), sum(len(trace.x) for trace in fig.data)
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format='  %(message)s')
+    print(f"{'semanas':>8} {'gráfico':<10} {'pontos antes':>13} {'KB antes':>9} {'ms antes':>9} "
+          f"{'pontos':>7} {'KB':>6} {'ms':>7}")
+    for semanas in ESCALAS:
+        analise = analisar(otimizar_tipos(process_spreadsheet(gerar_pasta(semanas, TECNICOS, ATENDIMENTOS,
+                                                                          NAO_REALIZADOS, CLIENTES_INVALIDOS))))
+        weekly_totals, cubo = analise['weekly_totals'], analise['cubo']
+        for nome, antes, agora in (('evolução', evolucao_antes, figura_evolucao),
+                                   ('pagamento', pagamento_antes, figura_pagamento_semanal)):
+            t_antes, (kb_antes, pontos_antes) = medir(montar, lambda: antes(weekly_totals), repeticoes=2)
+            t_agora, (kb_agora, pontos_agora) = medir(montar, lambda: agora(cubo), repeticoes=2)
+            print(f"{semanas:>8} {nome:<10} {pontos_antes:>13,} {kb_antes / 1024:>9.0f} {t_antes * 1000:>9.0f} "
+                  f"{pontos_agora:>7,} {kb_agora / 1024:>6.0f} {t_agora * 1000:>7.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark dos filtros da sidebar com isin e com o índice invertido (IndiceFiltros)
+
+Monta um histórico com ~1 milhão de registros (a pasta sintética repetida
+como semanas diferentes, em várias planilhas) e mede, para seleções de
+tamanhos diferentes, o que cada rerun do app fazia antes (junção, limpeza,
+três isin e as máscaras de realizados/não realizados), só os isin e
+máscaras sobre os dados já juntos, e IndiceFiltros.recorte. Também mede
+indexar_planilhas, feita uma vez por conjunto de planilhas.
+
+Uso: python benchmarks/bench_indice.py
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_pasta
+from indice import indexar_planilhas
+from medicao import medir
+from planilhas import INVALID_CLIENTS, otimizar_tipos, process_spreadsheet
+
+LINHAS = 1_000_000
+
+
+def gerar_planilhas(linhas=LINHAS):
+    """Registros de várias planilhas, cada uma com as abas da pasta sintética renomeadas"""
+    base = process_spreadsheet(gerar_pasta(4))
+    planilhas = []
+    for i in range(-(-linhas // len(base))):
+        copia = base.copy()
+        copia['Semana'] = copia['Semana'].astype(str) + f" #{i}"
+        planilhas.append(otimizar_tipos(copia))
+    return planilhas
+
+
+def rerun_antes(planilhas, filtros):
+    """Junção e limpeza a cada rerun, seguidas dos isin, como o app fazia"""
+    data = otimizar_tipos(pd.concat(planilhas, ignore_index=True))
+    data = data[data['Nome'].notna() & (data['Nome'].astype(str).str.strip() != '')]
+    data = data[~data['Cliente'].astype(str).str.strip().str.upper().isin([c.upper() for c in INVALID_CLIENTS])]
+    return recorte_isin(data, filtros)
+
+
+def recorte_isin(data, filtros):
+    for coluna, valores in filtros.items():
+        if valores:
+            data = data[data[coluna].isin(valores)]
+    return data, data[data['Realizado']], data[~data['Realizado'] & data['Cliente'].notna()]
+
+
+def main():
+    planilhas = gerar_planilhas()
+    t_indice, indice = medir(lambda: indexar_planilhas(planilhas), repeticoes=1)
+    data = indice.data
+    print(f"{len(data):,} linhas em {len(planilhas)} planilhas, indexar_planilhas: {t_indice * 1000:.0f} ms")
+
+    semanas = list(indice.valores('Semana'))
+    nomes = list(indice.valores('Nome'))
+    categorias = list(indice.valores('Categoria'))
+    selecoes = {
+        'tudo selecionado': {'Semana': semanas, 'Nome': nomes, 'Categoria': categorias},
+        '1 semana': {'Semana': semanas[:1], 'Nome': nomes, 'Categoria': categorias},
+        '1 técnico, 1 semana': {'Semana': semanas[:1], 'Nome': nomes[:1], 'Categoria': categorias},
+        '4 semanas, 10 técnicos': {'Semana': semanas[:4], 'Nome': nomes[:10], 'Categoria': categorias},
+        '1 categoria': {'Semana': semanas, 'Nome': nomes, 'Categoria': categorias[:1]},
+    }
+
+    print(f"{'seleção':<24} {'linhas':>9} {'rerun antes':>12} {'só isin':>9} {'índice':>8}  (ms)")
+    for nome, filtros in selecoes.items():
+        t_antes, _ = medir(lambda: rerun_antes(planilhas, filtros), repeticoes=2)
+        t_isin, esperado = medir(lambda: recorte_isin(data, filtros), repeticoes=5)
+        t_novo, obtido = medir(lambda: indice.recorte(filtros), repeticoes=5)
+        for a, b in zip(esperado, obtido):
+            pd.testing.assert_frame_equal(a, b)
+        print(f"{nome:<24} {len(obtido[0]):>9,} {t_antes * 1000:>12.1f} {t_isin * 1000:>9.2f} {t_novo * 1000:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
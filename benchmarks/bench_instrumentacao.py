@@ -0,0 +1,69 @@
+"""Benchmark da instrumentação por etapa: custo de etapa() e do pipeline medido
+
+Mede o custo fixo de um bloco etapa() vazio (sem e com tracemalloc) e roda o
+pipeline do app (leitura das abas, normalização, agregações, pagamentos e
+exportação) sobre a pasta sintética com a coleta desligada, ligada só com
+tempos e ligada com pico de memória, mostrando as etapas da última execução.
+
+Uso: python benchmarks/bench_instrumentacao.py
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agregacoes import analisar
+from exportacao import exportar
+from gerador_planilhas import gerar_pasta
+from indice import indexar_planilhas
+from instrumentacao import coletar, etapa
+from medicao import medir
+from planilhas import process_spreadsheet
+
+CHAMADAS = 20_000
+
+
+def custo_etapa():
+    inicio = time.perf_counter()
+    for _ in range(CHAMADAS):
+        with etapa('render'):
+            pass
+    return (time.perf_counter() - inicio) / CHAMADAS * 1e6
+
+
+def pipeline(conteudo):
+    dados = process_spreadsheet(io.BytesIO(conteudo))
+    analise = analisar(indexar_planilhas([dados]).data)
+    exportar(analise['completed_services'], io.BytesIO(), 'parquet')
+
+
+def main():
+    coletar(False)
+    print(f"etapa() vazia: {custo_etapa():.1f} µs sem tracemalloc", end='')
+    tracemalloc.start()
+    print(f", {custo_etapa():.1f} µs com tracemalloc")
+    tracemalloc.stop()
+
+    conteudo = gerar_pasta(13).getvalue()
+    t_sem, _ = medir(pipeline, conteudo)
+    coletar()
+    t_tempos, _ = medir(pipeline, conteudo)
+    tracemalloc.start()
+    registros = coletar()
+    t_memoria, _ = medir(lambda: (registros.clear(), pipeline(conteudo)))
+    tracemalloc.stop()
+    print(f"pipeline (13 abas): {t_sem:.2f} s sem coleta, {t_tempos:.2f} s com tempos, "
+          f"{t_memoria:.2f} s com pico de memória")
+
+    print(f"\n{'etapa':<10} {'detalhe':<22} {'ms':>8} {'pico (MB)':>10}")
+    for r in registros:
+        detalhe = ', '.join(f"{k}={v}" for k, v in r.items() if k not in ('etapa', 'segundos', 'pico_mb'))
+        print(f"{r['etapa']:<10} {detalhe:<22} {r['segundos'] * 1000:>8.1f} {r['pico_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark do processamento em lote (lote.py): partida e planilhas por segundo
+
+Mede a partida a frio (novo interpretador importando lote, sem Streamlit)
+contra o orçamento ORCAMENTO_PARTIDA e roda processar_diretorio sobre um
+diretório com N_PLANILHAS planilhas sintéticas, com recibos, em um único
+processo e com o padrão da CLI (pool de processos só quando há abas ou
+recibos suficientes para pagar a partida dos processos).
+
+Uso: python benchmarks/bench_lote.py [N_PLANILHAS]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_pasta
+from lote import ORCAMENTO_PARTIDA, processar_diretorio
+from medicao import medir
+
+N_PLANILHAS = 20
+
+
+def partida_a_frio(repeticoes=3):
+    melhor, _ = medir(subprocess.run, [sys.executable, '-c', 'import lote'], cwd=RAIZ, check=True,
+                      repeticoes=repeticoes)
+    return melhor
+
+
+def main():
+    n_planilhas = int(sys.argv[1]) if len(sys.argv) > 1 else N_PLANILHAS
+    partida = partida_a_frio()
+    print(f"Partida a frio (interpretador + import lote): {partida:.2f} s (orçamento {ORCAMENTO_PARTIDA:.2f} s)")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        entrada = os.path.join(diretorio, 'planilhas')
+        os.makedirs(entrada)
+        for i in range(n_planilhas):
+            with open(os.path.join(entrada, f"planilha_{i:03d}.xlsx"), 'wb') as arquivo:
+                arquivo.write(gerar_pasta(4, seed=i * 10, tecnicos=10).getvalue())
+
+        print(f"{'modo':<18} {'planilhas/s':>12} {'leitura (s)':>12} {'agregados (s)':>14} {'relatório (s)':>14} "
+              f"{'recibos':>8} {'recibos (s)':>12}")
+        for nome, max_processos in (('1 processo', 1), ('padrão', None)):
+            resultado = processar_diretorio(entrada, os.path.join(diretorio, f"saida_{max_processos}"),
+                                            recibos=True, max_processos=max_processos)
+            print(f"{nome:<18} {resultado['planilhas_por_segundo']:>12.2f} {resultado['segundos_leitura']:>12.2f} "
+                  f"{resultado['segundos_agregados']:>14.2f} {resultado['segundos_relatorio']:>14.2f} "
+                  f"{resultado['recibos']:>8} {resultado['segundos_recibos']:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
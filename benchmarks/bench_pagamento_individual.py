@@ -0,0 +1,83 @@
+"""Benchmark da alocação de pagamento por atendimento
+
+Compara alocar_pagamentos_individuais (vetorizado) com o apply linha a linha
+de calcular_pagamento_individual, de 1 mil a 1 milhão de atendimentos.
+A versão linha a linha só é medida até LIMITE_LINHA_A_LINHA atendimentos.
+
+Uso: python benchmarks/bench_pagamento_individual.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from medicao import medir
+from pagamentos import (alocar_pagamentos_individuais, calcular_pagamento_individual,
+                        calcular_pagamentos_semanais)
+
+ESCALAS = [1_000, 10_000, 100_000, 1_000_000]
+LIMITE_LINHA_A_LINHA = 10_000
+CATEGORIAS = ['Registering', 'Technician', 'Training', 'Coordinator', 'Started']
+
+
+def gerar_atendimentos(n, seed=0):
+    """Gera atendimentos realizados sintéticos (cerca de 40 por técnico/semana)"""
+    rng = np.random.default_rng(seed)
+    n_tecnicos = max(5, min(60, n // 400))
+    n_semanas = max(1, n // (n_tecnicos * 40))
+    tecnicos = np.array([f"Tech {i:02d}" for i in range(n_tecnicos)])
+    semanas = np.array([f"WEEK {i + 1}" for i in range(n_semanas)])
+    nome = tecnicos[rng.integers(0, n_tecnicos, n)]
+    servico = rng.choice([0.0, 150.0, 199.0, 249.0, 299.0], n)
+    return pd.DataFrame({
+        'Nome': nome,
+        'Semana': semanas[rng.integers(0, n_semanas, n)],
+        'Categoria': pd.Series(nome).map(
+            {t: CATEGORIAS[i % len(CATEGORIAS)] for i, t in enumerate(tecnicos)}).to_numpy(),
+        'Data': pd.Timestamp('2024-01-07') + pd.to_timedelta(rng.integers(0, 7, n), unit='D'),
+        'Dia': rng.choice(['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'], n),
+        'Serviço': servico,
+        'Gorjeta': np.where(rng.random(n) < 0.3, rng.choice([10.0, 20.0, 30.0], n), 0.0),
+    })
+
+
+def totais_semanais(services):
+    """Reproduz o cálculo de weekly_totals feito no app"""
+    dias = services.groupby(['Nome', 'Semana', 'Data']).size().reset_index()
+    dias = dias.groupby(['Nome', 'Semana']).size().reset_index(name='Dias Trabalhados')
+    weekly = services.groupby(['Nome', 'Semana', 'Categoria']).agg({
+        'Serviço': 'sum',
+        'Gorjeta': 'sum',
+        'Dia': 'count'
+    }).reset_index()
+    weekly = pd.merge(weekly, dias, on=['Nome', 'Semana'], how='left')
+    weekly[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_semanais(weekly)
+    return weekly
+
+
+def linha_a_linha(services, weekly):
+    return services.apply(lambda x: calcular_pagamento_individual(x, weekly), axis=1)
+
+
+def main():
+    print(f"{'atendimentos':>12} {'vetorizado (s)':>15} {'linha a linha (s)':>18} {'ganho':>8}")
+    for n in ESCALAS:
+        services = gerar_atendimentos(n)
+        # Técnico/semana sem totais para exercitar o caminho de semana ausente
+        weekly = totais_semanais(services).iloc[1:]
+
+        t_vet, vetorizado = medir(alocar_pagamentos_individuais, services, weekly)
+        if n <= LIMITE_LINHA_A_LINHA:
+            t_lin, referencia = medir(linha_a_linha, services, weekly, repeticoes=1)
+            np.testing.assert_allclose(vetorizado.to_numpy(), referencia.to_numpy(dtype=float))
+            print(f"{n:>12,} {t_vet:>15.4f} {t_lin:>18.4f} {t_lin / t_vet:>7.0f}x")
+        else:
+            print(f"{n:>12,} {t_vet:>15.4f} {'-':>18} {'-':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark e verificação de paridade do pagamento semanal
+
+Compara calcular_pagamentos_semanais (tabela de regras vetorizada) com o
+apply linha a linha de calcular_pagamento_semanal. A paridade é verificada
+em todas as escalas medidas pela versão linha a linha, incluindo uma
+categoria sem regra, semanas com total negativo (estornos maiores que os
+serviços) e dias trabalhados ausentes.
+
+Uso: python benchmarks/bench_pagamento_semanal.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from medicao import medir
+from pagamentos import REGRAS_PAGAMENTO, calcular_pagamento_semanal, calcular_pagamentos_semanais
+
+ESCALAS = [1_000, 10_000, 100_000, 1_000_000]
+LIMITE_LINHA_A_LINHA = 100_000
+
+
+def gerar_totais_semanais(n, seed=0):
+    """Gera linhas sintéticas de técnico/semana com todas as categorias"""
+    rng = np.random.default_rng(seed)
+    categorias = list(REGRAS_PAGAMENTO) + ['Sem Regra']
+    servico = rng.integers(0, 40, n) * 199.0
+    # ~5% das semanas com estornos maiores que os serviços
+    servico[rng.random(n) < 0.05] *= -1
+    dias = rng.integers(0, 8, n).astype(float)
+    dias[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        'Nome': [f"Tech {i % 60:02d}" for i in range(n)],
+        'Semana': [f"WEEK {i // 60 + 1}" for i in range(n)],
+        'Categoria': rng.choice(categorias, n),
+        'Serviço': servico,
+        'Gorjeta': rng.integers(0, 10, n) * 10.0,
+        'Dia': rng.integers(0, 40, n),
+        'Dias Trabalhados': dias,
+    })
+
+
+def linha_a_linha(weekly):
+    return weekly.apply(calcular_pagamento_semanal, axis=1)
+
+
+def main():
+    print(f"{'linhas':>12} {'tabela (s)':>12} {'linha a linha (s)':>18} {'ganho':>8}")
+    for n in ESCALAS:
+        weekly = gerar_totais_semanais(n)
+        t_vet, vetorizado = medir(calcular_pagamentos_semanais, weekly)
+        if n <= LIMITE_LINHA_A_LINHA:
+            t_lin, referencia = medir(linha_a_linha, weekly, repeticoes=1)
+            np.testing.assert_allclose(vetorizado.to_numpy(), referencia.to_numpy(dtype=float))
+            print(f"{n:>12,} {t_vet:>12.4f} {t_lin:>18.4f} {t_lin / t_vet:>7.0f}x")
+        else:
+            print(f"{n:>12,} {t_vet:>12.4f} {'-':>18} {'-':>8}")
+
+
+if __name__ == '__main__':
+    main()
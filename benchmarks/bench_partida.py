@@ -0,0 +1,83 @@
+"""Benchmark da partida do app: relatório de -X importtime das importações de app.py
+
+Lê as importações do topo de app.py (menos o streamlit, que não faz parte
+do que o app controla), importa esses módulos em um interpretador novo com
+-X importtime e mostra o tempo total, os pacotes mais caros e se plotly,
+fpdf, requests e openpyxl foram carregados na partida. Também mede quanto
+cada um desses pacotes acrescenta quando é carregado sob demanda (primeiro
+gráfico, primeiro PDF, primeira URL, primeira planilha) depois das
+importações do app.
+
+Uso: python benchmarks/bench_partida.py [--detalhes N]
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Carregados só quando o primeiro gráfico, PDF, download ou planilha precisa deles
+SOB_DEMANDA = {'plotly': 'import plotly.express', 'fpdf': 'import fpdf', 'requests': 'import requests',
+               'openpyxl': 'import openpyxl'}
+
+
+def importacoes_do_app():
+    """Instruções import do topo de app.py, até a primeira instrução que não é import"""
+    with open(os.path.join(RAIZ, 'app.py'), encoding='utf-8') as arquivo:
+        arvore = ast.parse(arquivo.read())
+    instrucoes = []
+    for no in arvore.body:
+        if not isinstance(no, (ast.Import, ast.ImportFrom)):
+            break
+        modulos = [a.name for a in no.names] if isinstance(no, ast.Import) else [no.module]
+        if not any(m.split('.')[0] == 'streamlit' for m in modulos):
+            instrucoes.append(ast.unparse(no))
+    return instrucoes
+
+
+def importtime(codigo, repeticoes=3):
+    """Linhas (self µs, cumulativo µs, módulo) da execução mais rápida de codigo com -X importtime"""
+    melhor = None
+    for _ in range(repeticoes):
+        processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=RAIZ,
+                                  capture_output=True, text=True, check=True)
+        linhas = []
+        for linha in processo.stderr.splitlines():
+            if not linha.startswith('import time:') or 'self [us]' in linha:
+                continue
+            proprio, cumulativo, modulo = linha[len('import time:'):].split('|')
+            linhas.append((int(proprio), int(cumulativo), modulo.rstrip()))
+        if melhor is None or sum(p for p, _, _ in linhas) < sum(p for p, _, _ in melhor):
+            melhor = linhas
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--detalhes', type=int, default=12, help="pacotes mais caros a listar")
+    args = parser.parse_args()
+
+    importacoes = '\n'.join(importacoes_do_app())
+    linhas = importtime(importacoes)
+    por_pacote = defaultdict(int)
+    for proprio, _, modulo in linhas:
+        por_pacote[modulo.strip().split('.')[0]] += proprio
+    total = sum(por_pacote.values())
+
+    print(f"Importações de app.py (sem streamlit): {total / 1000:.0f} ms, {len(linhas)} módulos")
+    print(f"{'pacote':<24} {'ms':>8} {'%':>6}")
+    for pacote, tempo in sorted(por_pacote.items(), key=lambda item: -item[1])[:args.detalhes]:
+        print(f"{pacote:<24} {tempo / 1000:>8.1f} {100 * tempo / total:>6.1f}")
+
+    print(f"\n{'sob demanda':<24} {'na partida':>10} {'custo extra (ms)':>17}")
+    for pacote, codigo in SOB_DEMANDA.items():
+        # Só os módulos que ainda não tinham sido importados pelo app entram no -X importtime
+        custo = sum(p for p, _, _ in importtime(f"{importacoes}\n{codigo}")) - total
+        print(f"{pacote:<24} {'sim' if pacote in por_pacote else 'não':>10} {max(custo, 0) / 1000:>17.0f}")
+
+
+if __name__ == '__main__':
+    main()
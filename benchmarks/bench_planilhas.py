@@ -0,0 +1,124 @@
+"""Benchmark e verificação de paridade do parser de abas WEEK
+
+Gera abas sintéticas com os casos de borda do gerador_planilhas e compara
+extrair_registros_semana com o parser anterior baseado em df.iterrows
+(copiado abaixo como referência).
+Por fim mede process_spreadsheet sobre pastas de trabalho .xlsx completas.
+
+Uso: python benchmarks/bench_planilhas.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_aba, gerar_pasta
+from medicao import medir
+from planilhas import (COLUNAS_DIAS, DIAS_SEMANA, FORMAS_PAGAMENTO_VALIDAS, INVALID_CLIENTS,
+                       extrair_registros_semana, process_spreadsheet)
+
+ESCALAS_ABAS = [1, 4, 13, 52]
+
+
+def extrair_linha_a_linha(df, sheet_name):
+    """Parser anterior de process_spreadsheet, mantido apenas como referência"""
+    technician_blocks = []
+    current_block = []
+    collecting = False
+    for idx, row in df.iterrows():
+        if any('NAME:' in str(cell) for cell in row.values):
+            if current_block:
+                technician_blocks.append(current_block)
+                current_block = []
+            collecting = True
+        if collecting:
+            current_block.append(row)
+    if current_block:
+        technician_blocks.append(current_block)
+
+    week_data = []
+    for block in technician_blocks:
+        name_row = next((row for row in block if any('NAME:' in str(cell) for cell in row.values)), None)
+        if name_row is None:
+            continue
+        name_col = next(
+            (i for i, cell in enumerate(name_row.values) if isinstance(cell, str) and 'NAME:' in cell), None)
+        technician_info = {
+            'Semana': sheet_name,
+            'Nome': name_row[name_col + 1] if name_col is not None else None,
+            'Categoria': name_row[name_col + 3] if name_col is not None else None,
+            'Origem': name_row[name_col + 5] if name_col is not None and 'From:' in str(
+                name_row[name_col + 4]) else None
+        }
+        header_row = next((i for i, row in enumerate(block) if all(
+            keyword in str(row.values) for keyword in ['Schedule', 'DATE', 'SERVICE'])), None)
+        if header_row is None:
+            continue
+        for i in range(header_row + 1, len(block)):
+            day_row = block[i]
+            for day_idx, (start_col, end_col) in enumerate(COLUNAS_DIAS):
+                day_data = day_row[start_col:end_col + 1].values
+                client_name = str(day_data[0]).strip() if pd.notna(day_data[0]) else ''
+                if not client_name or client_name.upper() in [c.upper() for c in INVALID_CLIENTS]:
+                    continue
+                if pd.notna(day_data[2]) and str(day_data[2]).strip() and str(day_data[2]).strip() != 'nan':
+                    try:
+                        service_value = float(day_data[2])
+                    except:
+                        service_value = np.nan
+                    if not np.isnan(service_value):
+                        pagamento = day_data[5] if pd.notna(day_data[5]) and str(
+                            day_data[5]).strip() in FORMAS_PAGAMENTO_VALIDAS else None
+                        week_data.append({**technician_info, **{
+                            'Dia': DIAS_SEMANA[day_idx], 'Data': day_data[1], 'Cliente': client_name,
+                            'Serviço': service_value,
+                            'Gorjeta': float(day_data[3]) if pd.notna(day_data[3]) else 0,
+                            'Pets': day_data[4] if pd.notna(day_data[4]) else 0, 'Pagamento': pagamento,
+                            'ID Pagamento': day_data[6] if pd.notna(day_data[6]) else None,
+                            'Verificado': day_data[7] if pd.notna(day_data[7]) else False, 'Realizado': True}})
+                elif pd.notna(day_data[0]):
+                    week_data.append({**technician_info, **{
+                        'Dia': DIAS_SEMANA[day_idx], 'Data': day_data[1], 'Cliente': client_name,
+                        'Serviço': 0, 'Gorjeta': 0, 'Pets': 0, 'Pagamento': None, 'ID Pagamento': None,
+                        'Verificado': False, 'Realizado': False}})
+    return pd.DataFrame(week_data)
+
+
+def comparar(novo, referencia):
+    """Compara os registros célula a célula, tratando None/NaN como iguais"""
+    assert list(novo.columns) == list(referencia.columns), (list(novo.columns), list(referencia.columns))
+    assert len(novo) == len(referencia), (len(novo), len(referencia))
+    for coluna in novo.columns:
+        a = novo[coluna].astype(object).where(novo[coluna].notna(), None).tolist()
+        b = referencia[coluna].astype(object).where(referencia[coluna].notna(), None).tolist()
+        assert a == b, coluna
+
+
+def main():
+    print("Parser por aba (sem leitura do Excel)")
+    print(f"{'abas':>6} {'registros':>10} {'colunar (s)':>12} {'iterrows (s)':>13} {'ganho':>8}")
+    for n_abas in ESCALAS_ABAS:
+        abas = [gerar_aba(seed=i, casos_de_borda=True) for i in range(n_abas)]
+        t_col, novos = medir(lambda: [extrair_registros_semana(aba, f"WEEK {i}") for i, aba in enumerate(abas)])
+        t_ref, refs = medir(lambda: [extrair_linha_a_linha(aba, f"WEEK {i}") for i, aba in enumerate(abas)],
+                            repeticoes=1)
+        for novo, ref in zip(novos, refs):
+            comparar(novo, ref)
+        total = sum(len(n) for n in novos)
+        print(f"{n_abas:>6} {total:>10,} {t_col:>12.4f} {t_ref:>13.4f} {t_ref / t_col:>7.0f}x")
+
+    print()
+    print("process_spreadsheet sobre .xlsx completos")
+    print(f"{'abas':>6} {'registros':>10} {'tempo (s)':>10}")
+    for n_abas in ESCALAS_ABAS:
+        pasta = gerar_pasta(n_abas)
+        t, dados = medir(process_spreadsheet, pasta, repeticoes=1)
+        print(f"{n_abas:>6} {len(dados):>10,} {t:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
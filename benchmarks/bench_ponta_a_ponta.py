@@ -0,0 +1,176 @@
+"""Suíte de benchmarks ponta a ponta sobre pastas sintéticas do gerador_planilhas
+
+Para cada escala gera uma pasta de trabalho, confere que process_spreadsheet
+extrai exatamente os registros gerados e mede cada etapa do pipeline:
+leitura (process_spreadsheet), agregações (montar_cubo, totais_semanais e
+os resumos), as duas funções de pagamento (calcular_pagamentos_semanais e
+alocar_pagamentos_individuais) e os dois PDFs (create_pdf e o recibo do
+técnico com mais atendimentos em uma semana).
+
+Os tempos (melhor e mediana, em ms) são gravados em benchmarks/resultados/
+como JSON, com as versões e os parâmetros de cada escala, e comparados com
+o resultado anterior (ou com --comparar ARQUIVO): etapas mais lentas que
+--limite vezes o tempo anterior são marcadas como regressão e, com
+--falhar, fazem o script terminar com código 1.
+
+Uso: python benchmarks/bench_ponta_a_ponta.py [--escalas pequena media grande] [--repeticoes N]
+     [--comparar ARQUIVO] [--limite 1.2] [--falhar] [--sem-salvar]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS))
+sys.path.insert(0, BENCHMARKS)
+
+from agregacoes import montar_cubo, resumo_dias, resumo_pagamentos, resumo_tecnicos, totais_semanais
+from gerador_planilhas import contagens_esperadas, gerar_pasta
+from medicao import tempos
+from pagamentos import alocar_pagamentos_individuais, calcular_pagamentos_semanais
+from planilhas import FORMAS_PAGAMENTO_VALIDAS, process_spreadsheet
+from recibos import COLUNAS_RECIBO, create_tech_payment_receipt
+from relatorio import create_pdf
+
+RESULTADOS = os.path.join(BENCHMARKS, 'resultados')
+
+# Parâmetros do gerador por escala: abas, técnicos por aba e, por técnico e aba,
+# atendimentos realizados, não realizados e células de clientes inválidos
+ESCALAS = {
+    'pequena': {'abas': 4, 'tecnicos': 10, 'atendimentos': 20, 'nao_realizados': 2, 'clientes_invalidos': 1},
+    'media': {'abas': 13, 'tecnicos': 40, 'atendimentos': 40, 'nao_realizados': 4, 'clientes_invalidos': 1},
+    'grande': {'abas': 52, 'tecnicos': 40, 'atendimentos': 60, 'nao_realizados': 6, 'clientes_invalidos': 2},
+}
+
+
+def estatisticas(func, repeticoes):
+    """Melhor tempo e mediana, em ms"""
+    medidos, _ = tempos(func, repeticoes=repeticoes)
+    return {'melhor_ms': round(min(medidos) * 1000, 3), 'mediana_ms': round(statistics.median(medidos) * 1000, 3)}
+
+
+def ler(pasta):
+    pasta.seek(0)
+    return process_spreadsheet(pasta)
+
+
+def medir_escala(parametros, repeticoes):
+    """Tempos de cada etapa do pipeline sobre uma pasta gerada com parametros"""
+    pasta = gerar_pasta(**parametros)
+    data = ler(pasta)
+    esperado = contagens_esperadas(**parametros)
+    completed_services = data[data['Realizado']].copy()
+    not_completed = data[~data['Realizado'] & data['Cliente'].notna()]
+    if (len(completed_services), len(not_completed)) != (esperado['realizados'], esperado['nao_realizados']):
+        raise AssertionError(f"process_spreadsheet extraiu {len(completed_services)} realizados e "
+                             f"{len(not_completed)} não realizados; esperado {esperado}")
+
+    cubo = montar_cubo(completed_services)
+    weekly_totals = totais_semanais(cubo)
+    cubo[['Pagamento Tecnico', 'Lucro Empresa']] = alocar_pagamentos_individuais(cubo, weekly_totals)
+    completed_services[['Pagamento Tecnico', 'Lucro Empresa']] = alocar_pagamentos_individuais(
+        completed_services, weekly_totals)
+    (nome, semana), recibo = max(completed_services[COLUNAS_RECIBO].groupby(['Nome', 'Semana'], observed=True),
+                                 key=lambda par: len(par[1]))
+
+    def agregacoes():
+        cubo_novo = montar_cubo(completed_services)
+        totais = totais_semanais(cubo_novo)
+        resumo_tecnicos(totais)
+        resumo_pagamentos(cubo, FORMAS_PAGAMENTO_VALIDAS)
+        resumo_dias(cubo)
+
+    etapas = {
+        'process_spreadsheet': lambda: ler(pasta),
+        'agregacoes': agregacoes,
+        'calcular_pagamentos_semanais': lambda: calcular_pagamentos_semanais(weekly_totals),
+        'alocar_pagamentos_individuais': lambda: alocar_pagamentos_individuais(completed_services, weekly_totals),
+        'create_pdf': lambda: create_pdf(cubo, not_completed).output(dest='S'),
+        'create_tech_payment_receipt': lambda: create_tech_payment_receipt(recibo, nome, semana).output(dest='S'),
+    }
+    return {
+        'parametros': parametros,
+        'registros': len(data),
+        'bytes_planilha': pasta.getbuffer().nbytes,
+        'atendimentos_recibo': len(recibo),
+        'etapas': {nome_etapa: estatisticas(func, repeticoes) for nome_etapa, func in etapas.items()},
+    }
+
+
+def ultimo_resultado():
+    arquivos = sorted(glob.glob(os.path.join(RESULTADOS, '*.json')))
+    return arquivos[-1] if arquivos else None
+
+
+def comparar(atual, anterior, limite):
+    """Imprime a razão atual/anterior do melhor tempo de cada etapa e retorna as regressões"""
+    regressoes = []
+    print(f"\n{'escala':>8} {'etapa':<30} {'antes (ms)':>11} {'agora (ms)':>11} {'razão':>7}")
+    for escala, resultado in atual['escalas'].items():
+        base = anterior['escalas'].get(escala)
+        if base is None or base['parametros'] != resultado['parametros']:
+            continue
+        for nome_etapa, medida in resultado['etapas'].items():
+            tempo_base = base['etapas'].get(nome_etapa)
+            if tempo_base is None:
+                continue
+            razao = medida['melhor_ms'] / tempo_base['melhor_ms']
+            marca = '  <- regressão' if razao > limite else ''
+            if marca:
+                regressoes.append((escala, nome_etapa, razao))
+            print(f"{escala:>8} {nome_etapa:<30} {tempo_base['melhor_ms']:>11.1f} {medida['melhor_ms']:>11.1f} "
+                  f"{razao:>6.2f}x{marca}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks ponta a ponta do pipeline")
+    parser.add_argument('--escalas', nargs='+', choices=list(ESCALAS), default=list(ESCALAS))
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--comparar', help="Resultado JSON anterior (padrão: o mais recente em resultados/)")
+    parser.add_argument('--limite', type=float, default=1.2,
+                        help="Razão de tempo acima da qual uma etapa conta como regressão")
+    parser.add_argument('--falhar', action='store_true', help="Termina com código 1 se houver regressão")
+    parser.add_argument('--sem-salvar', action='store_true', help="Não grava o resultado em resultados/")
+    args = parser.parse_args(argv)
+
+    anterior = args.comparar or ultimo_resultado()
+    atual = {
+        'momento': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'escalas': {},
+    }
+    print(f"{'escala':>8} {'registros':>10} {'etapa':<30} {'melhor (ms)':>12} {'mediana (ms)':>13}")
+    for escala in args.escalas:
+        resultado = medir_escala(ESCALAS[escala], args.repeticoes)
+        atual['escalas'][escala] = resultado
+        for nome_etapa, medida in resultado['etapas'].items():
+            print(f"{escala:>8} {resultado['registros']:>10,} {nome_etapa:<30} {medida['melhor_ms']:>12.1f} "
+                  f"{medida['mediana_ms']:>13.1f}")
+
+    if not args.sem_salvar:
+        os.makedirs(RESULTADOS, exist_ok=True)
+        destino = os.path.join(RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+        with open(destino, 'w', encoding='utf-8') as arquivo:
+            json.dump(atual, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nResultado gravado em {destino}")
+
+    regressoes = []
+    if anterior:
+        with open(anterior, encoding='utf-8') as arquivo:
+            print(f"Comparando com {anterior}")
+            regressoes = comparar(atual, json.load(arquivo), args.limite)
+    return 1 if args.falhar and regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
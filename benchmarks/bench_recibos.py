@@ -0,0 +1,70 @@
+"""Benchmark da geração de recibos em lote (gerar_recibos_zip)
+
+Monta atendimentos realizados com N_RECIBOS pares (técnico, semana) a partir
+da pasta sintética (abas repetidas como semanas diferentes), calcula os
+pagamentos como o app e gera o ZIP com todos os recibos em um único
+processo e com o padrão de gerar_recibos_zip (pool de processos só a partir
+de RECIBOS_POR_PROCESSO recibos por processo), medindo recibos por segundo.
+Também mede um lote pequeno, de LOTE_PEQUENO recibos, em que o padrão não
+pode pagar a partida dos processos do pool.
+
+Uso: python benchmarks/bench_recibos.py [N_RECIBOS]
+"""
+import os
+import sys
+import tempfile
+import zipfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agregacoes import analisar
+from gerador_planilhas import gerar_pasta
+from planilhas import otimizar_tipos, process_spreadsheet
+from recibos import RECIBOS_POR_PROCESSO, gerar_recibos_zip, pares_tecnico_semana
+
+N_RECIBOS = 1_000
+LOTE_PEQUENO = 10
+TECNICOS = 50
+
+
+def gerar_atendimentos(n_recibos=N_RECIBOS):
+    base = process_spreadsheet(gerar_pasta(4, tecnicos=TECNICOS))
+    pares_por_copia = base.groupby(['Nome', 'Semana'], observed=True).ngroups
+    copias = []
+    for i in range(-(-n_recibos // pares_por_copia)):
+        copia = base.copy()
+        copia['Semana'] = copia['Semana'].astype(str) + f" #{i}"
+        copias.append(copia)
+    data = otimizar_tipos(pd.concat(copias, ignore_index=True))
+    completed_services = analisar(data)['completed_services']
+    # Exatamente n_recibos pares
+    pares = completed_services[['Nome', 'Semana']].drop_duplicates().head(n_recibos)
+    return completed_services.merge(pares, on=['Nome', 'Semana'])
+
+
+def main():
+    n_recibos = int(sys.argv[1]) if len(sys.argv) > 1 else N_RECIBOS
+    print(f"{os.cpu_count()} CPUs, pool a partir de {RECIBOS_POR_PROCESSO} recibos por processo")
+    for lote in (LOTE_PEQUENO, n_recibos):
+        completed_services = gerar_atendimentos(lote)
+        esperados = len(pares_tecnico_semana(completed_services))
+        print(f"{len(completed_services):,} atendimentos, {esperados} recibos")
+
+        for nome, max_processos in (('1 processo', 1), ('padrão', None)):
+            with tempfile.TemporaryFile() as arquivo:
+                resultado = gerar_recibos_zip(completed_services, arquivo, max_processos=max_processos)
+                tamanho = arquivo.tell()
+                arquivo.seek(0)
+                with zipfile.ZipFile(arquivo) as arquivo_zip:
+                    nomes = arquivo_zip.namelist()
+                    assert len(nomes) == esperados == len(set(nomes))
+                    assert all(arquivo_zip.read(n).startswith(b'%PDF') for n in nomes[:10])
+            print(f"  {nome:<16} {resultado['segundos']:>7.2f} s  {resultado['por_segundo']:>7.1f} recibos/s  "
+                  f"ZIP {tamanho / 2 ** 20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark do rerun do dashboard com todas as seções x seções sob demanda
+
+Para históricos com cada vez mais semanas, mede o que um rerun depois de uma
+mudança de filtro fazia antes (todas as tabelas e as sete figuras montadas e
+serializadas para o navegador) e o que faz agora: só as métricas gerais na
+primeira pintura, e as figuras de uma seção aberta vindas da memória da
+sessão nos reruns seguintes com os mesmos filtros.
+
+Uso: python benchmarks/bench_secoes.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agregacoes import MEDIDAS_CUBO, resumo_pagamentos
+from bench_exibicao import ESCALAS, gerar_analise, tabelas
+from graficos import (figura_atendimentos_tecnico, figura_dias, figura_evolucao, figura_gorjetas_tecnico,
+                      figura_pagamento_semanal, figura_total_pagamentos, figura_usos_pagamentos)
+from medicao import medir
+from planilhas import FORMAS_PAGAMENTO_VALIDAS
+
+
+def figuras(analise, semanal, tecnicos, dias):
+    pagamentos = resumo_pagamentos(analise['cubo'], FORMAS_PAGAMENTO_VALIDAS)
+    return [figura_evolucao(semanal), figura_pagamento_semanal(semanal), figura_atendimentos_tecnico(tecnicos),
+            figura_gorjetas_tecnico(tecnicos), figura_total_pagamentos(pagamentos),
+            figura_usos_pagamentos(pagamentos), figura_dias(dias)]
+
+
+def rerun_completo(analise):
+    """Todas as seções: tabelas, figuras e a serialização de cada figura"""
+    semanal, tecnicos, _, dias = tabelas(analise)
+    return sum(len(fig.to_json()) for fig in figuras(analise, semanal, tecnicos, dias))
+
+
+def primeira_pintura(analise):
+    """Só as métricas gerais"""
+    return analise['cubo'][MEDIDAS_CUBO].sum()
+
+
+def main():
+    print(f"{'semanas':>8} {'todas as seções (ms)':>21} {'figuras (KB)':>13} {'métricas (ms)':>14} "
+          f"{'seção memorizada (ms)':>22}")
+    for semanas in ESCALAS:
+        analise = gerar_analise(semanas)
+        t_completo, tamanho = medir(lambda: rerun_completo(analise))
+        t_metricas, _ = medir(lambda: primeira_pintura(analise))
+        # Seção de evolução aberta: as figuras já estão na memória, resta serializá-las
+        memoria = {'fig_evolucao': figura_evolucao(analise['weekly_totals'])}
+        t_memorizada, _ = medir(lambda: len(memoria['fig_evolucao'].to_json()))
+        print(f"{semanas:>8} {t_completo * 1000:>21.1f} {tamanho / 1024:>13.0f} "
+              f"{t_metricas * 1000:>14.2f} {t_memorizada * 1000:>22.1f}")
+
+
+if __name__ == '__main__':
+    main()
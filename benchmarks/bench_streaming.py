@@ -0,0 +1,52 @@
+"""Benchmark de memória e paridade da leitura em streaming
+
+Compara process_spreadsheet (pd.read_excel por aba) com
+process_spreadsheet_streaming (openpyxl read_only, um bloco de técnico por
+vez) em pastas sintéticas com abas pesadas e casos de borda, medindo tempo
+e, em uma execução separada, pico de memória alocada (tracemalloc).
+
+Uso: python benchmarks/bench_streaming.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_planilhas import comparar
+from gerador_planilhas import gerar_pasta
+from medicao import medir, pico_memoria
+from planilhas import process_spreadsheet, process_spreadsheet_streaming
+
+ESCALAS_ABAS = [1, 4]
+TECNICOS_POR_ABA = 60
+# Por técnico e aba: ~60 linhas de atendimentos em cada dia
+ATENDIMENTOS = 210
+NAO_REALIZADOS = 40
+CLIENTES_INVALIDOS = 8
+
+
+def medir_memoria(func, arquivo):
+    def ler():
+        arquivo.seek(0)
+        return func(arquivo)
+
+    segundos, resultado = medir(ler, repeticoes=1)
+    pico, _ = pico_memoria(ler)
+    return segundos, pico / 1024 / 1024, resultado
+
+
+def main():
+    print(f"{'abas':>6} {'registros':>10} {'read_excel (s)':>15} {'pico (MB)':>10} "
+          f"{'streaming (s)':>14} {'pico (MB)':>10}")
+    for n_abas in ESCALAS_ABAS:
+        pasta = gerar_pasta(n_abas, TECNICOS_POR_ABA, ATENDIMENTOS, NAO_REALIZADOS, CLIENTES_INVALIDOS,
+                            casos_de_borda=True)
+        t_ref, pico_ref, referencia = medir_memoria(process_spreadsheet, pasta)
+        t_str, pico_str, streaming = medir_memoria(process_spreadsheet_streaming, pasta)
+        comparar(streaming.reset_index(drop=True), referencia.reset_index(drop=True))
+        print(f"{n_abas:>6} {len(streaming):>10,} {t_ref:>15.3f} {pico_ref:>10.1f} {t_str:>14.3f} {pico_str:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark da tabela de detalhes do recibo: iterrows célula a célula x desenhar_tabela
+
+Desenha a tabela SERVICE DETAILS de recibos com cada vez mais atendimentos
+com a versão anterior (iterrows, formatação e corte de texto por célula) e
+com as colunas formatadas de uma vez e desenhar_tabela, e mede também o
+recibo completo com create_tech_payment_receipt.
+
+Uso: python benchmarks/bench_tabela_pdf.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from medicao import medir
+from recibos import create_tech_payment_receipt
+from tabela_pdf import DIAS_INGLES, desenhar_tabela, dias_em_ingles, formatar_moeda, truncar
+
+ESCALAS = [100, 1_000, 10_000]
+COLUNAS = [("Date", 25, ''), ("Day", 25, ''), ("Customer", 60, ''), ("Service", 25, 'R'), ("Tips", 25, 'R'),
+           ("Payment", 25, '')]
+
+
+def gerar_atendimentos(n, seed=0):
+    """Atendimentos realizados de um técnico em uma semana"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Nome': 'Tech 01',
+        'Semana': 'WEEK 1',
+        'Data': pd.Timestamp('2024-01-07') + pd.to_timedelta(rng.integers(0, 7, n), unit='D'),
+        'Dia': pd.Categorical(rng.choice(list(DIAS_INGLES), n)),
+        'Cliente': [f"Cliente com nome comprido {i}" if i % 3 else f"Cliente {i}" for i in range(n)],
+        'Serviço': rng.choice([150.0, 199.0, 249.0, 299.0], n),
+        'Gorjeta': np.where(rng.random(n) < 0.3, 20.0, 0.0),
+        'Pagamento': pd.Categorical(np.where(rng.random(n) < 0.9, 'Zelle', None)),
+        'Pagamento Tecnico': 50.0,
+    }).sort_values(['Data', 'Dia'])
+
+
+def novo_pdf():
+    pdf = FPDF(orientation='P', unit='mm', format='A4')
+    pdf.add_page()
+    return pdf
+
+
+def tabela_iterrows(pdf, dados):
+    """Tabela de detalhes como era desenhada antes de desenhar_tabela"""
+    def format_value(value):
+        return f"${value:,.2f}" if isinstance(value, (int, float)) else str(value)
+
+    widths = [c[1] for c in COLUNAS]
+    pdf.set_font("Arial", 'B', 7)
+    for (header, width, _) in COLUNAS:
+        pdf.cell(width, 6, txt=header, border=1, align='C')
+    pdf.ln()
+    pdf.set_font("Arial", size=7)
+    for _, row in dados.iterrows():
+        if pdf.get_y() > pdf.h - 20:
+            pdf.add_page()
+            pdf.set_y(30)
+        pdf.cell(widths[0], 6, txt=row['Data'].strftime('%d/%m'), border=1)
+        pdf.cell(widths[1], 6, txt=DIAS_INGLES.get(row['Dia'], row['Dia']), border=1)
+        client_name = str(row['Cliente'])[:20] + '...' if len(str(row['Cliente'])) > 20 else str(row['Cliente'])
+        pdf.cell(widths[2], 6, txt=client_name, border=1)
+        pdf.cell(widths[3], 6, txt=format_value(row['Serviço']), border=1, align='R')
+        pdf.cell(widths[4], 6, txt=format_value(row['Gorjeta']), border=1, align='R')
+        payment = str(row['Pagamento']) if pd.notna(row['Pagamento']) else "-"
+        pdf.cell(widths[5], 6, txt=payment[:12], border=1)
+        pdf.ln()
+
+
+def tabela_colunas(pdf, dados):
+    pagamentos = dados['Pagamento'].astype(object).where(dados['Pagamento'].notna(), '-')
+    desenhar_tabela(pdf, COLUNAS,
+                    zip(dados['Data'].dt.strftime('%d/%m').tolist(), dias_em_ingles(dados['Dia']),
+                        truncar(dados['Cliente'], 20), formatar_moeda(dados['Serviço']),
+                        formatar_moeda(dados['Gorjeta']), truncar(pagamentos, 12, reticencias=False)),
+                    topo=30)
+
+
+def main():
+    print(f"{'atendimentos':>12} {'iterrows (ms)':>14} {'colunas (ms)':>13} {'ganho':>7} {'recibo (ms)':>12}")
+    for n in ESCALAS:
+        dados = gerar_atendimentos(n)
+        t_antigo, _ = medir(lambda: tabela_iterrows(novo_pdf(), dados))
+        t_novo, _ = medir(lambda: tabela_colunas(novo_pdf(), dados))
+        t_recibo, _ = medir(lambda: create_tech_payment_receipt(dados, 'Tech 01', 'WEEK 1').output(dest='S'))
+        print(f"{n:>12,} {t_antigo * 1000:>14.1f} {t_novo * 1000:>13.1f} {t_antigo / t_novo:>6.1f}x "
+              f"{t_recibo * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
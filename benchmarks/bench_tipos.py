@@ -0,0 +1,60 @@
+"""Benchmark de memória e velocidade dos tipos compactos dos registros
+
+Replica os registros de uma pasta sintética até N linhas e compara a versão
+com colunas de texto (object) com a saída de otimizar_tipos: memória
+ocupada, filtros isin e agrupamentos usados pelo dashboard.
+
+Uso: python benchmarks/bench_tipos.py
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_pasta
+from medicao import medir
+from planilhas import COLUNAS_CATEGORICAS, otimizar_tipos, process_spreadsheet
+
+ESCALAS = [100_000, 1_000_000]
+
+
+def sem_otimizacao(df):
+    """Registros como eram antes de otimizar_tipos (texto e valores mistos em object)"""
+    df = df.copy()
+    for coluna in COLUNAS_CATEGORICAS + ['Cliente', 'ID Pagamento', 'Verificado', 'Pets']:
+        df[coluna] = df[coluna].astype(object)
+    return df
+
+
+def operacoes(df):
+    semanas = list(df['Semana'].unique()[:2])
+    nomes = list(df['Nome'].unique()[:10])
+    return {
+        'isin Semana/Nome (ms)': lambda: df[df['Semana'].isin(semanas) & df['Nome'].isin(nomes)],
+        'groupby Nome/Semana/Categoria (ms)': lambda: df.groupby(
+            ['Nome', 'Semana', 'Categoria'], observed=True).agg({'Serviço': 'sum', 'Gorjeta': 'sum'}),
+        'groupby Pagamento (ms)': lambda: df.groupby('Pagamento', observed=True)['Serviço'].sum(),
+    }
+
+
+def main():
+    base = process_spreadsheet(gerar_pasta(4))
+    for n in ESCALAS:
+        repeticoes = -(-n // len(base))
+        otimizado = otimizar_tipos(pd.concat([base] * repeticoes, ignore_index=True).head(n))
+        original = sem_otimizacao(otimizado)
+        mb_original = original.memory_usage(deep=True).sum() / 2 ** 20
+        mb_otimizado = otimizado.memory_usage(deep=True).sum() / 2 ** 20
+        print(f"{n:,} linhas: {mb_original:.1f} MB -> {mb_otimizado:.1f} MB ({mb_original / mb_otimizado:.1f}x)")
+        ops_original, ops_otimizado = operacoes(original), operacoes(otimizado)
+        for nome in ops_original:
+            t_orig, _ = medir(ops_original[nome], repeticoes=5)
+            t_otim, _ = medir(ops_otimizado[nome], repeticoes=5)
+            print(f"  {nome:<38} {t_orig * 1000:>9.1f} {t_otim * 1000:>9.1f} ({t_orig / t_otim:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
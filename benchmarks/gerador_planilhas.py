@@ -0,0 +1,175 @@
+"""Gerador de pastas de trabalho sintéticas no layout das abas WEEK, usado por todos os benchmarks
+
+Cada aba tem, por técnico, a linha NAME:/CATEGORY:/From:, a linha de
+cabeçalho Schedule/DATE/SERVICE/TIP/PETS/PAYMENT/ID/OK repetida nas sete
+janelas de 9 colunas (COLUNAS_DIAS) e as linhas de atendimentos, fechadas
+pela linha de totais SERVICES IN:. As quantidades são exatas: cada técnico
+recebe, em cada aba, `atendimentos` atendimentos realizados,
+`nao_realizados` clientes sem valor de serviço e `clientes_invalidos`
+células com textos de INVALID_CLIENTS, espalhados pelos dias da semana.
+
+Com casos_de_borda=True a aba também traz o que as planilhas reais têm de
+irregular, para as verificações de paridade dos parsers: blocos de técnico
+sem linha de cabeçalho (ignorados), técnicos sem From:, serviço em branco,
+' ' ou 'nan' nos não realizados, uma célula por técnico com serviço não
+numérico (descartada), clientes só com espaços, valores numéricos gravados
+como texto, formas de pagamento fora da lista e colunas opcionais vazias.
+
+Uso: python benchmarks/gerador_planilhas.py SAIDA [--arquivos N] [--abas N] [--tecnicos N]
+     [--atendimentos N] [--nao-realizados N] [--clientes-invalidos N] [--casos-de-borda] [--seed N]
+"""
+import argparse
+import os
+import sys
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pagamentos import REGRAS_PAGAMENTO
+from planilhas import COLUNAS_DIAS, FORMAS_PAGAMENTO_VALIDAS, INVALID_CLIENTS
+
+# Padrões por técnico e aba: densidade parecida com a de uma semana real cheia
+TECNICOS = 40
+ATENDIMENTOS = 42
+NAO_REALIZADOS = 8
+CLIENTES_INVALIDOS = 2
+
+LARGURA = COLUNAS_DIAS[-1][1] + 1
+CABECALHO_DIA = ['Schedule', 'DATE', 'SERVICE', 'TIP', 'PETS', 'PAYMENT', 'ID', 'OK']
+CATEGORIAS = list(REGRAS_PAGAMENTO)
+CIDADES = ['Orlando', 'Tampa', 'Miami', 'Jacksonville']
+VALORES_SERVICO = [150.0, 199.0, 249.0, 299.0, 349.0]
+INICIO = pd.Timestamp('2024-01-07')
+
+# Tipos de célula de atendimento
+REALIZADO, NAO_REALIZADO, INVALIDO, DESCARTADO = 0, 1, 2, 3
+
+
+def _sem_cabecalho(t):
+    """Técnicos cujo bloco não tem linha de cabeçalho nos casos de borda"""
+    return t % 17 == 5
+
+
+def _celula(tipo, rng, cliente, data, casos_de_borda):
+    """Conteúdo das colunas de uma célula de dia"""
+    if tipo == INVALIDO:
+        clientes = INVALID_CLIENTS + ['  '] if casos_de_borda else INVALID_CLIENTS
+        return [clientes[rng.integers(len(clientes))], data, rng.choice(VALORES_SERVICO)]
+    if tipo == NAO_REALIZADO:
+        return [cliente, data, rng.choice([np.nan, ' ', 'nan']) if casos_de_borda else np.nan]
+    if tipo == DESCARTADO:
+        return [cliente, data, 'abc']
+    if casos_de_borda:
+        return [cliente, data, rng.choice([150, 199.0, '249']), rng.choice([np.nan, 10, 20.5]),
+                rng.choice([np.nan, 1, 2]), rng.choice(FORMAS_PAGAMENTO_VALIDAS + ['Venmo', np.nan]),
+                rng.choice([np.nan, 'A1B2']), rng.choice([np.nan, True])]
+    pagamento = FORMAS_PAGAMENTO_VALIDAS[rng.integers(len(FORMAS_PAGAMENTO_VALIDAS))] if rng.random() < 0.9 \
+        else np.nan
+    return [cliente, data, rng.choice(VALORES_SERVICO),
+            rng.choice([10.0, 20.0, 25.0]) if rng.random() < 0.3 else np.nan,
+            int(rng.integers(1, 4)), pagamento,
+            f"ID{rng.integers(10 ** 6):06d}" if pd.notna(pagamento) else np.nan,
+            bool(rng.random() < 0.8)]
+
+
+def gerar_aba(tecnicos=TECNICOS, atendimentos=ATENDIMENTOS, nao_realizados=NAO_REALIZADOS,
+              clientes_invalidos=CLIENTES_INVALIDOS, inicio_semana=INICIO, seed=0, casos_de_borda=False):
+    """Aba WEEK sintética como o pd.read_excel(header=None) a leria
+
+    Os atendimentos de cada técnico são sorteados entre os sete dias e
+    empilhados nas linhas abaixo do cabeçalho; as células que sobram ficam
+    vazias, como nas planilhas reais.
+    """
+    rng = np.random.default_rng(seed)
+    linhas = [[np.nan] * LARGURA, ['BNS WEEKLY REPORT'] + [np.nan] * (LARGURA - 1)]
+    cabecalho = [np.nan] * LARGURA
+    for inicio, _ in COLUNAS_DIAS:
+        cabecalho[inicio:inicio + len(CABECALHO_DIA)] = CABECALHO_DIA
+    quantidades = [atendimentos, nao_realizados, clientes_invalidos, 1 if casos_de_borda else 0]
+    tipos_base = np.repeat([REALIZADO, NAO_REALIZADO, INVALIDO, DESCARTADO], quantidades)
+
+    for t in range(tecnicos):
+        nome = [np.nan] * LARGURA
+        nome[1:7] = ['NAME:', f"Tech {t:03d}", 'CATEGORY:', CATEGORIAS[t % len(CATEGORIAS)],
+                     np.nan if casos_de_borda and t % 2 == 0 else 'From:', CIDADES[t % len(CIDADES)]]
+        linhas.append(nome)
+        if casos_de_borda and _sem_cabecalho(t):
+            # Bloco sem cabeçalho: deve ser ignorado
+            linhas.append(['x'] * LARGURA)
+            continue
+        linhas.append(list(cabecalho))
+
+        tipos = rng.permutation(tipos_base)
+        dias = rng.integers(0, len(COLUNAS_DIAS), len(tipos))
+        por_dia = [tipos[dias == d] for d in range(len(COLUNAS_DIAS))]
+        n_linhas = max((len(p) for p in por_dia), default=0)
+        bloco = [[np.nan] * LARGURA for _ in range(n_linhas)]
+        for d, ((inicio, _), tipos_dia) in enumerate(zip(COLUNAS_DIAS, por_dia)):
+            data = inicio_semana + pd.Timedelta(days=d)
+            for r, tipo in enumerate(tipos_dia):
+                celula = _celula(tipo, rng, f"Client {t:03d}-{d}-{r}", data, casos_de_borda)
+                bloco[r][inicio:inicio + len(celula)] = celula
+        linhas.extend(bloco)
+
+        totais = [np.nan] * LARGURA
+        totais[1] = 'SERVICES IN:'
+        totais[3] = float(atendimentos)
+        linhas.append(totais)
+    return pd.DataFrame(linhas, dtype=object)
+
+
+def gerar_pasta(abas, tecnicos=TECNICOS, atendimentos=ATENDIMENTOS, nao_realizados=NAO_REALIZADOS,
+                clientes_invalidos=CLIENTES_INVALIDOS, seed=0, destino=None, casos_de_borda=False):
+    """Grava um .xlsx com uma aba RESUMO (ignorada pelo parser) e abas WEEK 1..abas
+
+    destino pode ser um caminho ou arquivo aberto; sem destino a pasta é
+    gerada em um BytesIO, retornado já no início.
+    """
+    arquivo = BytesIO() if destino is None else destino
+    with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
+        pd.DataFrame([['resumo']]).to_excel(writer, sheet_name='RESUMO', header=False, index=False)
+        for i in range(abas):
+            aba = gerar_aba(tecnicos, atendimentos, nao_realizados, clientes_invalidos,
+                            INICIO + pd.Timedelta(weeks=i), seed=seed + i, casos_de_borda=casos_de_borda)
+            aba.to_excel(writer, sheet_name=f"WEEK {i + 1}", header=False, index=False)
+    if destino is None:
+        arquivo.seek(0)
+    return arquivo
+
+
+def contagens_esperadas(abas, tecnicos=TECNICOS, atendimentos=ATENDIMENTOS, nao_realizados=NAO_REALIZADOS,
+                        clientes_invalidos=CLIENTES_INVALIDOS, casos_de_borda=False):
+    """Registros que process_spreadsheet deve extrair de uma pasta gerada com esses parâmetros"""
+    com_cabecalho = sum(not (casos_de_borda and _sem_cabecalho(t)) for t in range(tecnicos))
+    return {'realizados': abas * com_cabecalho * atendimentos, 'nao_realizados': abas * com_cabecalho * nao_realizados}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera pastas de trabalho sintéticas no layout das abas WEEK")
+    parser.add_argument('saida', help="Diretório onde gravar as planilhas .xlsx")
+    parser.add_argument('--arquivos', type=int, default=1, help="Quantidade de planilhas")
+    parser.add_argument('--abas', type=int, default=4, help="Abas WEEK por planilha")
+    parser.add_argument('--tecnicos', type=int, default=TECNICOS, help="Técnicos por aba")
+    parser.add_argument('--atendimentos', type=int, default=ATENDIMENTOS,
+                        help="Atendimentos realizados por técnico e aba")
+    parser.add_argument('--nao-realizados', type=int, default=NAO_REALIZADOS,
+                        help="Clientes sem serviço por técnico e aba")
+    parser.add_argument('--clientes-invalidos', type=int, default=CLIENTES_INVALIDOS,
+                        help="Células com textos de totais por técnico e aba")
+    parser.add_argument('--casos-de-borda', action='store_true', help="Inclui as irregularidades do layout")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.saida, exist_ok=True)
+    for i in range(args.arquivos):
+        caminho = os.path.join(args.saida, f"planilha_{i + 1:03d}.xlsx")
+        gerar_pasta(args.abas, args.tecnicos, args.atendimentos, args.nao_realizados, args.clientes_invalidos,
+                    seed=args.seed + i * args.abas, destino=caminho, casos_de_borda=args.casos_de_borda)
+        print(caminho)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Medição de tempo e memória compartilhada pelos benchmarks"""
+import time
+import tracemalloc
+
+
+def tempos(func, *args, repeticoes=3, **kwargs):
+    """Tempo, em segundos, de cada uma de repeticoes execuções de func(*args, **kwargs) e o resultado da última"""
+    medidos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func(*args, **kwargs)
+        medidos.append(time.perf_counter() - inicio)
+    return medidos, resultado
+
+
+def medir(func, *args, repeticoes=3, **kwargs):
+    """Melhor tempo, em segundos, de repeticoes execuções de func(*args, **kwargs) e o resultado da última"""
+    medidos, resultado = tempos(func, *args, repeticoes=repeticoes, **kwargs)
+    return min(medidos), resultado
+
+
+def pico_memoria(func, *args, **kwargs):
+    """Pico de memória alocada pelo Python (tracemalloc, em bytes) em uma execução de func e o resultado
+
+    Medida em uma execução própria: com o tracemalloc ativo tudo fica mais
+    lento, então o tempo deve vir de medir.
+    """
+    tracemalloc.start()
+    try:
+        resultado = func(*args, **kwargs)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico, resultado
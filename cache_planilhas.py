@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from io import BytesIO
+
+import pandas as pd
+
+from planilhas import VERSAO_PARSER, ler_conteudo, process_spreadsheet
+
+
+class CachePlanilhas:
+    """Cache dos dados processados de cada planilha, indexado pelo conteúdo do arquivo
+
+    A chave é o hash SHA-256 dos bytes da planilha junto com VERSAO_PARSER,
+    então qualquer alteração no arquivo ou no parser invalida a entrada.
+    Há um nível em memória (LRU com max_itens entradas) e, se diretorio for
+    informado, um nível em disco limitado a max_bytes_disco, que descarta
+    primeiro os arquivos usados há mais tempo.
+
+    A instância é compartilhada entre as sessões (st.cache_resource) e pode
+    ser usada por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, max_itens=32, diretorio=None, max_bytes_disco=512 * 1024 * 1024):
+        self.max_itens = max_itens
+        self.diretorio = diretorio
+        self.max_bytes_disco = max_bytes_disco
+        self.memoria = OrderedDict()
+        self.estatisticas = {'acertos_memoria': 0, 'acertos_disco': 0, 'falhas': 0}
+        # Protege o nível em memória e as estatísticas; leitura e gravação em disco correm fora dela
+        self._trava = threading.Lock()
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    @staticmethod
+    def chave(conteudo):
+        """Hash do conteúdo da planilha mais a versão do parser"""
+        return hashlib.sha256(VERSAO_PARSER.encode() + b'\0' + conteudo).hexdigest()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.pkl")
+
+    def obter(self, chave):
+        """Retorna o DataFrame guardado ou None"""
+        with self._trava:
+            df = self.memoria.get(chave)
+            if df is not None:
+                self.memoria.move_to_end(chave)
+                self.estatisticas['acertos_memoria'] += 1
+                return df
+
+        if self.diretorio and os.path.exists(self._caminho(chave)):
+            try:
+                df = pd.read_pickle(self._caminho(chave))
+                os.utime(self._caminho(chave))
+            except FileNotFoundError:
+                # Descartado por outra thread entre a verificação e a leitura
+                df = None
+            except Exception:
+                # Arquivo corrompido ou de outra versão do pandas: descarta
+                with suppress(FileNotFoundError):
+                    os.remove(self._caminho(chave))
+                df = None
+            if df is not None:
+                with self._trava:
+                    self._guardar_memoria(chave, df)
+                    self.estatisticas['acertos_disco'] += 1
+                return df
+
+        with self._trava:
+            self.estatisticas['falhas'] += 1
+        return None
+
+    def guardar(self, chave, df):
+        with self._trava:
+            self._guardar_memoria(chave, df)
+        if self.diretorio:
+            # Temporário próprio de cada thread: duas sessões podem gravar a mesma chave juntas
+            temporario = f"{self._caminho(chave)}.{os.getpid()}-{threading.get_ident()}.tmp"
+            df.to_pickle(temporario)
+            os.replace(temporario, self._caminho(chave))
+            self._limitar_disco()
+
+    def _guardar_memoria(self, chave, df):
+        # Chamada com self._trava adquirida
+        self.memoria[chave] = df
+        self.memoria.move_to_end(chave)
+        while len(self.memoria) > self.max_itens:
+            self.memoria.popitem(last=False)
+
+    def _limitar_disco(self):
+        """Remove os arquivos menos usados até o diretório caber no limite"""
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith('.pkl'):
+                # Arquivos removidos por outra thread no meio da varredura são ignorados
+                with suppress(FileNotFoundError):
+                    info = os.stat(os.path.join(self.diretorio, nome))
+                    arquivos.append((info.st_mtime, info.st_size, nome))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, nome in sorted(arquivos):
+            if total <= self.max_bytes_disco:
+                break
+            with suppress(FileNotFoundError):
+                os.remove(os.path.join(self.diretorio, nome))
+            total -= tamanho
+
+    def processar(self, file, leitor=process_spreadsheet):
+        """Processa a planilha com leitor, a menos que o mesmo conteúdo já esteja no cache"""
+        conteudo = ler_conteudo(file)
+        chave = self.chave(conteudo)
+        df = self.obter(chave)
+        if df is None:
+            df = leitor(BytesIO(conteudo))
+            self.guardar(chave, df)
+        return df
@@ -0,0 +1,165 @@
+import contextvars
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from instrumentacao import etapa
+
+# Downloads simultâneos em baixar_varias (e conexões mantidas no pool da sessão)
+MAX_DOWNLOADS_SIMULTANEOS = 8
+
+# Respostas HTTP que indicam falha passageira do servidor e valem nova tentativa
+STATUS_REPETIR = {408, 425, 429, 500, 502, 503, 504}
+
+
+class BaixadorPlanilhas:
+    """Download de planilhas por URL com sessão reaproveitada e cache de respostas
+
+    As conexões ficam em um pool de uma requests.Session e o corpo da
+    resposta é baixado em blocos de tamanho_bloco bytes, juntados uma única
+    vez no final. Cada resposta fica em cache por ttl segundos; depois disso
+    a URL é revalidada com If-None-Match / If-Modified-Since, e uma resposta
+    304 reaproveita o conteúdo guardado. O cache descarta as URLs usadas há
+    mais tempo quando passa de max_bytes.
+
+    timeout (conexão, leitura) vale para cada requisição. Falhas de conexão,
+    timeouts e respostas de STATUS_REPETIR são repetidas até tentativas
+    vezes, esperando espera_base * 2^n segundos (com variação aleatória)
+    entre elas. A instância pode ser usada por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, ttl=300, max_bytes=256 * 1024 * 1024, timeout=(10, 60), session=None,
+                 tamanho_bloco=1024 * 1024, tentativas=3, espera_base=0.5):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.tamanho_bloco = tamanho_bloco
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.session = session or self._criar_sessao()
+        self.respostas = OrderedDict()
+        self.estatisticas = {'em_cache': 0, 'revalidadas': 0, 'baixadas': 0, 'repetidas': 0}
+        # Protege o cache e as estatísticas; os downloads em si correm fora dela
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def _criar_sessao():
+        # requests só é carregado quando a primeira URL é baixada
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=MAX_DOWNLOADS_SIMULTANEOS, pool_maxsize=MAX_DOWNLOADS_SIMULTANEOS)
+        session.mount('http://', adaptador)
+        session.mount('https://', adaptador)
+        return session
+
+    def baixar(self, url):
+        """Retorna o conteúdo da URL, do cache quando possível"""
+        with self._trava:
+            entrada = self.respostas.get(url)
+            if entrada is not None:
+                self.respostas.move_to_end(url)
+                if time.monotonic() - entrada['obtida_em'] < self.ttl:
+                    self.estatisticas['em_cache'] += 1
+                    return entrada['conteudo']
+
+        cabecalhos = {}
+        if entrada is not None:
+            if entrada['etag']:
+                cabecalhos['If-None-Match'] = entrada['etag']
+            if entrada['last_modified']:
+                cabecalhos['If-Modified-Since'] = entrada['last_modified']
+
+        for tentativa in range(self.tentativas):
+            try:
+                resposta = self._requisitar(url, cabecalhos)
+                break
+            except Exception as e:
+                if tentativa == self.tentativas - 1 or not self._pode_repetir(e):
+                    raise
+                with self._trava:
+                    self.estatisticas['repetidas'] += 1
+                time.sleep(self.espera_base * 2 ** tentativa * random.uniform(0.5, 1.5))
+
+        with self._trava:
+            if resposta is None:
+                entrada['obtida_em'] = time.monotonic()
+                self.estatisticas['revalidadas'] += 1
+                return entrada['conteudo']
+            conteudo, etag, last_modified = resposta
+            self.estatisticas['baixadas'] += 1
+            self.respostas[url] = {'conteudo': conteudo, 'etag': etag, 'last_modified': last_modified,
+                                   'obtida_em': time.monotonic()}
+            self.respostas.move_to_end(url)
+            self._limitar_tamanho()
+        return conteudo
+
+    def _requisitar(self, url, cabecalhos):
+        """Uma requisição: None para 304, senão (conteúdo, ETag, Last-Modified)"""
+        with self.session.get(url, headers=cabecalhos, stream=True, timeout=self.timeout) as resposta:
+            if resposta.status_code == 304 and cabecalhos:
+                return None
+            resposta.raise_for_status()
+            conteudo = b''.join(resposta.iter_content(chunk_size=self.tamanho_bloco))
+            return conteudo, resposta.headers.get('ETag'), resposta.headers.get('Last-Modified')
+
+    @staticmethod
+    def _pode_repetir(erro):
+        import requests
+
+        if isinstance(erro, requests.HTTPError):
+            return erro.response is not None and erro.response.status_code in STATUS_REPETIR
+        return isinstance(erro, (requests.ConnectionError, requests.Timeout))
+
+    def baixar_varias(self, urls, max_simultaneos=MAX_DOWNLOADS_SIMULTANEOS):
+        """Baixa várias URLs ao mesmo tempo e gera (url, conteúdo, erro) à medida que cada uma termina
+
+        No máximo max_simultaneos downloads correm juntos, em threads; quem
+        consome o gerador já pode ler uma planilha enquanto as demais ainda
+        estão sendo baixadas, de modo que o tempo total fica próximo ao do
+        download mais lento. URLs repetidas são baixadas uma vez. Um download
+        que falha depois de todas as tentativas vem com conteúdo None e o erro
+        em texto, sem interromper os demais.
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return
+
+        def baixar_medido(url):
+            with etapa('fetch', url=url):
+                return self.baixar(url)
+
+        with ThreadPoolExecutor(max_workers=min(max_simultaneos, len(urls))) as pool:
+            # Cada thread roda em uma cópia do contexto, para as etapas irem para a coleta ativa
+            futuros = {pool.submit(contextvars.copy_context().run, baixar_medido, url): url for url in urls}
+            try:
+                for futuro in as_completed(futuros):
+                    try:
+                        conteudo, erro = futuro.result(), None
+                    except Exception as e:
+                        conteudo, erro = None, f"{type(e).__name__}: {e}"
+                    yield futuros[futuro], conteudo, erro
+            finally:
+                # Consumidor que parou no meio: os downloads que nem começaram são descartados
+                for futuro in futuros:
+                    futuro.cancel()
+
+    def _limitar_tamanho(self):
+        total = sum(len(entrada['conteudo']) for entrada in self.respostas.values())
+        while total > self.max_bytes and len(self.respostas) > 1:
+            _, entrada = self.respostas.popitem(last=False)
+            total -= len(entrada['conteudo'])
+
+
+_baixador_padrao = None
+
+
+def baixador_padrao():
+    """Instância compartilhada usada por ler_conteudo para URLs"""
+    global _baixador_padrao
+    if _baixador_padrao is None:
+        _baixador_padrao = BaixadorPlanilhas()
+    return _baixador_padrao
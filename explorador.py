@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+
+def linhas_encontradas(coluna, texto):
+    """Máscara das linhas cuja coluna contém texto, sem diferenciar maiúsculas
+
+    Em colunas categóricas a busca é feita nas categorias e levada às linhas
+    pelos códigos, sem converter cada linha em texto.
+    """
+    if isinstance(coluna.dtype, pd.CategoricalDtype):
+        categorias = coluna.cat.categories.astype(str).str.contains(texto, case=False, regex=False)
+        # Código -1 (ausente) cai no False acrescentado no fim
+        return np.append(np.asarray(categorias, dtype=bool), False)[coluna.cat.codes.to_numpy()]
+    encontradas = coluna.astype(str).str.contains(texto, case=False, regex=False, na=False)
+    return (encontradas & coluna.notna()).to_numpy(dtype=bool)
+
+
+def ordem_linhas(data, ordenar_por=None, crescente=True, coluna_busca=None, texto=''):
+    """Posições das linhas de data que contêm texto em coluna_busca, ordenadas por ordenar_por
+
+    Sem texto todas as linhas entram; sem ordenar_por fica a ordem original.
+    A ordenação é estável e deixa os valores ausentes no fim. Colunas object
+    com valores que não se comparam (ex.: 'ID Pagamento' com números e
+    textos) são ordenadas pelo texto dos valores.
+    """
+    posicoes = np.arange(len(data))
+    if texto and coluna_busca:
+        posicoes = np.flatnonzero(linhas_encontradas(data[coluna_busca], texto))
+    if ordenar_por:
+        valores = data[ordenar_por].iloc[posicoes].set_axis(posicoes)
+        try:
+            ordenados = valores.sort_values(ascending=crescente, kind='stable', na_position='last')
+        except TypeError:
+            ordenados = valores.sort_values(ascending=crescente, kind='stable', na_position='last',
+                                            key=lambda serie: serie.astype('string'))
+        posicoes = ordenados.index.to_numpy()
+    return posicoes
+
+
+def fatia(data, posicoes, pagina, tamanho):
+    """Linhas da página (começando em 1) com tamanho linhas, na ordem de posicoes"""
+    inicio = (pagina - 1) * tamanho
+    return data.iloc[posicoes[inicio:inicio + tamanho]]
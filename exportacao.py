@@ -0,0 +1,85 @@
+import gzip
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from instrumentacao import etapa
+
+# formato: (rótulo, tipo MIME, extensão do arquivo)
+FORMATOS_EXPORTACAO = {
+    'csv': ('CSV', 'text/csv', '.csv'),
+    'csv.gz': ('CSV compactado (gzip)', 'application/gzip', '.csv.gz'),
+    'parquet': ('Parquet', 'application/vnd.apache.parquet', '.parquet'),
+}
+
+LINHAS_POR_BLOCO = 50_000
+
+# Exportações até este tamanho ficam em memória; as maiores vão para disco
+MAX_MEMORIA_EXPORTACAO = 32 * 1024 * 1024
+
+
+def _escrever_csv(df, destino, linhas_por_bloco):
+    for inicio in range(0, max(len(df), 1), linhas_por_bloco):
+        bloco = df.iloc[inicio:inicio + linhas_por_bloco]
+        destino.write(bloco.to_csv(index=False, header=inicio == 0).encode('utf-8'))
+
+
+def _schema_parquet(df):
+    """Schema do arquivo inteiro e as colunas object que precisam ser gravadas como texto
+
+    O tipo de cada coluna object vem dos valores de todas as linhas (um bloco
+    vazio ou só com ausentes daria o tipo null, que rejeita os demais
+    blocos). Colunas que misturam números e texto, como 'ID Pagamento' com
+    números de cheque e códigos do Zelle, vão como texto.
+    """
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    como_texto = []
+    for coluna in df.columns[df.dtypes == object]:
+        try:
+            tipo = pa.array(df[coluna], from_pandas=True).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            tipo = pa.string()
+            como_texto.append(coluna)
+        schema = schema.set(schema.get_field_index(coluna), pa.field(coluna, tipo))
+    return schema, como_texto
+
+
+def _escrever_parquet(df, destino, linhas_por_bloco):
+    schema, como_texto = _schema_parquet(df)
+    with pq.ParquetWriter(destino, schema, compression='zstd') as escritor:
+        for inicio in range(0, len(df), linhas_por_bloco):
+            bloco = df.iloc[inicio:inicio + linhas_por_bloco]
+            if como_texto:
+                bloco = bloco.assign(**{coluna: bloco[coluna].astype('string') for coluna in como_texto})
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+
+
+def exportar(df, destino, formato, colunas=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Grava df (ou só colunas, na ordem dada) em destino, um arquivo binário, bloco a bloco
+
+    Cada bloco de linhas é convertido e gravado antes do próximo, então o
+    pico de memória é o de um bloco e não o do arquivo inteiro. formato é uma
+    chave de FORMATOS_EXPORTACAO.
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    if colunas is not None:
+        df = df[list(colunas)]
+
+    with etapa('export', formato=formato, linhas=len(df)):
+        if formato == 'parquet':
+            _escrever_parquet(df, destino, linhas_por_bloco)
+        elif formato == 'csv.gz':
+            with gzip.GzipFile(fileobj=destino, mode='wb', compresslevel=6, mtime=0) as compactado:
+                _escrever_csv(df, compactado, linhas_por_bloco)
+        else:
+            _escrever_csv(df, destino, linhas_por_bloco)
+
+
+def exportar_para_arquivo(df, formato, colunas=None):
+    """Exportação de df em um arquivo temporário (em memória até MAX_MEMORIA_EXPORTACAO), no início"""
+    arquivo = tempfile.SpooledTemporaryFile(max_size=MAX_MEMORIA_EXPORTACAO)
+    exportar(df, arquivo, formato, colunas)
+    arquivo.seek(0)
+    return arquivo
@@ -0,0 +1,198 @@
+import logging
+
+import pandas as pd
+# plotly.express é importado dentro das funções das figuras: só é carregado no primeiro gráfico
+
+logger = logging.getLogger(__name__)
+
+# Orçamento de pontos dos gráficos de histórico: marcadores das linhas e barras
+# agrupadas (cada período das barras é um trace, então o orçamento é menor)
+MAX_PONTOS = 1_500
+MAX_BARRAS = 400
+
+# Técnicos com série própria nos gráficos de histórico; os demais somados em OUTROS
+MAX_TECNICOS = 12
+OUTROS = 'Outros'
+
+# Tamanho máximo da figura serializada enviada ao navegador
+MAX_BYTES_FIGURA = 512 * 1024
+
+# Da mais fina para a mais grossa: (nome, frequência do pandas; None = aba da planilha)
+GRANULARIDADES = [('Semana', None), ('Mês', 'M'), ('Trimestre', 'Q')]
+
+
+def serie_historica(cubo, medida, max_pontos=MAX_PONTOS, max_tecnicos=MAX_TECNICOS):
+    """Soma de medida por período e técnico, na granularidade mais fina que cabe em max_pontos
+
+    Os max_tecnicos com maior total têm série própria e os demais são somados
+    em OUTROS. Os períodos são as semanas (abas) ou os meses/trimestres das
+    datas das células do cubo; células sem data usam a primeira data da sua
+    semana. Retorna (série com as colunas Período, Nome e medida, em ordem
+    cronológica; nome da granularidade usada).
+    """
+    totais = cubo.groupby('Nome', observed=True)[medida].sum().sort_values(ascending=False)
+    nomes = cubo['Nome'].astype(object)
+    if len(totais) > max_tecnicos:
+        nomes = nomes.where(nomes.isin(totais.index[:max_tecnicos]), OUTROS)
+    series = nomes.nunique()
+
+    inicio_semana = cubo.groupby('Semana', observed=True)['Data'].transform('min')
+    datas = cubo['Data'].fillna(inicio_semana)
+    for granularidade, frequencia in GRANULARIDADES:
+        if frequencia is None:
+            periodos, ordem = cubo['Semana'].astype(str), inicio_semana
+        else:
+            periodos, ordem = datas.dt.to_period(frequencia).astype(str), datas
+        if periodos.nunique() * series <= max_pontos:
+            break
+
+    serie = pd.DataFrame({'Período': periodos, 'Nome': nomes, medida: cubo[medida], 'ordem': ordem}).groupby(
+        ['Período', 'Nome'], sort=False).agg({medida: 'sum', 'ordem': 'min'}).reset_index()
+    # Períodos em ordem cronológica; dentro de cada um, a ordem dos totais (OUTROS por último)
+    posicao = {nome: i for i, nome in enumerate(list(totais.index[:max_tecnicos]) + [OUTROS])}
+    serie['ordem'] = serie.groupby('Período', sort=False)['ordem'].transform('min')
+    serie['posicao'] = serie['Nome'].map(posicao)
+    serie = serie.sort_values(['ordem', 'posicao'], na_position='last', kind='stable')
+    return serie[['Período', 'Nome', medida]].reset_index(drop=True), granularidade
+
+
+def figura_limitada(nome, cubo, medida, construir, max_pontos=MAX_PONTOS, max_bytes=MAX_BYTES_FIGURA):
+    """Figura de histórico montada com serie_historica e limitada a max_bytes serializada
+
+    Se a figura passar do limite, o orçamento de pontos e o número de
+    técnicos são reduzidos à metade até caber (ou até restar um técnico por
+    trimestre). O tamanho final é registrado no log, com aviso se o limite
+    não pôde ser respeitado.
+    """
+    max_tecnicos = MAX_TECNICOS
+    while True:
+        serie, granularidade = serie_historica(cubo, medida, max_pontos, max_tecnicos)
+        fig = construir(serie, granularidade)
+        tamanho = len(fig.to_json())
+        if tamanho <= max_bytes or (max_tecnicos == 1 and granularidade == GRANULARIDADES[-1][0]):
+            break
+        max_pontos, max_tecnicos = max_pontos // 2, max(1, max_tecnicos // 2)
+
+    nivel = logging.INFO if tamanho <= max_bytes else logging.WARNING
+    logger.log(nivel, "Figura %s: %d pontos por %s, %d séries, %.0f KB (limite %.0f KB)", nome, len(serie),
+               granularidade.lower(), serie['Nome'].nunique(), tamanho / 1024, max_bytes / 1024)
+    return fig
+
+
+def figura_evolucao(cubo):
+    """Linha de serviços por período de cada técnico (top técnicos e OUTROS)"""
+    def construir(serie, granularidade):
+        import plotly.express as px
+
+        fig = px.line(
+            serie,
+            x='Período',
+            y='Serviço',
+            color='Nome',
+            markers=True,
+            title='Evolução de Serviços por Técnico',
+            labels={'Serviço': 'Valor em Serviços ($)', 'Período': granularidade}
+        )
+        fig.update_traces(hovertemplate="<b>%{x}</b><br>Valor: $%{y:,.2f}")
+        return fig
+
+    return figura_limitada('evolucao', cubo, 'Serviço', construir)
+
+
+def figura_pagamento_semanal(cubo):
+    """Barras agrupadas do pagamento de cada técnico por período (top técnicos e OUTROS)"""
+    def construir(serie, granularidade):
+        import plotly.express as px
+
+        titulo = 'Pagamento Semanal por Técnico' if granularidade == 'Semana' else \
+            f'Pagamento por Técnico e {granularidade}'
+        fig = px.bar(
+            serie,
+            x='Pagamento Tecnico',
+            y='Nome',
+            color='Período',
+            barmode='group',
+            title=titulo,
+            labels={'Pagamento Tecnico': 'Pagamento ($)', 'Nome': 'Técnico', 'Período': granularidade}
+        )
+        fig.update_traces(texttemplate='$%{x:,.2f}', textposition='outside')
+        fig.update_layout(hovermode="x unified")
+        return fig
+
+    return figura_limitada('pagamento_semanal', cubo, 'Pagamento Tecnico', construir, max_pontos=MAX_BARRAS)
+
+
+def figura_atendimentos_tecnico(tech_summary):
+    """Quantidade de atendimentos de cada técnico, colorida pela categoria"""
+    import plotly.express as px
+
+    fig = px.bar(tech_summary.sort_values('Atendimentos'),
+                 x='Atendimentos', y='Técnico',
+                 title='Atendimentos por Técnico',
+                 color='Categoria',
+                 labels={'Atendimentos': 'Quantidade'})
+    fig.update_traces(hovertemplate="<b>%{y}</b><br>Atendimentos: %{x}<br>Categoria: %{marker.color}")
+    return fig
+
+
+def figura_gorjetas_tecnico(tech_summary):
+    """Total de gorjetas de cada técnico, colorido pela categoria"""
+    import plotly.express as px
+
+    fig = px.bar(tech_summary.sort_values('Total Gorjetas'),
+                 x='Total Gorjetas', y='Técnico',
+                 title='Gorjetas por Técnico',
+                 color='Categoria',
+                 labels={'Total Gorjetas': 'Valor Gorjetas ($)'})
+    fig.update_traces(hovertemplate="<b>%{y}</b><br>Total Gorjetas: $%{x:,.2f}<br>Categoria: %{marker.color}")
+    return fig
+
+
+def figura_total_pagamentos(payment_graph):
+    """Valor total (serviços + gorjetas) por método de pagamento"""
+    import plotly.express as px
+
+    grafico = payment_graph.assign(Total=payment_graph['Serviço'] + payment_graph['Gorjeta'])
+    fig = px.bar(grafico.sort_values('Total'),
+                 x='Total', y='Pagamento',
+                 title='Valor Total por Método de Pagamento (Serviços + Gorjetas)',
+                 color='Serviço',
+                 color_continuous_scale='Peach',
+                 labels={'Total': 'Valor Total ($)', 'Serviço': 'Valor Serviços ($)'})
+    fig.update_traces(
+        hovertemplate="<b>%{y}</b><br>Total: $%{x:,.2f}<br>Serviços: $%{marker.color:,.2f}")
+    return fig
+
+
+def figura_usos_pagamentos(payment_graph):
+    """Quantidade de usos de cada método de pagamento, com o percentual do total"""
+    import plotly.express as px
+
+    payment_count = payment_graph[['Pagamento', 'Atendimentos']].rename(columns={'Atendimentos': 'Qtd Usos'})
+    total = payment_count['Qtd Usos'].sum()
+    payment_count['% Uso'] = (payment_count['Qtd Usos'] / total * 100).round(2)
+
+    fig = px.bar(payment_count.sort_values('Qtd Usos'),
+                 x='Qtd Usos', y='Pagamento',
+                 title='Quantidade de Usos por Método de Pagamento',
+                 color='Qtd Usos',
+                 color_continuous_scale='Peach',
+                 labels={'Qtd Usos': 'Quantidade de Usos'},
+                 text='% Uso')
+    fig.update_traces(
+        texttemplate='%{text}%',
+        textposition='outside',
+        hovertemplate="<b>%{y}</b><br>Usos: %{x}<br>% do Total: %{text}%"
+    )
+    return fig
+
+
+def figura_dias(day_summary):
+    """Quantidade de atendimentos por dia da semana"""
+    import plotly.express as px
+
+    fig = px.bar(day_summary, x='Dia', y='Atendimentos',
+                 title='Atendimentos por Dia da Semana',
+                 labels={'Atendimentos': 'Quantidade'})
+    fig.update_traces(hovertemplate="<b>%{x}</b><br>Atendimentos: %{y}")
+    return fig
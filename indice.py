@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from instrumentacao import etapa
+from planilhas import INVALID_CLIENTS, otimizar_tipos
+
+# Colunas com filtro na sidebar
+COLUNAS_INDICE = ['Semana', 'Nome', 'Categoria']
+
+
+def _intersecao(a, b):
+    """Interseção de dois arrays ordenados e sem repetição, buscando o menor no maior"""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) == 0:
+        return a[:0]
+    encontrados = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[encontrados] == a]
+
+
+class IndiceFiltros:
+    """Índice invertido dos valores de Semana, Nome e Categoria para as posições das linhas
+
+    Para cada coluna, as posições de todas as linhas ficam em um único array
+    agrupado por valor (como em uma matriz CSR), então as linhas de um valor
+    são uma fatia já em ordem crescente. Um filtro junta as fatias dos
+    valores escolhidos e intersecta as colunas por busca binária; o recorte
+    sai de um take nessas posições. O custo depende das linhas selecionadas,
+    não do total de linhas de data.
+    """
+
+    def __init__(self, data, colunas=COLUNAS_INDICE):
+        self.data = data
+        self.colunas = {}
+        for coluna in colunas:
+            # Valores na ordem em que aparecem, como Series.unique (NaN também vira um valor)
+            codigos, valores = pd.factorize(data[coluna], use_na_sentinel=False)
+            ordem = np.argsort(codigos, kind='stable')
+            inicio = np.zeros(len(valores) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codigos, minlength=len(valores)), out=inicio[1:])
+            codigos_valores = {valor: i for i, valor in enumerate(valores)}
+            self.colunas[coluna] = (valores, codigos_valores, ordem, inicio)
+
+        realizado = data['Realizado'].to_numpy(dtype=bool)
+        self.realizados = np.flatnonzero(realizado)
+        self.nao_realizados = np.flatnonzero(~realizado & data['Cliente'].notna().to_numpy())
+
+    def valores(self, coluna):
+        """Valores distintos da coluna, na ordem em que aparecem"""
+        return self.colunas[coluna][0]
+
+    def _linhas(self, coluna, selecionados):
+        valores, codigos_valores, ordem, inicio = self.colunas[coluna]
+        codigos = sorted({codigos_valores[v] for v in selecionados if v in codigos_valores})
+        if len(codigos) == len(valores):
+            return None
+        partes = [ordem[inicio[c]:inicio[c + 1]] for c in codigos]
+        return np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype=ordem.dtype)
+
+    def posicoes(self, filtros):
+        """Posições ordenadas das linhas que passam nos filtros, ou None se todas passam
+
+        filtros mapeia coluna -> valores escolhidos; seleção vazia não
+        restringe a coluna, como nos filtros da sidebar.
+        """
+        resultado = None
+        for coluna, selecionados in filtros.items():
+            if selecionados is None or len(selecionados) == 0:
+                continue
+            linhas = self._linhas(coluna, selecionados)
+            if linhas is not None:
+                resultado = linhas if resultado is None else _intersecao(resultado, linhas)
+        return resultado
+
+    def recorte(self, filtros):
+        """Retorna (data, completed_services, not_completed) restritos aos filtros"""
+        posicoes = self.posicoes(filtros)
+        if posicoes is None:
+            return self.data, self.data.take(self.realizados), self.data.take(self.nao_realizados)
+        return (self.data.take(posicoes),
+                self.data.take(_intersecao(posicoes, self.realizados)),
+                self.data.take(_intersecao(posicoes, self.nao_realizados)))
+
+
+def indexar_planilhas(dataframes):
+    """Junta e limpa os registros de várias planilhas como o app faz e monta o índice dos filtros"""
+    with etapa('normalize', planilhas=len(dataframes)):
+        # Arquivos diferentes têm categorias diferentes: os tipos compactos são refeitos após a junção
+        data = otimizar_tipos(pd.concat(dataframes, ignore_index=True))
+        data = data[data['Nome'].notna() & (data['Nome'].astype(str).str.strip() != '')]
+        data = data[~data['Cliente'].astype(str).str.strip().str.upper().isin([c.upper() for c in INVALID_CLIENTS])]
+        return IndiceFiltros(data.reset_index(drop=True))
@@ -0,0 +1,240 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+
+from instrumentacao import etapa, registrar
+from planilhas import combinar_semanas, extrair_registros_linhas, ler_conteudo, otimizar_tipos
+
+# Abas por processo do pool: cada processo novo (spawn) reimporta pandas e openpyxl, cerca de 1 s, o
+# tempo de ler umas 8 abas pequenas; abaixo de dois processos cheios as abas são lidas no processo atual
+ABAS_POR_PROCESSO = 8
+
+
+def listar_abas_semanais(conteudo):
+    """Nomes das abas WEEK de uma planilha, na ordem do arquivo"""
+    return [nome for nome in pd.ExcelFile(BytesIO(conteudo)).sheet_names if nome.startswith('WEEK')]
+
+
+def processar_abas(conteudo, abas):
+    """Lê e extrai as abas WEEK indicadas de uma planilha, isolando erros e medindo o tempo de cada uma
+
+    Executada nos processos do pool: a planilha é aberta uma única vez
+    (openpyxl, read_only) para todas as abas do grupo, e qualquer exceção
+    vira um campo 'erro' no resultado da aba, para que uma aba corrompida
+    não interrompa as demais. Retorna um resultado por aba, na ordem de abas.
+    """
+    # openpyxl só é carregado quando a primeira planilha é lida
+    import openpyxl
+
+    resultados = []
+    wb = openpyxl.load_workbook(BytesIO(conteudo), read_only=True, data_only=True, keep_links=False)
+    try:
+        for aba in abas:
+            inicio = time.perf_counter()
+            try:
+                ws = wb[aba]
+                ws.reset_dimensions()
+                registros = extrair_registros_linhas(list(ws.iter_rows(values_only=True)), aba)
+                erro = None
+            except Exception as e:
+                registros = None
+                erro = f"{type(e).__name__}: {e}"
+            resultados.append({'registros': registros, 'segundos': time.perf_counter() - inicio, 'erro': erro})
+    finally:
+        wb.close()
+    return resultados
+
+
+def _processar_grupo(conteudo, abas):
+    """processar_abas com o erro de abertura da planilha repetido em cada aba do grupo"""
+    try:
+        return processar_abas(conteudo, abas)
+    except Exception as e:
+        return [{'registros': None, 'segundos': 0.0, 'erro': f"{type(e).__name__}: {e}"} for _ in abas]
+
+
+def _agrupar(tarefas, processos):
+    """Divide as tarefas (arquivo, aba) em grupos de abas consecutivas de um mesmo arquivo
+
+    Cada grupo tem no máximo ceil(len(tarefas) / processos) abas, para que
+    uma planilha com muitas abas ainda seja dividida entre os processos.
+    """
+    tamanho = -(-len(tarefas) // processos)
+    grupos = []
+    for i, aba in tarefas:
+        if grupos and grupos[-1][0] == i and len(grupos[-1][1]) < tamanho:
+            grupos[-1][1].append(aba)
+        else:
+            grupos.append((i, [aba]))
+    return grupos
+
+
+def processar_em_paralelo(arquivos, max_processos=None, cache=None, nomes=None):
+    """Processa várias planilhas, e as abas WEEK de cada uma, em um pool de processos
+
+    O pool só é usado com pelo menos ABAS_POR_PROCESSO abas para cada um
+    de dois ou mais processos (no máximo max_processos, padrão: CPUs); com
+    menos abas, ou com max_processos=1, tudo é lido no processo atual, uma
+    vez por planilha. No pool as abas são enviadas em grupos (todas as de uma planilha, ou partes
+    dela quando há menos planilhas que processos): cada grupo copia os bytes
+    da planilha e a abre uma única vez, em vez de uma cópia e uma leitura
+    completa do .xlsx por aba. Retorna (dados, relatorio): dados tem um DataFrame por arquivo, na mesma
+    ordem de arquivos e equivalente a process_spreadsheet; relatorio tem uma
+    linha por aba com tempo, quantidade de registros e erro. As abas de cada
+    arquivo são combinadas na ordem em que aparecem na planilha,
+    independentemente da ordem em que os processos terminam. Arquivos com
+    alguma aba com erro não são guardados no cache.
+    """
+    nomes = nomes or [getattr(a, 'name', str(a)) for a in arquivos]
+    conteudos = [ler_conteudo(a) for a in arquivos]
+    dados = [None] * len(arquivos)
+    erros_abertura = {}
+
+    tarefas = []
+    for i, conteudo in enumerate(conteudos):
+        if cache is not None:
+            dados[i] = cache.obter(cache.chave(conteudo))
+        if dados[i] is None:
+            try:
+                tarefas.extend((i, aba) for aba in listar_abas_semanais(conteudo))
+            except Exception as e:
+                # Arquivo que nem chega a abrir como planilha
+                erros_abertura[i] = f"{type(e).__name__}: {e}"
+
+    resultados = {}
+    max_processos = max(min(max_processos or os.cpu_count() or 1, len(tarefas) // ABAS_POR_PROCESSO), 1)
+    grupos = _agrupar(tarefas, max_processos)
+    if max_processos == 1:
+        for i, abas in grupos:
+            resultados.update(zip(((i, aba) for aba in abas), _processar_grupo(conteudos[i], abas)))
+    else:
+        # spawn evita herdar as threads do servidor do Streamlit nos processos filhos
+        with ProcessPoolExecutor(max_workers=max_processos, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futuros = [(i, abas, pool.submit(_processar_grupo, conteudos[i], abas)) for i, abas in grupos]
+            for i, abas, futuro in futuros:
+                try:
+                    resultados_grupo = futuro.result()
+                except Exception as e:
+                    # Processo do pool encerrado de forma anormal
+                    resultados_grupo = [{'registros': None, 'segundos': 0.0, 'erro': f"{type(e).__name__}: {e}"}
+                                        for _ in abas]
+                resultados.update(((i, aba), resultado) for aba, resultado in zip(abas, resultados_grupo))
+
+    relatorio = []
+    for i in range(len(arquivos)):
+        if dados[i] is not None:
+            continue
+        if i in erros_abertura:
+            dados[i] = pd.DataFrame()
+            relatorio.append({'Arquivo': nomes[i], 'Aba': None, 'Registros': 0, 'Segundos': 0.0,
+                              'Erro': erros_abertura[i]})
+            continue
+        abas = [(aba, resultados[(j, aba)]) for j, aba in tarefas if j == i]
+        for aba, resultado in abas:
+            registrar('parse', resultado['segundos'], arquivo=nomes[i], aba=aba, erro=resultado['erro'])
+            relatorio.append({
+                'Arquivo': nomes[i],
+                'Aba': aba,
+                'Registros': 0 if resultado['registros'] is None else len(resultado['registros']),
+                'Segundos': resultado['segundos'],
+                'Erro': resultado['erro']
+            })
+        dados[i] = combinar_semanas(r['registros'] for _, r in abas if r['registros'] is not None)
+        if cache is not None and all(r['erro'] is None for _, r in abas):
+            cache.guardar(cache.chave(conteudos[i]), dados[i])
+
+    return dados, pd.DataFrame(relatorio, columns=['Arquivo', 'Aba', 'Registros', 'Segundos', 'Erro'])
+
+
+class IngestaoIncremental:
+    """Reprocessa apenas as abas WEEK novas ou alteradas quando uma planilha é carregada de novo
+
+    Guarda, para cada arquivo (pelo nome) e cada aba, uma impressão digital
+    com as dimensões da aba e o hash dos valores das células, junto com os
+    registros já extraídos. Cada aba é lida uma única vez: se a impressão
+    não mudou, os registros anteriores são reaproveitados; senão a aba é
+    extraída a partir das mesmas linhas lidas.
+
+    A instância é compartilhada entre as sessões (st.cache_resource); a
+    leitura das abas corre fora da trava que protege o dicionário de arquivos.
+    """
+
+    def __init__(self, max_arquivos=16):
+        self.max_arquivos = max_arquivos
+        self.arquivos = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def _ler_aba(ws):
+        """Linhas da aba e sua impressão digital (linhas x colunas + hash dos valores)
+
+        Células vazias no fim das linhas e linhas vazias no fim da aba são
+        descartadas, para que a impressão dependa só dos valores e não de
+        como cada programa grava as células em branco.
+        """
+        ws.reset_dimensions()
+        linhas = []
+        for linha in ws.iter_rows(values_only=True):
+            fim = len(linha)
+            while fim and linha[fim - 1] is None:
+                fim -= 1
+            linhas.append(linha[:fim])
+        while linhas and not linhas[-1]:
+            linhas.pop()
+
+        hash_valores = hashlib.sha256()
+        for linha in linhas:
+            hash_valores.update(repr(linha).encode())
+        largura = max((len(linha) for linha in linhas), default=0)
+        return linhas, f"{len(linhas)}x{largura}:{hash_valores.hexdigest()}"
+
+    def processar(self, file, nome):
+        """Retorna (dados, resumo), com dados equivalente a process_spreadsheet(file)
+
+        resumo tem uma linha por aba com a situação ('nova', 'alterada',
+        'reaproveitada' ou 'removida') e a quantidade de registros.
+        """
+        import openpyxl
+
+        with self._trava:
+            anteriores = self.arquivos.get(nome, {})
+        atuais = {}
+        resumo = []
+        wb = openpyxl.load_workbook(BytesIO(ler_conteudo(file)), read_only=True, data_only=True, keep_links=False)
+        try:
+            for ws in wb.worksheets:
+                if not ws.title.startswith('WEEK'):
+                    continue
+                with etapa('parse', arquivo=nome, aba=ws.title):
+                    linhas, impressao = self._ler_aba(ws)
+                    if ws.title in anteriores and anteriores[ws.title][0] == impressao:
+                        situacao = 'reaproveitada'
+                        registros = anteriores[ws.title][1]
+                    else:
+                        situacao = 'alterada' if ws.title in anteriores else 'nova'
+                        registros = combinar_semanas([extrair_registros_linhas(linhas, ws.title)])
+                atuais[ws.title] = (impressao, registros)
+                resumo.append({'Arquivo': nome, 'Aba': ws.title, 'Situação': situacao, 'Registros': len(registros)})
+        finally:
+            wb.close()
+
+        for aba in anteriores.keys() - atuais.keys():
+            resumo.append({'Arquivo': nome, 'Aba': aba, 'Situação': 'removida', 'Registros': 0})
+
+        with self._trava:
+            self.arquivos[nome] = atuais
+            self.arquivos.move_to_end(nome)
+            while len(self.arquivos) > self.max_arquivos:
+                self.arquivos.popitem(last=False)
+
+        # Cada aba já está normalizada: basta emendar na ordem da planilha
+        frames = [registros for _, registros in atuais.values() if not registros.empty]
+        dados = otimizar_tipos(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+        return dados, resumo
@@ -0,0 +1,95 @@
+import contextvars
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Etapas do pipeline: download, leitura de cada aba, normalização, pagamentos,
+# agregações, cada gráfico desenhado e cada exportação
+ETAPAS = ['fetch', 'parse', 'normalize', 'payout', 'aggregate', 'render', 'export']
+
+# Lista de registros da coleta ativa (None = nenhuma) e pilha de etapas abertas,
+# separadas por contexto (cada sessão do Streamlit roda em sua própria thread)
+_coleta = contextvars.ContextVar('coleta', default=None)
+_pilha = contextvars.ContextVar('pilha', default=())
+
+
+def coletar(ativa=True):
+    """Começa uma nova coleta das etapas executadas neste contexto e retorna a lista de registros
+
+    Com ativa=False encerra a coleta; as etapas continuam indo para o log.
+    """
+    registros = [] if ativa else None
+    _coleta.set(registros)
+    return registros
+
+
+def registrar(etapa, segundos, pico_bytes=None, **atributos):
+    """Registra uma etapa já medida: linha JSON no log e, se houver coleta ativa, na lista
+
+    Usada diretamente para etapas medidas em outros processos (ex.: abas
+    lidas no pool de processar_em_paralelo).
+    """
+    registro = {'etapa': etapa, 'segundos': round(segundos, 6),
+                'pico_mb': None if pico_bytes is None else round(pico_bytes / 2 ** 20, 3), **atributos}
+    logger.info(json.dumps({'evento': 'etapa', 'momento': datetime.now(timezone.utc).isoformat(), **registro},
+                           ensure_ascii=False, default=str))
+    registros = _coleta.get()
+    if registros is not None:
+        registros.append(registro)
+    return registro
+
+
+@contextmanager
+def etapa(nome, **atributos):
+    """Mede o tempo e, se o tracemalloc estiver ativo, o pico de memória de um bloco
+
+    O pico é o máximo alocado acima do que já estava alocado no início do
+    bloco. Etapas aninhadas funcionam: o pico de uma etapa interna também
+    conta para as externas. Sem tracemalloc (o padrão, por custar caro) o
+    pico fica None.
+    """
+    medir_memoria = tracemalloc.is_tracing()
+    abertas = _pilha.get()
+    base = None
+    if medir_memoria:
+        atual, pico = tracemalloc.get_traced_memory()
+        # O pico acumulado até aqui pertence às etapas externas, antes de ser zerado
+        for externa in abertas:
+            externa['pico'] = max(externa['pico'], pico)
+        tracemalloc.reset_peak()
+        base = atual
+    estado = {'pico': 0}
+    token = _pilha.set(abertas + (estado,))
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        _pilha.reset(token)
+        pico_bytes = None
+        if medir_memoria and tracemalloc.is_tracing():
+            pico = max(estado['pico'], tracemalloc.get_traced_memory()[1])
+            for externa in abertas:
+                externa['pico'] = max(externa['pico'], pico)
+            pico_bytes = max(pico - base, 0)
+        registrar(nome, segundos, pico_bytes, **atributos)
+
+
+def configurar_log(destino=None):
+    """Envia os registros das etapas, uma linha JSON cada, para o arquivo destino (ou stderr)
+
+    Pode ser chamada a cada execução: o handler só é instalado uma vez.
+    """
+    if any(getattr(handler, '_instrumentacao', False) for handler in logger.handlers):
+        return
+    handler = logging.FileHandler(destino, encoding='utf-8') if destino else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler._instrumentacao = True
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
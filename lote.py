@@ -0,0 +1,165 @@
+"""Processamento em lote das planilhas WEEK de um diretório, sem o Streamlit
+
+Lê as planilhas .xlsx de DIRETORIO e grava em SAIDA os agregados em CSV
+(totais semanais com pagamentos, resumo por técnico, por método de
+pagamento e por dia da semana), o relatório PDF e, com --recibos, os
+recibos de pagamento de cada técnico e semana em um ZIP. Mostra o tempo de
+partida (importações) e as planilhas processadas por segundo.
+
+Uso: python lote.py DIRETORIO SAIDA [--recibos] [--timbrado ARQUIVO_OU_URL] [--processos N]
+"""
+import time
+
+_INICIO = time.perf_counter()
+
+import argparse
+import glob
+import logging
+import os
+import sys
+
+import pandas as pd
+
+from agregacoes import analisar, resumo_dias, resumo_pagamentos, resumo_tecnicos
+from indice import indexar_planilhas
+from instrumentacao import configurar_log, etapa
+from ingestao import processar_em_paralelo
+from planilhas import FORMAS_PAGAMENTO_VALIDAS, process_spreadsheet
+from recibos import gerar_recibos_zip
+from relatorio import create_pdf
+from timbrado import Timbrado
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo (s) entre o início da importação deste módulo e o começo do processamento
+ORCAMENTO_PARTIDA = 3.0
+
+
+def listar_planilhas(diretorio):
+    """Planilhas .xlsx do diretório, em ordem de nome (sem os arquivos de trava do Excel)"""
+    return sorted(caminho for caminho in glob.glob(os.path.join(diretorio, '*.xlsx'))
+                  if not os.path.basename(caminho).startswith('~$'))
+
+
+def ler_planilhas(caminhos, max_processos=None):
+    """Registros de cada planilha e os erros por arquivo ({caminho: mensagem})
+
+    Com max_processos=1 as planilhas são lidas neste processo, uma a uma,
+    com process_spreadsheet; senão vão para processar_em_paralelo, que só
+    abre o pool de processos quando há abas suficientes para pagar a
+    partida dos processos (ABAS_POR_PROCESSO) e lê as demais aqui mesmo.
+    """
+    if max_processos == 1:
+        dados, erros = [], {}
+        for caminho in caminhos:
+            try:
+                dados.append(process_spreadsheet(caminho))
+            except Exception as e:
+                dados.append(pd.DataFrame())
+                erros[caminho] = f"{type(e).__name__}: {e}"
+        return dados, erros
+
+    dados, relatorio = processar_em_paralelo(caminhos, max_processos=max_processos)
+    com_erro = relatorio[relatorio['Erro'].notna()]
+    erros = {arquivo: '; '.join(f"{aba}: {erro}" if pd.notna(aba) else erro
+                                for aba, erro in zip(grupo['Aba'], grupo['Erro']))
+             for arquivo, grupo in com_erro.groupby('Arquivo', sort=False)}
+    return dados, erros
+
+
+def processar_diretorio(diretorio, saida, recibos=False, timbrado=None, max_processos=None):
+    """Processa todas as planilhas de diretorio e grava agregados, relatório e recibos em saida
+
+    Retorna um dict com as planilhas lidas, os erros por arquivo, o número
+    de registros e de recibos, os arquivos gravados e os tempos de cada
+    etapa, incluindo as planilhas por segundo da leitura.
+    """
+    caminhos = listar_planilhas(diretorio)
+    if not caminhos:
+        raise FileNotFoundError(f"Nenhuma planilha .xlsx em {diretorio}")
+    os.makedirs(saida, exist_ok=True)
+    resultado = {'planilhas': len(caminhos), 'arquivos': []}
+
+    inicio = time.perf_counter()
+    dados, resultado['erros'] = ler_planilhas(caminhos, max_processos)
+    resultado['segundos_leitura'] = time.perf_counter() - inicio
+    resultado['planilhas_por_segundo'] = len(caminhos) / resultado['segundos_leitura']
+    dados = [df for df in dados if not df.empty]
+    if not dados:
+        raise ValueError(f"Nenhum registro encontrado nas planilhas de {diretorio}")
+
+    inicio = time.perf_counter()
+    data = indexar_planilhas(dados).data
+    analise = analisar(data)
+    resultado['registros'] = len(data)
+    cubo = analise['cubo']
+    agregados = {
+        'totais_semanais.csv': analise['weekly_totals'],
+        'resumo_tecnicos.csv': resumo_tecnicos(analise['weekly_totals']),
+        'resumo_pagamentos.csv': resumo_pagamentos(cubo, FORMAS_PAGAMENTO_VALIDAS),
+        'resumo_dias.csv': resumo_dias(cubo),
+    }
+    for nome, df in agregados.items():
+        df.to_csv(os.path.join(saida, nome), index=False, float_format='%.2f')
+        resultado['arquivos'].append(nome)
+    resultado['segundos_agregados'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with etapa('export', formato='pdf'):
+        create_pdf(cubo, analise['not_completed']).output(os.path.join(saida, 'relatorio_servicos_tecnicos.pdf'), 'F')
+    resultado['arquivos'].append('relatorio_servicos_tecnicos.pdf')
+    resultado['segundos_relatorio'] = time.perf_counter() - inicio
+
+    resultado['recibos'] = 0
+    if recibos:
+        destino = os.path.join(saida, 'recibos_pagamento.zip')
+        with open(destino, 'wb') as arquivo, etapa('export', formato='recibos_zip'):
+            gerados = gerar_recibos_zip(analise['completed_services'], arquivo, max_processos=max_processos,
+                                        timbrado=timbrado)
+        resultado['recibos'] = gerados['recibos']
+        resultado['segundos_recibos'] = gerados['segundos']
+        resultado['arquivos'].append('recibos_pagamento.zip')
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera agregados, relatório e recibos das planilhas de um diretório")
+    parser.add_argument('diretorio', help="diretório com as planilhas .xlsx")
+    parser.add_argument('saida', help="diretório onde os arquivos são gravados")
+    parser.add_argument('--recibos', action='store_true', help="gera os recibos de cada técnico e semana (ZIP)")
+    parser.add_argument('--timbrado', help="imagem do papel timbrado dos recibos (caminho ou URL)")
+    parser.add_argument('--processos', type=int, default=None,
+                        help="máximo de processos para leitura e recibos (padrão: CPUs, usados só quando há "
+                             "abas ou recibos suficientes; 1 = tudo neste processo)")
+    parser.add_argument('--log-etapas', metavar='ARQUIVO',
+                        help="grava o tempo de cada etapa (leitura, pagamentos, agregações, exportação) em JSON")
+    parser.add_argument('--orcamento-partida', type=float, default=ORCAMENTO_PARTIDA,
+                        help=f"tempo máximo de partida em segundos (padrão: {ORCAMENTO_PARTIDA})")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+    if args.log_etapas:
+        configurar_log(args.log_etapas)
+
+    partida = time.perf_counter() - _INICIO
+    print(f"Partida: {partida:.2f} s (orçamento {args.orcamento_partida:.2f} s)")
+    if partida > args.orcamento_partida:
+        logger.warning("Partida de %.2f s acima do orçamento de %.2f s", partida, args.orcamento_partida)
+
+    timbrado = Timbrado(args.timbrado) if args.timbrado else None
+    resultado = processar_diretorio(args.diretorio, args.saida, recibos=args.recibos, timbrado=timbrado,
+                                    max_processos=args.processos)
+
+    print(f"{resultado['planilhas']} planilhas lidas em {resultado['segundos_leitura']:.2f} s "
+          f"({resultado['planilhas_por_segundo']:.2f} planilhas/s), {resultado['registros']:,} registros")
+    for caminho, erro in resultado['erros'].items():
+        print(f"  erro em {caminho}: {erro}")
+    print(f"Agregados em {resultado['segundos_agregados']:.2f} s, "
+          f"relatório em {resultado['segundos_relatorio']:.2f} s")
+    if args.recibos:
+        print(f"{resultado['recibos']} recibos em {resultado['segundos_recibos']:.2f} s")
+    print(f"Arquivos em {args.saida}: {', '.join(resultado['arquivos'])}")
+    return 1 if resultado['erros'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
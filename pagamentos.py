@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+# Regras de pagamento semanal por categoria:
+#   comissao        - fração do total de serviços paga ao técnico
+#   repassa_gorjeta - se as gorjetas vão integralmente para o técnico
+#   minimo_diario   - valor mínimo garantido por dia trabalhado
+#   valor_diario    - valor fixo pago por dia trabalhado
+# O pagamento é o maior entre a parte variável (comissão + gorjeta + valor fixo)
+# e o mínimo garantido. Categorias fora da tabela não recebem pagamento.
+REGRAS_PAGAMENTO = {
+    'Registering': {'comissao': 0.00, 'repassa_gorjeta': False, 'minimo_diario': 0, 'valor_diario': 0},
+    'Technician': {'comissao': 0.20, 'repassa_gorjeta': True, 'minimo_diario': 0, 'valor_diario': 0},
+    'Training': {'comissao': 0.00, 'repassa_gorjeta': False, 'minimo_diario': 0, 'valor_diario': 80},
+    'Coordinator': {'comissao': 0.25, 'repassa_gorjeta': True, 'minimo_diario': 0, 'valor_diario': 0},
+    'Started': {'comissao': 0.20, 'repassa_gorjeta': True, 'minimo_diario': 150, 'valor_diario': 0},
+}
+
+
+def calcular_pagamento_individual(row, weekly_data):
+    """Calcula o pagamento individual de cada atendimento"""
+    tech_week_data = weekly_data[
+        (weekly_data['Nome'] == row['Nome']) &
+        (weekly_data['Semana'] == row['Semana'])
+        ]
+
+    if len(tech_week_data) == 0:
+        return pd.Series([0, row['Serviço'] + row['Gorjeta']])
+
+    total_pagamento = tech_week_data['Pagamento Tecnico'].iloc[
+        0] if 'Pagamento Tecnico' in tech_week_data.columns else 0
+    total_servico = tech_week_data['Serviço'].sum()
+
+    if total_servico == 0:
+        return pd.Series([0, row['Serviço'] + row['Gorjeta']])
+
+    # Pagamento proporcional ao serviço realizado neste atendimento
+    try:
+        pagamento = (row['Serviço'] / total_servico) * total_pagamento
+        lucro = row['Serviço'] + row['Gorjeta'] - pagamento
+    except:
+        pagamento = 0
+        lucro = row['Serviço'] + row['Gorjeta']
+
+    return pd.Series([pagamento, lucro])
+
+
+def alocar_pagamentos_individuais(services, weekly_data):
+    """Distribui o pagamento semanal entre os atendimentos de forma vetorizada
+
+    Equivalente a aplicar calcular_pagamento_individual linha a linha, mas
+    faz um único agrupamento por (Nome, Semana) e um único alinhamento com os
+    atendimentos. Retorna um DataFrame com 'Pagamento Tecnico' e
+    'Lucro Empresa' no mesmo índice de services.
+    """
+    chaves = ['Nome', 'Semana']
+    servico = pd.to_numeric(services['Serviço'], errors='coerce').to_numpy(dtype=float)
+    gorjeta = pd.to_numeric(services['Gorjeta'], errors='coerce').to_numpy(dtype=float)
+
+    if services.empty or weekly_data.empty:
+        pagamento = np.zeros(len(services))
+    else:
+        # Total de serviços por técnico/semana e o pagamento da primeira linha do grupo
+        # (mesma regra do iloc[0] da versão linha a linha)
+        resumo = weekly_data.groupby(chaves, sort=False, observed=True)['Serviço'].sum().to_frame('Total Servico')
+        if 'Pagamento Tecnico' in weekly_data.columns:
+            primeiros = weekly_data.drop_duplicates(chaves).set_index(chaves)['Pagamento Tecnico']
+            resumo['Total Pagamento'] = primeiros.reindex(resumo.index).to_numpy()
+        else:
+            resumo['Total Pagamento'] = 0.0
+
+        alinhado = resumo.reindex(pd.MultiIndex.from_frame(services[chaves]))
+        total_servico = alinhado['Total Servico'].to_numpy(dtype=float)
+        total_pagamento = alinhado['Total Pagamento'].to_numpy(dtype=float)
+
+        # Semana sem registro (NaN) ou sem serviços (0): nada é pago ao técnico
+        com_servico = ~np.isnan(total_servico) & (total_servico != 0)
+        divisor = np.where(com_servico, total_servico, 1.0)
+        pagamento = np.where(com_servico, servico / divisor * total_pagamento, 0.0)
+
+    return pd.DataFrame({
+        'Pagamento Tecnico': pagamento,
+        'Lucro Empresa': servico + gorjeta - pagamento
+    }, index=services.index)
+
+
+def calcular_pagamento_semanal(row):
+    """Calcula o pagamento semanal baseado na categoria"""
+    categoria = row['Categoria']
+    servico = row['Serviço']
+    gorjeta = row['Gorjeta']
+    dias_trabalhados = row['Dias Trabalhados']
+
+    if categoria == 'Registering':
+        pagamento = 0.00
+        lucro = servico + gorjeta
+    elif categoria == 'Technician':
+        pagamento = servico * 0.20 + gorjeta
+        lucro = servico * 0.80
+    elif categoria == 'Training':
+        pagamento = 80 * dias_trabalhados  # $80 por dia trabalhado
+        lucro = servico + gorjeta - pagamento
+    elif categoria == 'Coordinator':
+        pagamento = servico * 0.25 + gorjeta
+        lucro = servico * 0.75
+    elif categoria == 'Started':
+        # Aplicar cálculo por semana individualmente
+        valor_comissao = servico * 0.20 + gorjeta
+        valor_minimo = 150 * dias_trabalhados
+        pagamento = max(valor_minimo, valor_comissao)
+        lucro = servico + gorjeta - pagamento
+    else:
+        pagamento = 0
+        lucro = servico + gorjeta
+
+    return pd.Series([pagamento, lucro])
+
+
+def calcular_pagamentos_semanais(weekly_data, regras=None):
+    """Calcula pagamento e lucro semanais de todas as linhas a partir da tabela de regras
+
+    Versão vetorizada de calcular_pagamento_semanal: os parâmetros de cada
+    categoria são distribuídos pelas linhas e a regra é avaliada sobre as
+    colunas inteiras. Retorna um DataFrame com 'Pagamento Tecnico' e
+    'Lucro Empresa' no mesmo índice de weekly_data.
+    """
+    tabela = pd.DataFrame.from_dict(REGRAS_PAGAMENTO if regras is None else regras, orient='index')
+    servico = pd.to_numeric(weekly_data['Serviço'], errors='coerce').to_numpy(dtype=float)
+    gorjeta = pd.to_numeric(weekly_data['Gorjeta'], errors='coerce').to_numpy(dtype=float)
+    dias = pd.to_numeric(weekly_data['Dias Trabalhados'], errors='coerce').to_numpy(dtype=float)
+
+    # Posição da categoria de cada linha na tabela (-1 quando não existe regra)
+    posicao = tabela.index.get_indexer(weekly_data['Categoria'])
+    conhecida = posicao >= 0
+
+    def parametro(coluna):
+        return np.where(conhecida, tabela[coluna].to_numpy(dtype=float)[posicao], 0.0)
+
+    def termo(coluna, valores):
+        # Parâmetros zerados não dependem do valor da coluna (ex.: dias ausentes)
+        valor = parametro(coluna)
+        return np.where(valor != 0, valor * valores, 0.0)
+
+    variavel = termo('comissao', servico) + termo('repassa_gorjeta', gorjeta) + termo('valor_diario', dias)
+    minimo = termo('minimo_diario', dias)
+    # O mínimo só vale para as categorias que o definem; nas demais a parte variável
+    # fica como está, mesmo negativa ou ausente. Mesma semântica de max(minimo, variavel):
+    # o mínimo prevalece em caso de empate e quando a parte variável é ausente.
+    usa_minimo = (parametro('minimo_diario') != 0) & ~(variavel > minimo)
+    pagamento = np.where(conhecida, np.where(usa_minimo, minimo, variavel), 0.0)
+
+    return pd.DataFrame({
+        'Pagamento Tecnico': pagamento,
+        'Lucro Empresa': servico + gorjeta - pagamento
+    }, index=weekly_data.index)
@@ -0,0 +1,366 @@
+import logging
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from io import BytesIO
+
+from download import baixador_padrao
+from instrumentacao import etapa
+
+logger = logging.getLogger(__name__)
+
+FORMAS_PAGAMENTO_VALIDAS = [
+    'Check', 'American Express', 'Apple Pay', 'Discover',
+    'Master Card', 'Visa', 'Zelle', 'Cash', 'Invoice'
+]
+
+INVALID_CLIENTS = ['SERVICES IN:', 'BNS PROFIT:', 'Total']
+
+# Incrementar sempre que a extração mudar, para invalidar dados processados em cache
+VERSAO_PARSER = '1'
+
+DIAS_SEMANA = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
+
+# Janelas de colunas (início, fim) de cada dia da semana nas abas WEEK
+COLUNAS_DIAS = [(1, 9), (10, 18), (19, 27), (28, 36), (37, 45), (46, 54), (55, 63)]
+
+# Textos que o pd.read_excel lê como NaN (padrão do pandas e códigos de erro do Excel)
+VALORES_AUSENTES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA',
+    'NULL', 'NaN', 'None', 'n/a', 'nan', 'null', '#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!'
+])
+
+# Colunas com poucos valores distintos, guardadas como category
+COLUNAS_CATEGORICAS = ['Semana', 'Nome', 'Categoria', 'Origem', 'Dia', 'Pagamento']
+
+# Textos de 'Verificado' que significam não verificado
+VERIFICADO_FALSO = {'', 'FALSE', 'NO', 'NÃO', 'NAO', 'N', '0'}
+
+COLUNAS_REGISTROS = ['Semana', 'Nome', 'Categoria', 'Origem', 'Dia', 'Data', 'Cliente', 'Serviço', 'Gorjeta',
+                     'Pets', 'Pagamento', 'ID Pagamento', 'Verificado', 'Realizado']
+
+
+def _mascaras_palavras_chave(valores, chaves):
+    """Máscaras (linhas x colunas) das células de texto que contêm cada chave
+
+    Só as células preenchidas entram na busca, e uma única passada com todas
+    as chaves seleciona as poucas candidatas verificadas chave a chave.
+    """
+    planas = valores.ravel()
+    preenchidas = np.flatnonzero(pd.notna(planas))
+    mascaras = {chave: np.zeros(planas.shape, dtype=bool) for chave in chaves}
+    textos = pd.Series(planas[preenchidas], dtype=object)
+    try:
+        candidatas = textos.str.contains('|'.join(map(re.escape, chaves)), na=False).to_numpy(dtype=bool)
+    except AttributeError:
+        # Aba sem nenhuma célula de texto
+        return {chave: m.reshape(valores.shape) for chave, m in mascaras.items()}
+    textos = textos[candidatas]
+    for chave in chaves:
+        mascaras[chave][preenchidas[candidatas]] = textos.str.contains(chave, regex=False).to_numpy(dtype=bool)
+    return {chave: m.reshape(valores.shape) for chave, m in mascaras.items()}
+
+
+def _para_float(valores):
+    """Converte uma coluna para float como float() faria, com NaN quando não for possível"""
+    serie = pd.Series(valores, dtype=object)
+    numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float)
+    # Formatos aceitos por float() mas não pelo to_numeric (ex.: '1_000')
+    pendentes = np.flatnonzero(np.isnan(numeros) & serie.map(type).eq(str).to_numpy())
+    for i in pendentes:
+        try:
+            numeros[i] = float(valores[i])
+        except ValueError:
+            pass
+    return numeros
+
+
+def extrair_registros_semana(df, sheet_name):
+    """Extrai os atendimentos de uma aba WEEK lida com header=None
+
+    Localiza as linhas 'NAME:' e de cabeçalho com máscaras sobre a matriz da
+    aba e recorta as sete janelas de dias de todas as linhas de dados de uma
+    vez, gerando um registro por célula de cliente preenchida.
+    """
+    valores = df.to_numpy(dtype=object)
+    n_linhas = valores.shape[0]
+    largura = COLUNAS_DIAS[-1][1] + 1
+    if valores.shape[1] < largura:
+        valores = np.hstack([valores, np.full((n_linhas, largura - valores.shape[1]), np.nan, dtype=object)])
+    if n_linhas == 0:
+        return pd.DataFrame(columns=COLUNAS_REGISTROS)
+
+    # Máscaras de palavras-chave calculadas uma única vez sobre todas as células
+    mascaras = _mascaras_palavras_chave(valores, ['NAME:', 'Schedule', 'DATE', 'SERVICE'])
+    celulas_nome = mascaras['NAME:']
+    linhas_nome = np.flatnonzero(celulas_nome.any(axis=1))
+    linhas_cabecalho = np.flatnonzero(
+        mascaras['Schedule'].any(axis=1) & mascaras['DATE'].any(axis=1) & mascaras['SERVICE'].any(axis=1))
+
+    # Cada bloco de técnico vai de uma linha 'NAME:' até a próxima
+    fins = np.append(linhas_nome[1:], n_linhas)
+    posicao_cabecalho = np.searchsorted(linhas_cabecalho, linhas_nome)
+    blocos = []
+    for inicio, fim, pos in zip(linhas_nome, fins, posicao_cabecalho):
+        if pos == len(linhas_cabecalho) or linhas_cabecalho[pos] >= fim:
+            continue
+        name_row = valores[inicio]
+        name_col = int(np.argmax(celulas_nome[inicio]))
+        blocos.append({
+            'linhas': np.arange(linhas_cabecalho[pos] + 1, fim),
+            'Nome': name_row[name_col + 1],
+            'Categoria': name_row[name_col + 3],
+            'Origem': name_row[name_col + 5] if 'From:' in str(name_row[name_col + 4]) else None
+        })
+    if not blocos:
+        return pd.DataFrame(columns=COLUNAS_REGISTROS)
+
+    linhas = np.concatenate([b['linhas'] for b in blocos])
+    bloco_da_linha = np.repeat(np.arange(len(blocos)), [len(b['linhas']) for b in blocos])
+
+    # (linhas, 7 dias, 9 colunas) -> uma linha por célula de dia, na ordem linha/dia
+    janelas = np.array([np.arange(inicio, fim + 1) for inicio, fim in COLUNAS_DIAS])
+    dias = valores[linhas][:, janelas].reshape(-1, janelas.shape[1])
+    bloco_da_celula = np.repeat(bloco_da_linha, len(COLUNAS_DIAS))
+    dia_da_celula = np.tile(np.arange(len(COLUNAS_DIAS)), len(linhas))
+
+    # Ignorar células sem cliente e linhas inválidas (totais da planilha)
+    preenchidas = np.flatnonzero(pd.notna(dias[:, 0]))
+    dias = dias[preenchidas]
+    clientes = pd.Series(dias[:, 0], dtype=object).astype(str).str.strip()
+    validas = ((clientes != '') &
+               ~clientes.str.upper().isin([c.upper() for c in INVALID_CLIENTS])).to_numpy()
+    dias, clientes = dias[validas], clientes.to_numpy(dtype=object)[validas]
+    preenchidas = preenchidas[validas]
+
+    # Atendimento realizado: tem valor de serviço numérico
+    servico_texto = pd.Series(dias[:, 2], dtype=object).astype(str).str.strip()
+    tem_servico = (pd.notna(dias[:, 2]) & (servico_texto != '') & (servico_texto != 'nan')).to_numpy()
+    servico = np.where(tem_servico, _para_float(dias[:, 2]), np.nan)
+    realizado = tem_servico & ~np.isnan(servico)
+    # Valor de serviço não numérico descarta a célula
+    mantidas = realizado | ~tem_servico
+    dias, clientes, realizado, servico = dias[mantidas], clientes[mantidas], realizado[mantidas], servico[mantidas]
+    preenchidas = preenchidas[mantidas]
+
+    pagamento_valido = (pd.notna(dias[:, 5]) &
+                        pd.Series(dias[:, 5], dtype=object).astype(str).str.strip()
+                        .isin(FORMAS_PAGAMENTO_VALIDAS).to_numpy())
+    gorjeta = np.where(pd.notna(dias[:, 3]), _para_float(dias[:, 3]), 0.0)
+
+    def realizado_ou(coluna, padrao):
+        # Valor da planilha apenas para atendimentos realizados e células preenchidas
+        valores_coluna = np.full(len(dias), padrao, dtype=object)
+        usar = realizado & pd.notna(dias[:, coluna])
+        valores_coluna[usar] = dias[usar, coluna]
+        return valores_coluna
+
+    pagamento = np.full(len(dias), None, dtype=object)
+    pagamento[realizado & pagamento_valido] = dias[realizado & pagamento_valido, 5]
+
+    blocos_celulas = bloco_da_celula[preenchidas]
+    info = pd.DataFrame([{k: b[k] for k in ('Nome', 'Categoria', 'Origem')} for b in blocos]).to_numpy()
+    return pd.DataFrame({
+        'Semana': sheet_name,
+        'Nome': info[blocos_celulas, 0],
+        'Categoria': info[blocos_celulas, 1],
+        'Origem': info[blocos_celulas, 2],
+        'Dia': np.array(DIAS_SEMANA, dtype=object)[dia_da_celula[preenchidas]],
+        'Data': dias[:, 1],
+        'Cliente': clientes,
+        'Serviço': np.where(realizado, servico, 0.0),
+        'Gorjeta': np.where(realizado, gorjeta, 0.0),
+        'Pets': realizado_ou(4, 0),
+        'Pagamento': pagamento,
+        'ID Pagamento': realizado_ou(6, None),
+        'Verificado': realizado_ou(7, False),
+        'Realizado': realizado
+    }, columns=COLUNAS_REGISTROS)
+
+
+def ler_conteudo(file):
+    """Retorna os bytes de uma planilha vinda de URL, caminho ou arquivo carregado"""
+    if isinstance(file, str) and file.startswith('http'):
+        with etapa('fetch', url=file):
+            return baixador_padrao().baixar(file)
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as f:
+            return f.read()
+    if isinstance(file, bytes):
+        return file
+    if hasattr(file, 'getvalue'):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def process_spreadsheet(file):
+    all_weeks_data = {}
+    if isinstance(file, str) and file.startswith('http'):
+        file = BytesIO(ler_conteudo(file))
+    elif isinstance(file, BytesIO):
+        file.seek(0)
+
+    xls = pd.ExcelFile(file)
+    for sheet_name in xls.sheet_names:
+        if sheet_name.startswith('WEEK'):
+            with etapa('parse', aba=sheet_name):
+                df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+                week_data = extrair_registros_semana(df, sheet_name)
+            if not week_data.empty:
+                all_weeks_data[sheet_name] = week_data
+
+    return combinar_semanas(all_weeks_data.values())
+
+
+def combinar_semanas(week_frames):
+    """Junta os registros das abas WEEK e normaliza datas e valores numéricos"""
+    week_frames = [df for df in week_frames if not df.empty]
+    if week_frames:
+        combined_data = pd.concat(week_frames, ignore_index=True)
+        combined_data['Data'] = pd.to_datetime(combined_data['Data'], errors='coerce')
+        combined_data['Serviço'] = pd.to_numeric(combined_data['Serviço'], errors='coerce')
+        combined_data['Gorjeta'] = pd.to_numeric(combined_data['Gorjeta'], errors='coerce').fillna(0)
+        combined_data['Pets'] = pd.to_numeric(combined_data['Pets'], errors='coerce').fillna(0)
+        combined_data = combined_data.dropna(subset=['Data'])
+        combined_data = combined_data[
+            ~combined_data['Cliente'].astype(str).str.strip().str.upper().isin([c.upper() for c in INVALID_CLIENTS])]
+        return otimizar_tipos(combined_data)
+    return pd.DataFrame()
+
+
+def _verificado(valor):
+    if isinstance(valor, str):
+        return valor.strip().upper() not in VERIFICADO_FALSO
+    return bool(valor) and pd.notna(valor)
+
+
+def otimizar_tipos(df):
+    """Converte os registros para tipos compactos
+
+    Colunas de poucos valores viram category, Pets vira o menor inteiro que
+    comporta os valores e Verificado/Realizado viram bool. Serviço e Gorjeta
+    continuam float64: são valores monetários somados em folhas de pagamento
+    e float32 perderia centavos nos totais. Texto em Arrow (o str do pandas)
+    que pd.concat deixou em vários pedaços é reunido em um só, para que os
+    take dos filtros não paguem um custo fixo por pedaço.
+    """
+    if df.empty:
+        return df
+    antes = df.memory_usage(deep=True).sum()
+    df = df.copy()
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    if 'Pets' in df.columns:
+        pets = pd.to_numeric(df['Pets'], errors='coerce').fillna(0)
+        inteiros = (pets % 1 == 0).all()
+        df['Pets'] = pd.to_numeric(pets, downcast='integer' if inteiros else 'float')
+    if 'Verificado' in df.columns and df['Verificado'].dtype != bool:
+        df['Verificado'] = df['Verificado'].map(_verificado).astype(bool)
+    if 'Realizado' in df.columns:
+        df['Realizado'] = df['Realizado'].astype(bool)
+    for coluna in df.columns:
+        tipo = df[coluna].dtype
+        if isinstance(tipo, pd.StringDtype) and tipo.storage == 'pyarrow':
+            texto = pa.array(df[coluna].array)
+            if isinstance(texto, pa.ChunkedArray) and texto.num_chunks > 1:
+                df[coluna] = pd.Series(texto.combine_chunks(), dtype=tipo, index=df.index)
+    depois = df.memory_usage(deep=True).sum()
+    logger.info("Registros otimizados: %.1f MB -> %.1f MB (%d linhas)", antes / 2 ** 20, depois / 2 ** 20, len(df))
+    return df
+
+
+def _converter_celula(valor):
+    """Converte um valor lido pelo openpyxl como o pd.read_excel converteria"""
+    if valor is None or (isinstance(valor, str) and valor in VALORES_AUSENTES):
+        return np.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def _bloco_para_dataframe(linhas):
+    largura = max(len(linha) for linha in linhas)
+    valores = np.full((len(linhas), largura), np.nan, dtype=object)
+    for i, linha in enumerate(linhas):
+        valores[i, :len(linha)] = linha
+    return pd.DataFrame(valores)
+
+
+def extrair_registros_linhas(linhas, sheet_name):
+    """Extrai os atendimentos de linhas lidas com openpyxl (values_only) de uma aba WEEK"""
+    linhas = [[_converter_celula(valor) for valor in linha] for linha in linhas]
+    if not linhas:
+        return pd.DataFrame(columns=COLUNAS_REGISTROS)
+    return extrair_registros_semana(_bloco_para_dataframe(linhas), sheet_name)
+
+
+def _registros_blocos(ws):
+    """Gera os registros de cada bloco de técnico de uma aba, mantendo só as linhas do bloco atual"""
+    ws.reset_dimensions()
+    bloco = None
+    for linha in ws.iter_rows(values_only=True):
+        linha = [_converter_celula(valor) for valor in linha]
+        if any(isinstance(valor, str) and 'NAME:' in valor for valor in linha):
+            if bloco:
+                registros = extrair_registros_semana(_bloco_para_dataframe(bloco), ws.title)
+                if not registros.empty:
+                    yield registros
+            bloco = []
+        if bloco is not None:
+            bloco.append(linha)
+    if bloco:
+        registros = extrair_registros_semana(_bloco_para_dataframe(bloco), ws.title)
+        if not registros.empty:
+            yield registros
+
+
+def iterar_registros_streaming(file):
+    """Gera (aba, registros) para cada bloco de técnico das abas WEEK
+
+    Lê a planilha com openpyxl em modo read_only, linha a linha, e só mantém
+    em memória as linhas do bloco de técnico atual: cada bloco é extraído
+    assim que a próxima linha 'NAME:' (ou o fim da aba) é encontrada. A
+    leitura de cada aba é medida como etapa 'parse', como em
+    process_spreadsheet; por isso os blocos de uma aba só são entregues
+    depois que ela termina.
+    """
+    # openpyxl só é carregado quando a primeira planilha é lida
+    import openpyxl
+
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    try:
+        for ws in wb.worksheets:
+            if not ws.title.startswith('WEEK'):
+                continue
+            with etapa('parse', aba=ws.title):
+                blocos = list(_registros_blocos(ws))
+            for registros in blocos:
+                yield ws.title, registros
+    finally:
+        wb.close()
+
+
+def process_spreadsheet_streaming(file):
+    """Equivalente a process_spreadsheet com memória limitada a um bloco de técnico por vez"""
+    if isinstance(file, str) and file.startswith('http'):
+        file = BytesIO(ler_conteudo(file))
+    elif isinstance(file, BytesIO):
+        file.seek(0)
+
+    # Os blocos chegam aba por aba: cada aba é concatenada assim que termina
+    all_weeks_data = []
+    aba_atual, blocos = None, []
+    for sheet_name, registros in iterar_registros_streaming(file):
+        if sheet_name != aba_atual and blocos:
+            all_weeks_data.append(pd.concat(blocos, ignore_index=True))
+            blocos = []
+        aba_atual = sheet_name
+        blocos.append(registros)
+    if blocos:
+        all_weeks_data.append(pd.concat(blocos, ignore_index=True))
+    return combinar_semanas(all_weeks_data)
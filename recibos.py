@@ -0,0 +1,217 @@
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import pandas as pd
+from fpdf import FPDF
+
+from tabela_pdf import DIAS_INGLES, desenhar_tabela, dias_em_ingles, formatar_moeda, truncar
+
+# Colunas dos atendimentos usadas no recibo: só elas são enviadas aos processos do pool
+COLUNAS_RECIBO = ['Nome', 'Semana', 'Data', 'Dia', 'Cliente', 'Serviço', 'Gorjeta', 'Pagamento', 'Pagamento Tecnico']
+
+# Recibos por processo do pool: cada processo novo (spawn) reimporta pandas e fpdf, cerca de 1 s,
+# o tempo de uns 50 recibos; abaixo de dois processos cheios tudo roda no processo atual
+RECIBOS_POR_PROCESSO = 50
+
+# Papel timbrado de cada processo do pool, recebido uma vez na inicialização
+_timbrado_processo = None
+
+
+class ReciboPDF(FPDF):
+    """FPDF que desenha o papel timbrado (Timbrado ou None) no início de cada página"""
+
+    def __init__(self, timbrado=None, **kwargs):
+        super().__init__(**kwargs)
+        self.timbrado = timbrado
+
+    def header(self):
+        if self.timbrado is not None:
+            self.timbrado.aplicar(self)
+            self.set_y(30)
+
+
+def create_tech_payment_receipt(tech_data, tech_name, week, timbrado=None):
+    """Cria um PDF com o recibo de pagamento detalhado para o técnico com papel timbrado"""
+    pdf = ReciboPDF(timbrado, orientation='P', unit='mm', format='A4')
+    pdf.add_page()
+
+    # Configurações de margem
+    left_margin = 15
+    right_margin = 15
+    pdf.set_left_margin(left_margin)
+    pdf.set_right_margin(right_margin)
+    page_width = pdf.w - left_margin - right_margin
+    page_height = pdf.h
+
+    # Calcular intervalo de datas
+    min_date = tech_data['Data'].min().strftime('%m/%d/%y')
+    max_date = tech_data['Data'].max().strftime('%m/%d/%y')
+    date_range = f"{min_date} to {max_date}"
+
+    # Restante do conteúdo do recibo
+    pdf.set_font("Arial", 'B', 18)
+    pdf.cell(page_width, 10, txt="TECHNICIAN PAYMENT RECEIPT", ln=1, align='C')
+    pdf.ln(9)
+
+    # Informações do técnico e semana
+    pdf.set_font("Arial", size=10)
+    pdf.cell(page_width, 8, txt=f"Technician: {tech_name}", ln=1)
+    pdf.cell(page_width, 8, txt=f"Reference: {date_range}", ln=1)  # Alterado para mostrar intervalo de datas
+    pdf.cell(page_width, 8, txt=f"Date of issue: {datetime.now().strftime('%m/%d/%Y')}", ln=1)
+    pdf.ln(10)
+
+    # Resumo de atendimentos
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(page_width, 10, txt="SUMMARY OF SERVICES", ln=1)
+    pdf.set_font("Arial", size=10)
+
+    total_services = tech_data['Serviço'].sum()
+    total_tips = tech_data['Gorjeta'].sum()
+    total_payment = tech_data['Pagamento Tecnico'].sum()
+
+    # Formata os valores
+    def format_value(value):
+        return f"${value:,.2f}" if isinstance(value, (int, float)) else str(value)
+
+    # Tabela de resumo
+    col_widths = [page_width / 2, page_width / 2]
+
+    pdf.cell(col_widths[0], 10, txt="Total Schedules:", border='B', ln=0)
+    pdf.cell(col_widths[1], 10, txt=str(len(tech_data)), border='B', ln=1, align='R')
+
+    pdf.cell(col_widths[0], 10, txt="Total in Services:", border='B', ln=0)
+    pdf.cell(col_widths[1], 10, txt=format_value(total_services), border='B', ln=1, align='R')
+
+    pdf.cell(col_widths[0], 10, txt="Total in Tips:", border='B', ln=0)
+    pdf.cell(col_widths[1], 10, txt=format_value(total_tips), border='B', ln=1, align='R')
+
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(col_widths[0], 10, txt="Total Payment", border='B', ln=0)
+    pdf.cell(col_widths[1], 10, txt=format_value(total_payment), border='B', ln=1, align='R')
+    pdf.set_font("Arial", size=10)
+
+    pdf.ln(15)
+
+    # Detalhes por dia
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(page_width, 10, txt="DETAILS BY DAY", ln=1)
+    pdf.set_font("Arial", size=8)
+
+    # Agrupar por dia
+    day_details = tech_data.groupby('Dia', observed=True).agg({
+        'Serviço': 'sum',
+        'Gorjeta': 'sum',
+        'Cliente': 'count'
+    }).reset_index()
+
+    # Mapear os dias para inglês e ordenar os dias corretamente
+    day_order = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+    day_details['Dia'] = pd.Categorical(day_details['Dia'].map(DIAS_INGLES), categories=day_order, ordered=True)
+    day_details = day_details.sort_values('Dia')
+
+    # Ajustado para caber no timbrado
+    desenhar_tabela(pdf, [("Day", 46, ''), ("Showed", 46, 'C'), ("Services", 47, 'R'), ("Tips", 46, 'R')],
+                    zip(day_details['Dia'].astype(str).tolist(), day_details['Cliente'].astype(str).tolist(),
+                        formatar_moeda(day_details['Serviço']), formatar_moeda(day_details['Gorjeta'])),
+                    topo=30)
+
+    pdf.ln(10)
+
+    # Detalhes dos atendimentos (se couber na página)
+    if pdf.get_y() < page_height - 50:  # Verifica se há espaço na página
+        pdf.set_font("Arial", 'B', 14)
+        pdf.cell(page_width, 10, txt="SERVICE DETAILS", ln=1)
+
+        # Ordenar por data e dia
+        tech_data_sorted = tech_data.sort_values(['Data', 'Dia'])
+
+        # Colunas formatadas de uma vez; nas páginas novas o cabeçalho é repetido abaixo do timbrado
+        pagamentos = tech_data_sorted['Pagamento'].astype(object).where(tech_data_sorted['Pagamento'].notna(), '-')
+        desenhar_tabela(
+            pdf,
+            [("Date", 25, ''), ("Day", 25, ''), ("Customer", 60, ''), ("Service", 25, 'R'), ("Tips", 25, 'R'),
+             ("Payment", 25, '')],
+            zip(tech_data_sorted['Data'].dt.strftime('%d/%m').tolist(),
+                dias_em_ingles(tech_data_sorted['Dia']),
+                truncar(tech_data_sorted['Cliente'], 20),
+                formatar_moeda(tech_data_sorted['Serviço']),
+                formatar_moeda(tech_data_sorted['Gorjeta']),
+                truncar(pagamentos, 12, reticencias=False)),
+            topo=30)
+
+    # Informação da empresa no rodapé
+    pdf.set_font("Arial", size=8)
+    pdf.cell(page_width, 5, txt="BRIGHT N SHINE PET DENTAL LLC", ln=1, align='C')
+    pdf.cell(page_width, 5, txt="(407)259-7897", ln=1, align='C')
+
+    return pdf
+
+
+def nome_arquivo_recibo(tech_name, week):
+    """Nome do PDF do recibo, o mesmo usado no download individual"""
+    return f"recibo_pagamento_{tech_name}_{week}.pdf".replace('/', '-')
+
+
+def pares_tecnico_semana(completed_services):
+    """(técnico, semana, atendimentos) de cada par com atendimentos, em ordem de técnico e semana"""
+    dados = completed_services[COLUNAS_RECIBO]
+    return [(tech_name, week, tech_data)
+            for (tech_name, week), tech_data in dados.groupby(['Nome', 'Semana'], observed=True, sort=True)]
+
+
+def _iniciar_processo(timbrado):
+    global _timbrado_processo
+    _timbrado_processo = timbrado
+
+
+def _gerar_recibo(tarefa, timbrado=None):
+    tech_name, week, tech_data = tarefa
+    pdf = create_tech_payment_receipt(tech_data, tech_name, week, timbrado or _timbrado_processo)
+    return nome_arquivo_recibo(tech_name, week), pdf.output(dest='S').encode('latin-1')
+
+
+def gerar_recibos_zip(completed_services, destino, max_processos=None, progresso=None, timbrado=None):
+    """Gera o recibo de cada par (técnico, semana) dos atendimentos e grava todos em um ZIP
+
+    Cada PDF é gravado em destino (caminho ou arquivo binário aberto) assim
+    que fica pronto, na ordem de pares_tecnico_semana, sem manter os demais
+    em memória. O pool de processos só é usado com pelo menos
+    RECIBOS_POR_PROCESSO recibos para cada um de dois ou mais processos
+    (no máximo max_processos, padrão: CPUs); com menos recibos, ou com
+    max_processos=1, tudo roda no processo atual. progresso(feitos, total,
+    recibos_por_segundo) é chamado após cada recibo. timbrado (Timbrado ou
+    None) é enviado uma única vez a cada processo e reaproveitado em todos
+    os recibos. Retorna um dict com 'recibos', 'segundos' e 'por_segundo'.
+    """
+    tarefas = pares_tecnico_semana(completed_services)
+    max_processos = min(max_processos or os.cpu_count() or 1, len(tarefas) // RECIBOS_POR_PROCESSO)
+    inicio = time.perf_counter()
+    pool = None
+    if max_processos > 1:
+        # spawn evita herdar as threads do servidor do Streamlit nos processos filhos
+        pool = ProcessPoolExecutor(max_workers=max_processos, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_iniciar_processo, initargs=(timbrado,))
+        # Lotes de vários recibos por envio reduzem o custo de comunicação entre processos
+        recibos = pool.map(_gerar_recibo, tarefas, chunksize=max(1, len(tarefas) // (max_processos * 8)))
+    else:
+        recibos = map(partial(_gerar_recibo, timbrado=timbrado), tarefas)
+
+    try:
+        # Os PDFs já saem comprimidos pelo FPDF: o ZIP só os armazena
+        with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+            for feitos, (nome, conteudo) in enumerate(recibos, start=1):
+                arquivo_zip.writestr(nome, conteudo)
+                if progresso is not None:
+                    progresso(feitos, len(tarefas), feitos / (time.perf_counter() - inicio))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    segundos = time.perf_counter() - inicio
+    return {'recibos': len(tarefas), 'segundos': segundos,
+            'por_segundo': len(tarefas) / segundos if segundos > 0 else 0.0}
@@ -0,0 +1,166 @@
+from datetime import datetime
+
+import pandas as pd
+
+from agregacoes import MEDIDAS_CUBO, resumir, resumo_dias, resumo_pagamentos
+from planilhas import FORMAS_PAGAMENTO_VALIDAS
+from tabela_pdf import desenhar_tabela, formatar_moeda, truncar
+
+
+def format_currency(value):
+    """Formata valores como moeda USD com 2 casas decimais"""
+    if pd.isna(value):
+        return None
+    return f"${value:,.2f}"
+
+
+def create_pdf(cubo, not_completed):
+    """Cria um PDF com os dados da página principal a partir do cubo de agregação"""
+    # fpdf só é carregado quando o primeiro relatório é gerado
+    from fpdf import FPDF
+
+    pdf = FPDF(orientation='P', unit='mm', format='A4')
+    pdf.add_page()
+    pdf.set_font("Arial", size=10)
+
+    # Configurações de margem
+    left_margin = 10
+    right_margin = 10
+    pdf.set_left_margin(left_margin)
+    pdf.set_right_margin(right_margin)
+    page_width = pdf.w - left_margin - right_margin
+
+    # Adiciona título
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(page_width, 10, txt="BNS - PORTAL DE ANÁLISES DE DADOS FINANCEIROS", ln=1, align='C')
+    pdf.ln(5)
+
+    # Adiciona data de geração
+    pdf.set_font("Arial", size=10)
+    pdf.cell(page_width, 10, txt=f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", ln=1, align='R')
+    pdf.ln(10)
+
+    # Seção 1: Métricas Gerais
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(page_width, 10, txt="1. Métricas Gerais", ln=1)
+    pdf.set_font("Arial", size=10)
+
+    totais = cubo[MEDIDAS_CUBO].sum()
+
+    metrics = [
+        ("Atendimentos Realizados", int(totais['Atendimentos'])),
+        ("Atendimentos Não Realizados", len(not_completed)),
+        ("Total em Serviços", format_currency(totais['Serviço'])),
+        ("Total em Gorjetas", format_currency(totais['Gorjeta'])),
+        ("Lucro da Empresa", format_currency(totais['Lucro Empresa']))
+    ]
+
+    for metric, value in metrics:
+        pdf.cell(page_width / 2, 10, txt=f"{metric}:", ln=0)
+        pdf.cell(page_width / 2, 10, txt=str(value), ln=1)
+
+    pdf.ln(10)
+
+    # Seção 2: Resumo por Técnico
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(page_width, 10, txt="2. Resumo por Técnico", ln=1)
+
+    # Prepara dados para a tabela
+    tech_summary = resumir(cubo, ['Nome', 'Categoria'])[
+        ['Nome', 'Categoria', 'Serviço', 'Gorjeta', 'Pagamento Tecnico', 'Lucro Empresa', 'Clientes']]
+
+    # Adiciona tabela de técnicos (fonte menor e larguras ajustadas para caber na página)
+    desenhar_tabela(
+        pdf,
+        [("Técnico", 30, ''), ("Categoria", 25, ''), ("Serviços", 25, 'R'), ("Gorjetas", 25, 'R'),
+         ("Pagamento", 25, 'R'), ("Lucro", 25, 'R')],
+        zip(truncar(tech_summary['Nome'], 15),
+            truncar(tech_summary['Categoria'], 10, reticencias=False),
+            formatar_moeda(tech_summary['Serviço']),
+            formatar_moeda(tech_summary['Gorjeta']),
+            formatar_moeda(tech_summary['Pagamento Tecnico']),
+            formatar_moeda(tech_summary['Lucro Empresa'])),
+        altura=10, tamanho_fonte=8, cabecalho_negrito=False)
+
+    pdf.ln(10)
+
+    # Seção 3: Métodos de Pagamento
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(page_width, 10, txt="3. Métodos de Pagamento", ln=1)
+    pdf.set_font("Arial", size=10)
+
+    payment_methods = resumo_pagamentos(cubo, FORMAS_PAGAMENTO_VALIDAS)
+
+    if not payment_methods.empty:
+        payment_methods = payment_methods[['Pagamento', 'Serviço', 'Atendimentos', 'Gorjeta', 'Lucro Empresa']]
+        payment_methods.columns = ['Método', 'Total Serviços', 'Qtd Usos', 'Total Gorjetas', 'Lucro Empresa']
+        payment_methods['Total Geral'] = payment_methods['Total Serviços'] + payment_methods['Total Gorjetas']
+
+        # Tabela de métodos de pagamento
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(page_width, 10, txt="Resumo por Método de Pagamento:", ln=1)
+        metodos = payment_methods['Método'].astype(str).tolist()
+        usos = payment_methods['Qtd Usos'].astype(str).tolist()
+        desenhar_tabela(
+            pdf,
+            [("Método", 30, ''), ("Usos", 20, 'C'), ("Serviços", 25, 'R'), ("Gorjetas", 25, 'R'),
+             ("Total", 25, 'R'), ("Lucro", 25, 'R')],
+            zip(truncar(metodos, 12, reticencias=False), usos,
+                formatar_moeda(payment_methods['Total Serviços']),
+                formatar_moeda(payment_methods['Total Gorjetas']),
+                formatar_moeda(payment_methods['Total Geral']),
+                formatar_moeda(payment_methods['Lucro Empresa'])),
+            altura=10, tamanho_fonte=8, cabecalho_negrito=False)
+
+        # Adiciona porcentagem de uso
+        pdf.ln(5)
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(page_width, 10, txt="Distribuição por Método de Pagamento:", ln=1)
+
+        percentuais = (payment_methods['Qtd Usos'] / payment_methods['Qtd Usos'].sum() * 100).tolist()
+        desenhar_tabela(
+            pdf, [(None, page_width / 2, ''), (None, page_width / 2, '')],
+            zip([f"{metodo}:" for metodo in metodos],
+                [f"{percent:.1f}% ({qtd} usos)" for percent, qtd in zip(percentuais, usos)]),
+            altura=10, tamanho_fonte=10, borda=0)
+
+    pdf.ln(10)
+
+    # Seção 4: Atendimentos por Dia da Semana
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(page_width, 10, txt="4. Atendimentos por Dia da Semana", ln=1)
+    pdf.set_font("Arial", size=10)
+
+    # Dias já ordenados de domingo a sábado
+    day_summary = resumo_dias(cubo)[['Dia', 'Atendimentos', 'Serviço', 'Gorjeta', 'Lucro Empresa']]
+    day_summary.columns = ['Dia', 'Atendimentos', 'Total Serviços', 'Total Gorjetas', 'Lucro Empresa']
+
+    # Tabela de dias
+    desenhar_tabela(
+        pdf,
+        [("Dia", 30, ''), ("Atend.", 25, 'C'), ("Serviços", 30, 'R'), ("Gorjetas", 30, 'R'), ("Lucro", 30, 'R')],
+        zip(day_summary['Dia'].astype(str).tolist(), day_summary['Atendimentos'].astype(str).tolist(),
+            formatar_moeda(day_summary['Total Serviços']),
+            formatar_moeda(day_summary['Total Gorjetas']),
+            formatar_moeda(day_summary['Lucro Empresa'])),
+        altura=10, tamanho_fonte=8, cabecalho_negrito=False)
+
+    pdf.ln(10)
+
+    # Seção 5: Atendimentos Não Realizados
+    if len(not_completed) > 0:
+        pdf.set_font("Arial", 'B', 14)
+        pdf.cell(page_width, 10, txt="5. Atendimentos Não Realizados", ln=1)
+        pdf.set_font("Arial", size=10)
+
+        pdf.cell(page_width, 10, txt=f"Total de atendimentos não realizados: {len(not_completed)}", ln=1)
+
+        # Lista os primeiros 10 atendimentos não realizados
+        pdf.set_font("Arial", size=8)
+        primeiros = not_completed.head(10)
+        for nome, dia, data, cliente in zip(primeiros['Nome'].tolist(), primeiros['Dia'].tolist(),
+                                            primeiros['Data'].dt.strftime('%d/%m').tolist(),
+                                            primeiros['Cliente'].tolist()):
+            pdf.cell(page_width, 10, txt=f"- {nome} | {dia} {data} | {cliente}", ln=1)
+
+    return pdf
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+DIAS_INGLES = {
+    'Domingo': 'Sun',
+    'Segunda': 'Mon',
+    'Terça': 'Tue',
+    'Quarta': 'Wed',
+    'Quinta': 'Thu',
+    'Sexta': 'Fri',
+    'Sábado': 'Sat'
+}
+
+
+def formatar_moeda(valores):
+    """Textos '$1,234.56' de uma coluna numérica inteira ('' para valores ausentes)"""
+    return ['' if v != v else f"${v:,.2f}" for v in np.asarray(valores, dtype=float).tolist()]
+
+
+def truncar(valores, limite, reticencias=True):
+    """Textos da coluna cortados em limite caracteres, com '...' nos que foram cortados"""
+    textos = pd.Series(valores, dtype=object).astype(str)
+    if not reticencias:
+        return textos.str[:limite].tolist()
+    return np.where(textos.str.len() > limite, textos.str[:limite] + '...', textos).tolist()
+
+
+def dias_em_ingles(valores):
+    """Abreviação em inglês de cada dia da semana (valores fora da tabela ficam como estão)"""
+    dias = pd.Series(valores, dtype=object)
+    return dias.map(DIAS_INGLES).fillna(dias).astype(str).tolist()
+
+
+def desenhar_tabela(pdf, colunas, linhas, altura=6, tamanho_fonte=7, cabecalho_negrito=True, borda=1, topo=None):
+    """Desenha uma tabela a partir de linhas já formatadas (tuplas de textos)
+
+    colunas é uma lista de (título, largura, alinhamento das células); se
+    nenhuma coluna tem título, a tabela não tem cabeçalho. A quebra de
+    página é feita antes de uma linha que não cabe mais, para que nenhuma
+    linha fique dividida, e o cabeçalho é repetido no topo da página nova
+    (em topo, se informado, ex.: abaixo do timbrado). Um cabeçalho que não
+    teria nenhuma linha abaixo dele na página também vai para a seguinte.
+    """
+    tem_cabecalho = any(titulo is not None for titulo, _, _ in colunas)
+    celulas = [(largura, alinhamento) for _, largura, alinhamento in colunas]
+
+    def nova_pagina():
+        pdf.add_page()
+        if topo is not None:
+            pdf.set_y(topo)
+
+    def cabecalho():
+        if tem_cabecalho:
+            pdf.set_font("Arial", 'B' if cabecalho_negrito else '', tamanho_fonte)
+            for titulo, largura, _ in colunas:
+                pdf.cell(largura, altura, txt=titulo or '', border=borda, align='C')
+            pdf.ln()
+        pdf.set_font("Arial", size=tamanho_fonte)
+
+    # Cabeçalho sem espaço para ao menos uma linha já começa na página seguinte
+    if tem_cabecalho and pdf.get_y() + 2 * altura > pdf.page_break_trigger:
+        nova_pagina()
+    cabecalho()
+    for linha in linhas:
+        if pdf.get_y() + altura > pdf.page_break_trigger:
+            nova_pagina()
+            cabecalho()
+        for texto, (largura, alinhamento) in zip(linha, celulas):
+            pdf.cell(largura, altura, txt=texto, border=borda, align=alinhamento)
+        pdf.ln()
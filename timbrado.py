@@ -0,0 +1,59 @@
+import hashlib
+import os
+import tempfile
+
+from download import baixador_padrao
+from instrumentacao import etapa
+
+# Assinatura dos formatos de imagem aceitos pelo FPDF
+EXTENSOES_IMAGEM = {b'\x89PNG': '.png', b'\xff\xd8\xff': '.jpg', b'GIF8': '.gif'}
+
+
+class Timbrado:
+    """Imagem do papel timbrado dos recibos, carregada e decodificada uma única vez
+
+    origem é um caminho local ou uma URL. URLs são baixadas pelo baixador
+    compartilhado (cache com revalidação) e gravadas em diretorio com o hash
+    do conteúdo no nome. A imagem é decodificada na criação e cada documento
+    recebe essa versão pronta: o FPDF a embute uma vez por documento e a
+    reaproveita em todas as páginas. Arquivo inexistente, download com erro
+    ou imagem inválida levantam exceção na criação, em vez de gerar recibos
+    sem o timbrado.
+    """
+
+    def __init__(self, origem, diretorio=None):
+        if origem.startswith('http'):
+            origem = self._guardar_download(origem, diretorio or tempfile.gettempdir())
+        elif not os.path.isfile(origem):
+            raise FileNotFoundError(f"Papel timbrado não encontrado: {origem}")
+        self.caminho = os.path.abspath(origem)
+
+        # O FPDF guarda a imagem decodificada em images[nome]; é essa entrada que é reaproveitada
+        from fpdf import FPDF
+
+        modelo = FPDF()
+        modelo.add_page()
+        modelo.image(self.caminho, x=0, y=0, w=1)
+        self.imagem = modelo.images[self.caminho]
+
+    @staticmethod
+    def _guardar_download(url, diretorio):
+        with etapa('fetch', url=url):
+            conteudo = baixador_padrao().baixar(url)
+        extensao = next((ext for assinatura, ext in EXTENSOES_IMAGEM.items() if conteudo.startswith(assinatura)),
+                        None)
+        if extensao is None:
+            raise ValueError(f"Papel timbrado não é uma imagem PNG, JPEG ou GIF: {url}")
+        caminho = os.path.join(diretorio, f"timbrado-{hashlib.sha256(conteudo).hexdigest()[:16]}{extensao}")
+        if not os.path.exists(caminho):
+            temporario = caminho + '.tmp'
+            with open(temporario, 'wb') as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, caminho)
+        return caminho
+
+    def aplicar(self, pdf):
+        """Desenha o timbrado ocupando a página atual inteira"""
+        if self.caminho not in pdf.images:
+            pdf.images[self.caminho] = dict(self.imagem, i=len(pdf.images) + 1)
+        pdf.image(self.caminho, x=0, y=0, w=pdf.w, h=pdf.h)